@@ -1,1156 +1,4077 @@
-import os, sys, struct, json
-from fractions import Fraction
-
-flag_3ds = False
-ds_flag = False
-mobile_flag = False
-mode = "to_json"
-name_order_flag = False
-debug = False
-endianness = "<"
-
-def log(string):
-    if debug:
-        if type(string) == dict or type(string) == list :
-            print(json.dumps(string, indent=4))
-        else:
-            print(string)
-
-aspect_ratio_dict = {1.7647058963775635 : "480x272",        #PSP
-                     1.666748046875 : "400x240",            #3DS top screen
-                     1.333251953125 : "256x192",            #3DS bottom screen         
-                     1.4285714626312256 : "640x448",        #Wii 4:3
-                     1.7763158082962036 : "811x456",        #Wii 16:9
-                     0.5625 : "720x1280",                   #Mobile
-                     0.5633803009986877 : "720x1280",       #Mobile - Newer versions of Quest?
-                     0.6666666865348816 : "720x1280",       #Taller Mobile (?) Puyo touch
-                     1.3333333730697632 : "256x192",        #unk 4:3, possibly DS
-                     1.7777777910232544 : "1280x720"}       #unk 16:9
-
-def getScreenSize(aspect_ratio):
-    screen_size = aspect_ratio_dict[aspect_ratio]
-    if screen_size == "256x192" and flag_3ds:
-        screen_size = "320x240"
-    return screen_size
-
-#Get the command arguments
-try:
-    #input file
-    input_file = sys.argv[1:][0]
-    #determine the output file path
-    if input_file == "-help" or input_file == "-h" or input_file == "-?":
-        raise
-    if input_file.endswith(".json"):
-        output_file = input_file[:-5] #remove .json from the filename
-    else:
-        output_file = input_file + ".json"
-    
-    #Get arguments
-    arg_index = 0
-    for argument in sys.argv[1:]:
-        #output
-        if argument.find("-o") != -1:
-            output_file = sys.argv[1:][arg_index+1]
-        
-        #ds/3ds file
-        if argument.find("-ds") != -1 or argument.find("-3ds") != -1:
-            if argument.find("-3ds") != -1:
-                flag_3ds = True
-            ds_flag = True
-        
-        #puyo quest / puyo touch
-        if argument.find("-m") != -1:
-            ds_flag = False #just in case, since mobile =/= ds
-            mobile_flag = True
-        arg_index += 1
-        
-        #name order blegh
-        if argument.find('--name_order') != -1:
-            name_order_flag = True
-        
-        #debug
-        if argument.find('--debug') != -1 or argument.find('-dbg') != -1:
-            debug = True
-        
-    #Now let's determine if we're converting from json or to json
-    if input_file.find(".json") != -1:
-        mode = "to_anim"
-    else:
-        mode = "to_json"
-        #What if the output doesn't have .json?
-        log("Did you forget to add .json to the output? I'll add it instead.")
-        if output_file.find(".json") == -1:
-            output_file += ".json"
-
-except:
-    print("Correct usage: \n\npuyo_anim.py [input] [options]\n\nAvailable options:\n        '-o' Output file. This will be determined automatically if not set.")
-    print("        '-ds' Converting to or from a Nintendo DS animation file.\n        '-3ds' Converting to or from a Nintendo 3DS animation file.\n        '-m' Converting to or from a mobile file. This includes Puyo Puyo Quest and Puyo Puyo Touch.")
-    print("        '--name_order' Keep the order of the elements.\n                       Some animation files have an oddly specific order for it's names that the games can be hardcoded to expect.\n                       Recommended if you're editing UI or Manzai animations, but not for general animation editing, like cut-ins.")
-    print("        '-dbg' | '--debug' Enable printing debug info")
-    print("Example:\n        puyo_anim.py title.snc -o title.snc.json\n        Converts from an animation file to a .json")
-    print("\nThe conversion will depend on the file extension of the input.\nIf the extension is '.json', then it will convert the json to it's corresponding animation file format.\nIf it has any extension other than 'json', or no extension at all, it will treat the input file as an animation file.")
-    exit()
-
-def bytesToInt(offset, length):
-    if length == 4:
-        data_type = "i"
-    if length == 8:
-        data_type = "q"
-    value = anim_file_data[offset].to_bytes(1, "big")
-    for i in range(length-1):
-        value += anim_file_data[offset + i +1].to_bytes(1, "big")
-        
-    value = struct.unpack(endianness + data_type,value)[0]
-    
-    log("Value at offset " + str(offset) + " converted to int " + str(value) + " length in bytes: " + str(length))
-    
-    return value
-
-def bytesToFloat(offset):
-    data_type = "f"
-    value = anim_file_data[offset].to_bytes(1, "big")
-    #Handle DS floats
-    if ds_flag:
-        value = bytesToInt(offset, 4)/2 **12
-    else:
-        for i in range(3):
-            value += anim_file_data[offset + i +1].to_bytes(1, "big")
-            
-        value = struct.unpack(endianness + data_type,value)[0]
-        
-    log("Value at offset " + str(offset) + " converted to float " + str(value))
-    
-    return value
-
-def bytesToPointer(offset):
-    if mobile_flag:
-        length = 8
-    else:
-        length = 4
-    pointer_value = bytesToInt(offset, length)
-    
-    pointer_value += alignment
-    
-    log("Value at offset " + str(offset) + " is a pointer to " + str(pointer_value))
-    return((pointer_value, length + offset))
-
-def get_string(offset, length = False):
-    string = b''
-    while True:
-        if anim_file_data[offset] == 0:
-            break
-        elif length != False:
-            if len(string) == length:
-                break
-        string += anim_file_data[offset].to_bytes(1, "big")
-        offset += 1
-        
-    return string.decode("shift-jis")
-
-def packRGBA(rgba_dict, f, byte_order = False):
-    rgba_list = []
-    if byte_order == False:
-        byte_order = endianness
-    if byte_order == "<":
-        f.write(struct.pack(endianness + "B", rgba_dict["alpha"]))
-        f.write(struct.pack(endianness + "B", rgba_dict["blue"]))
-        f.write(struct.pack(endianness + "B", rgba_dict["green"]))
-        f.write(struct.pack(endianness + "B", rgba_dict["red"]))
-    if byte_order == ">":
-        f.write(struct.pack(endianness + "B", rgba_dict["red"]))
-        f.write(struct.pack(endianness + "B", rgba_dict["green"]))
-        f.write(struct.pack(endianness + "B", rgba_dict["blue"]))
-        f.write(struct.pack(endianness + "B", rgba_dict["alpha"]))
-        
-
-def packInt(integer, length, byte_order = False):
-    if byte_order == False:
-        byte_order = endianness
-    if length == 4:
-        data_type = "i"
-    if length == 8:
-        data_type = "q"
-    return(struct.pack(byte_order + data_type, integer))
-
-def packFloat(floating, byte_order = False):
-    if byte_order == False:
-        byte_order = endianness
-    if ds_flag:
-        return(struct.pack(byte_order + "i", floatToFixed(floating)))
-    else:
-        return(struct.pack(byte_order + "f", floating))
-
-def floatToFixed(number):
-    number = int(number* 4096)
-    return number
-
-def padString(text, block_size = 4):
-    pad_size = block_size - len(text)% block_size
-    fit_text = text + (" "*pad_size)
-    return (fit_text)
-
-def packPointer(number, byte_order = False):
-    if byte_order == False:
-        byte_order = endianness
-    if mobile_flag:
-        return(struct.pack(byte_order + "q", number))
-    else:
-        return(struct.pack(byte_order + "i", number))
-        
-#debug shit i guess
-log("input file: " + input_file)
-log("output file: " + output_file)
-log("DS flag: " + str(ds_flag))
-log("3DS flag: " + str(flag_3ds))
-log("Mobile flag: " + str(mobile_flag))
-log("mode: " + mode + "\n\n")
-
-########## Misc functions #########
-
-
-def getEdgeList(hierarchy):
-    #0 can't have parent as far as i'm aware
-    #hierarchy[0] = -1
-    adjacency = {-1:[0]}
-    for element in range(len(hierarchy)):
-        adjacency[element] = []
-        
-    #(adjacency)
-    elm_index = 0
-    for element in hierarchy:
-        try:
-            if elm_index not in adjacency[element]:
-                adjacency[element].append(elm_index)
-        except:
-            if elm_index not in adjacency[-1]:
-                adjacency[-1].append(elm_index)
-        elm_index += 1
-    
-    edge =  [[None,None] for _ in range(len(hierarchy))]
-    scope_list = [-1]
-    elements_added = []
-    current_element=-1
-    #Check if the element has a child
-    while len(scope_list) != 0:
-        if current_element == -1:
-            if len(adjacency[-1]) != 0:
-                current_element = adjacency[-1][0]
-                adjacency[-1].pop(0)
-        #check if the current element's children list is not empty
-        if len(adjacency[current_element]) != 0:
-            #current child
-            child = adjacency[current_element][0]
-            #add child to edge list for the current element.
-            if adjacency[current_element][0] not in elements_added:
-                edge[current_element][0] = adjacency[current_element][0]
-                elements_added.append(adjacency[current_element][0])
-            #add current element to scope list, so we can check for further children later.
-            scope_list.append(current_element)
-            adjacency[current_element].pop(0)
-            #make current element the child, so we can check if it has any children.
-            current_element = child
-        else:
-            #add -1 to the current element's child
-            if edge[current_element][0] == None:
-                edge[current_element][0] = -1
-            
-            #current scope
-            current_scope = scope_list[len(scope_list)-1]
-            #check if there's another element in the current scope
-            if len(adjacency[current_scope]) != 0:
-                #get the new child
-                new_child = adjacency[current_scope][0]
-                #remove it.
-                adjacency[current_scope].pop(0)
-                if new_child not in elements_added:
-                    #add it to edge list of the current element.
-                    edge[current_element][1] = new_child
-                    elements_added.append(new_child)
-                #make it the new current element
-                current_element = new_child
-            else:
-                #add -1 to edge
-                edge[current_element][1] = -1
-                current_element = scope_list[len(scope_list)-1]
-                #remove last element from scope
-                scope_list.pop()
-    return(edge)
-
-def sortMotion(dict):
-    return ["hide", "posx", "posy", "angle", "scalex", "scaley", "sprite_index", "rgba", "rgba_tl", "rgba_bl", "rgba_tr", "rgba_br", "audio_cue?" , "3d_depth", "unk_motion"].index(dict['Motion'])
-
-motion_names = {1 : "hide",
-                2 : "posx",
-                4 : "posy",
-                8 : "angle",
-                16: "scalex",
-                32: "scaley",
-                64: "sprite_index",
-                128 : "rgba",
-                256 : "rgba_tl",
-                512 : "rgba_bl",
-                1024 : "rgba_tr",
-                2048 : "rgba_br",
-                4096 : "audio_cue?",
-                8192 : "3d_depth",
-                16384 : "unk_motion",
-                "hide"         : 1    ,
-                "posx"         : 2    ,
-                "posy"         : 4    ,
-                "angle"        : 8    ,
-                "scalex"       : 16   ,
-                "scaley"       : 32   ,
-                "sprite_index" : 64   ,
-                "rgba"         : 128  ,
-                "rgba_tl"      : 256  ,
-                "rgba_bl"      : 512  ,
-                "rgba_tr"      : 1024 ,
-                "rgba_br"      : 2048 ,
-                "audio_cue?"   : 4096 ,
-                "3d_depth"     : 8192 ,
-                "unk_motion"   : 16384
-                }
-
-
-def get_powers(number):
-    powers = (16384, 8192, 4096, 2048, 1024 , 512, 256, 128, 64, 32, 16, 8,4, 2, 1)
-    which_power = 0
-    power_list = []
-    while True:
-        if (number / powers[which_power]).is_integer():
-            power_list.append(powers[which_power])
-            number -= powers[which_power]
-            which_power = 0
-            if number < 1:
-                break
-        else:
-            which_power += 1
-    return power_list
-    
-
-def four_bytes_to_RGBA(offset):   #convert the 4 next bytes to an float
-    if endianness == "<":
-        rgba = {"red" : anim_file_data[offset+3], "green" : anim_file_data[offset+2], "blue" : anim_file_data[offset+1],"alpha" : anim_file_data[offset]}
-    else:
-        rgba = {"red" : anim_file_data[offset], "green" : anim_file_data[offset+1], "blue" : anim_file_data[offset+2],"alpha" : anim_file_data[offset+3]}
-    return rgba
-
-def get_render_method(offset):
-    if endianness == ">":
-        render = {"dodge_blend": anim_file_data[offset+3],
-                  "unknown_1" : anim_file_data[offset+2],
-                  "unknown_2" : anim_file_data[offset+1],}
-    else:
-        render = {"dodge_blend": anim_file_data[offset],
-                  "unknown_1" : anim_file_data[offset+1],
-                  "unknown_2" : anim_file_data[offset+2],}
-    return render
-
-def get_hierarchy(offset, num_of_elms):
-    hierarchy = []
-    for i in range(num_of_elms):
-        hierarchy.append([bytesToInt(offset+i*8, 4), bytesToInt(offset+4+i*8, 4)])
-    
-    #print(hierarchy)
-    parenting = getParentData(hierarchy)
-    hierarchy = []
-    for a in parenting:
-        if a == None:
-            hierarchy.append(-1)
-        else:
-            hierarchy.append(a)
-    
-    return hierarchy
-
-def getParentData(array):
-
-
-    #print(array)
-    n = len(array)
-    parents = [-1] * n  
-    
-    def traverse(node, parent):
-        left_child, right_sibling = array[node]
-        parents[node] = parent
-
-        if left_child != -1:
-            traverse(left_child, node)
-        
-        if right_sibling != -1:
-            traverse(right_sibling, parent)
-
-    traverse(0, -1)
-    log("hierarchy: ")
-    log(array)
-    
-    log("parenting array: ")
-    log(parents)
-    return parents
-
-
-
-
-
-#Anim to json
-if mode == "to_json":
-    anim_file_data = open(input_file, "r+b").read()
-    try:
-        ncsc = get_string(32,4)
-    except:
-        print(input_file, "is not a valid animation file.")
-        #input("not anim")
-        exit()
-    if get_string(32,4) != "nCSC" :
-        print(input_file, "is not a valid animation file.")
-        #input("not anim")
-        exit()
-    log("starting conversion to json")
-    
-    #determine endianness
-    if bytesToInt(8,4) == 1:
-        endianness = "<"
-    else:
-        endianness = ">"
-    log("byte order: " + endianness)
-    
-    #determine alignment
-    #For now it seems to be 32 always, but i can change it later here if that's not the case.
-    alignment = bytesToInt(12,4)
-    log("alignment: " + str(alignment) )
-    
-    
-    #Let's begin!!!!!!!
-    #Let's first get the relevant header data.
-    magic = get_string(0,4)
-    
-    #The unknown patterns are always here.
-    data_offset = 68
-    num_unk_pattern = bytesToInt(data_offset,4)
-    data_offset += 4
-    unk_pattern_off, data_offset = bytesToPointer(data_offset)
-    
-    #sprite crops
-    num_sprite_crops = bytesToInt(data_offset,4)
-    data_offset += 4
-    sprite_crops_off, data_offset = bytesToPointer(data_offset)
-    
-    #get element banks
-    num_elem_banks = bytesToInt(data_offset,4)
-    data_offset += 4
-    elem_banks_off, data_offset = bytesToPointer(data_offset)
-    
-    #element names
-    num_elem_names = bytesToInt(data_offset,4)
-    data_offset += 4
-    elem_names_off, data_offset = bytesToPointer(data_offset)
-    
-    #animations
-    num_anims = bytesToInt(data_offset,4)
-    data_offset += 4
-    anims_off, data_offset = bytesToPointer(data_offset)
-    
-    #animation names
-    anim_names_off, data_offset = bytesToPointer(data_offset)
-    
-    #aspect ratio
-    aspect_ratio = Fraction(bytesToFloat(data_offset)).limit_denominator()
-    screen_size = getScreenSize(bytesToFloat(data_offset))
-    data_offset += 4
-    log("unk patterns: " + str(num_unk_pattern))
-    log("sprite crops: " + str(num_sprite_crops))
-    log("element banks: " + str(num_elem_banks))
-    log("elements: " + str(num_elem_names))
-    log("animations: " + str(num_anims))
-    log("screen size: " + str(screen_size))
-    
-    #animation lengths
-    anim_len_off, data_offset = bytesToPointer(data_offset)
-    
-    #Header data is over. Now let's start storing the data.
-    
-    #Unknown Patterns
-    data_offset = unk_pattern_off
-    unk_pattern_list = []
-    for i in range(num_unk_pattern):
-        unk_pattern_list.append((bytesToFloat(data_offset), bytesToFloat(data_offset+4)))
-        data_offset += 8
-    log("\nunknown patterns:")
-    log(unk_pattern_list)
-    
-    data_offset = sprite_crops_off
-    sprite_crop_list = []
-    #Sprite Crops:
-    for i in range(num_sprite_crops):
-        texture = bytesToInt(data_offset,4)
-        data_offset +=4
-        top_left_X = bytesToFloat(data_offset)
-        data_offset +=4
-        top_left_Y = bytesToFloat(data_offset)
-        data_offset +=4
-        bottom_right_X = bytesToFloat(data_offset)
-        data_offset +=4
-        bottom_right_Y = bytesToFloat(data_offset)
-        data_offset +=4
-        
-        sprite_crop_list.append({"texture": texture,
-                                 "top_left_X": top_left_X,
-                                 "top_left_Y": top_left_Y,
-                                 "bottom_right_X": bottom_right_X,
-                                 "bottom_right_Y": bottom_right_Y})
-    log("\nsprite crops")
-    for i in sprite_crop_list:
-        log(i)
-    
-    #element banks (uh oh)
-    data_offset = elem_banks_off
-    element_banks = []
-    #for every bank of elements
-    for bank in range(num_elem_banks):
-        num_elem_in_bank = bytesToInt(data_offset, 4)
-        data_offset += 4
-        elem_list_off, data_offset = bytesToPointer(data_offset)
-        log("unknown int(?) value at " + str(data_offset) + " : " + str(bytesToInt(data_offset, 4)))
-        data_offset += 4
-        hierarchy_off, data_offset = bytesToPointer(data_offset)
-        element_bank = []
-        hierarchy = get_hierarchy(hierarchy_off, num_elem_in_bank)
-        bank_off = elem_list_off
-        #Let's start storing the element data
-        for a in range(num_elem_in_bank):
-            element_offset, bank_off = bytesToPointer(bank_off)
-            element = {}
-            element["Index"] = a
-            element["Name"] = "" #dummy for now
-            element["Parent"] = hierarchy[a]
-            element["Unknown Flag 0"] = bytesToInt(element_offset,4)
-            element_offset += 4
-            element["Render Flag"] = bytesToInt(element_offset,4)
-            element_offset += 4
-            element["Unknown Flag 1"] = bytesToInt(element_offset,4)
-            
-            #2D Polygon
-            element_offset += 4
-            TL_X = bytesToFloat(element_offset)
-            element_offset += 4
-            TL_Y = bytesToFloat(element_offset)
-            element_offset += 4
-            BL_X = bytesToFloat(element_offset)
-            element_offset += 4
-            BL_Y = bytesToFloat(element_offset)
-            element_offset += 4
-            TR_X = bytesToFloat(element_offset)
-            element_offset += 4
-            TR_Y = bytesToFloat(element_offset)
-            element_offset += 4
-            BR_X = bytesToFloat(element_offset)
-            element_offset += 4
-            BR_Y = bytesToFloat(element_offset)
-            element_offset += 4
-            element["2D Polygon"] = [TL_X, TL_Y, BL_X, BL_Y, TR_X, TR_Y, BR_X, BR_Y]
-            
-            element["Unknown Values"] = [bytesToInt(element_offset, 4)]
-            element_offset += 4
-            
-            elem_settings_off, element_offset = bytesToPointer(element_offset)
-            element["Unknown Values"].append(bytesToInt(element_offset, 4))
-            element_offset += 4
-            element["Render Settings"] = get_render_method(element_offset)
-            element_offset += 4
-            num_element_sprites = bytesToInt(element_offset, 4)
-            element_offset += 4
-            element_sprites_off, element_offset = bytesToPointer(element_offset)
-            sprite_list = []
-            for i in range(num_element_sprites):
-                if debug:
-                    if bytesToInt(element_sprites_off, 4) not in sprite_list: #For the sake of debugging, let's stop duplicates
-                        sprite_list.append(bytesToInt(element_sprites_off, 4))
-                else:
-                    sprite_list.append(bytesToInt(element_sprites_off, 4))
-                element_sprites_off += 4
-            element["Sprite List"] = sprite_list
-            element_settings = {}
-            
-            element_settings["hide"] = bytesToInt(elem_settings_off, 4)
-            elem_settings_off +=4
-            element_settings["posx"] = bytesToFloat(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["posy"] = bytesToFloat(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["angle"] = bytesToFloat(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["scalex"] = bytesToFloat(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["scaley"] = bytesToFloat(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["sprite_index"] = int(bytesToFloat(elem_settings_off))
-            elem_settings_off +=4
-            element_settings["rgba"] = four_bytes_to_RGBA(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["rgba_tl"] = four_bytes_to_RGBA(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["rgba_bl"] = four_bytes_to_RGBA(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["rgba_tr"] = four_bytes_to_RGBA(elem_settings_off)
-            elem_settings_off +=4
-            element_settings["rgba_br"] = four_bytes_to_RGBA(elem_settings_off)
-            elem_settings_off +=4
-            
-            element_settings["audio_cue?"] = bytesToInt(elem_settings_off, 4)
-            elem_settings_off +=4
-            
-            element_settings["3d_depth"] = bytesToInt(elem_settings_off, 4)
-            elem_settings_off +=4
-            
-            element_settings["unk_motion"] = bytesToInt(elem_settings_off, 4)
-            elem_settings_off +=4
-            
-            # element_settings["unk_settings"] = []
-            # for i in range(3): #get last 3 unk values
-                # element_settings["unk_settings"].append(bytesToInt(elem_settings_off, 4))
-                # elem_settings_off +=4
-            element["Default Settings"] = element_settings
-            #add the rest of the unk values as INT because i don't know what else they are... They're usually 00 00 00 00 .
-            element["Unknown Values"].append(bytesToInt(element_offset, 4))
-            element_offset += 4
-            #Name order?
-            
-            #The rest seem to be offsets since they get larger if mobile or not (?) 
-            #I don't know which one is the integer and which ones are the pointer.
-            unk_off0, element_offset = bytesToPointer(element_offset)
-            unk_off1, element_offset = bytesToPointer(element_offset)
-
-            element_bank.append(element)
-        element_banks.append(element_bank)
-        log(element_bank)
-    #Let's now get the names for each element.
-    data_offset = elem_names_off
-    for i in range(num_elem_names):
-        name_offset, data_offset = bytesToPointer(data_offset)
-        bank_index = bytesToInt(data_offset, 4)
-        data_offset += 4
-        elm_index = bytesToInt(data_offset, 4)
-        data_offset += 4
-        element_banks[bank_index][elm_index]["Name"] = get_string(name_offset)
-        if name_order_flag:
-            element_banks[bank_index][elm_index]["Name Index"] = i
-        log(element_banks[bank_index][elm_index])
-        
-    
-    animations = []
-    #Time to store animations
-    data_offset = anims_off
-    for anim_num in range(num_anims):
-        bank_num = bytesToInt(data_offset, 4)
-        data_offset += 4
-        anim_bank_off, data_offset = bytesToPointer(data_offset)
-        log("animation " + str(anim_num) + " with " + str(bank_num) + " element bank(s). offset: " + str(anim_bank_off))
-        animation_element_bank_list = []
-        for element_bank in range(bank_num): #for element bank in animation
-            num_elems = bytesToInt(anim_bank_off, 4)
-            anim_bank_off+=4
-            anim_off, anim_bank_off = bytesToPointer(anim_bank_off)
-            log("bank " + str(element_bank) + " with " + str(num_elems) + " element(s) - Current offset:" + str(anim_bank_off))
-            animation_list = []
-            
-            for element in range(num_elems):
-               #Store motion types 
-                motions = bytesToInt(anim_off, 4)
-                anim_off += 4
-                log("motion_int : " + str(motions) + " - offset :" + str(anim_off))
-                keyframelist_offset, anim_off = bytesToPointer(anim_off)
-                motion_list = []
-                if motions != 0:
-                    log(motions)
-                    motions = get_powers(motions)
-                    for motion in motions:
-                        motion_list.append(motion_names[motion])
-                
-                element_animation = []
-                #for motion in motion_list:
-                for motion in motion_list:
-                    loop_value = bytesToInt(keyframelist_offset, 4)
-                    keyframelist_offset += 4
-                    
-                    #GetKeyframes
-                    num_keyframes = bytesToInt(keyframelist_offset, 4)
-                    keyframelist_offset += 4
-                    keyframe_offset, keyframelist_offset = bytesToPointer(keyframelist_offset)
-                    
-                    log(keyframe_offset)
-                    keyframe_list = []
-                    for keyframe in range(num_keyframes):
-                        keyframe = {}
-                        keyframe["timestamp"] = bytesToInt(keyframe_offset, 4)
-                        keyframe_offset+=4
-                        if motion.find("rgba") != -1:
-                            keyframe["data"] = four_bytes_to_RGBA(keyframe_offset)
-                        elif motion.find("hide") != -1 or motion.find("3d_depth") != -1:
-                            keyframe["data"] = bytesToInt(keyframe_offset, 4)
-                        else:
-                            keyframe["data"] = bytesToFloat(keyframe_offset)
-                        keyframe_offset+=4
-                        keyframe["tweening"] = bytesToInt(keyframe_offset, 4)
-                        keyframe_offset+=4
-                        keyframe["ease_in"] = bytesToFloat(keyframe_offset)
-                        keyframe_offset+=4
-                        keyframe["ease_out"] = bytesToFloat(keyframe_offset)
-                        keyframe_offset+=4
-                        keyframe["unk"] = bytesToFloat(keyframe_offset)
-                        keyframe_offset+=4
-                        keyframe_list.append(keyframe)
-                    element_animation.append({"Motion" : motion, "Loop" : loop_value, "Keyframes" : keyframe_list})
-                animation_list.append({"Index" : element, "Animations" : element_animation})
-            animation_element_bank_list.append(animation_list)
-        #log(animation_element_bank_list)
-        
-        temp_name_off = anim_names_off
-        for anim in range(num_anims):   
-            name_offset, temp_name_off = bytesToPointer(temp_name_off)
-            name_index = bytesToInt(temp_name_off, 4)
-            temp_name_off+= 4
-            if name_index == anim_num:
-                anim_name = get_string(name_offset)
-                log(anim_name)
-        anim_len = (bytesToFloat(anim_len_off), bytesToFloat(anim_len_off+4))
-        anim_len_off += 8
-        animations.append({"Name" : anim_name, "Length Range" : anim_len, "Element Banks" : animation_element_bank_list})
-    #log(animations)
-    
-    #Misc info i guess
-    misc_info = {"Header Magic" : magic,
-                 "Aspect Ratio" : str(aspect_ratio),
-                 "Screen Size" : screen_size,
-                 "Byte Order" : endianness, 
-                 }
-    
-    final_json = {"Misc. Info": misc_info, "Unk. Patterns" : unk_pattern_list, "Sprite Crops" : sprite_crop_list, "Element Banks" : element_banks, "Animations" : animations}
-    
-    output_json = open(output_file, 'w', encoding = "utf-8")
-    output_json.write("")
-    json.dump(final_json, output_json, indent=4, ensure_ascii=False)    
-
-if mode == "to_anim":
-    log("starting conversion to anim")
-    json_data = json.load(open(input_file, 'r'))
-    endianness = json_data["Misc. Info"]["Byte Order"]
-    log("Byte Order: " + str(endianness))
-    weird_pointer = 88
-    if mobile_flag:
-        data_offset = 116
-    else:
-        data_offset = 88
-    pointer_list = [] #Will be used later
-    with open(output_file, "wb") as f:
-        f.write(bytes("nCSC", 'UTF-8')) #Write nCSC magic
-        f.write(bytes(4)) #For now let's skip this spot as it's the length of the data.
-        f.write(packInt(16, 4))
-        f.write(packInt(0, 4))
-        f.write(packInt(2, 4))
-        #Mostly unknown floats that don't seem to have any effect when changed, so i'll keep the common values among files
-        f.write(packFloat(0)) 
-        f.write(packFloat(60)) 
-        f.write(packFloat(0)) 
-        f.write(packFloat(60)) 
-        
-        #Mostly header for now -
-        #UnknownPatterns
-        f.write(packInt(len(json_data["Unk. Patterns"]), 4)) 
-        pointer_list.append(f.tell())
-        f.write(packPointer(data_offset))
-        data_offset += len(json_data["Unk. Patterns"])*8
-        weird_pointer += len(json_data["Unk. Patterns"])*8
-        #SpriteCrops
-        f.write(packInt(len(json_data["Sprite Crops"]), 4)) 
-        pointer_list.append(f.tell())
-        f.write(packPointer(data_offset))
-        
-        data_offset += len(json_data["Sprite Crops"])*20
-        weird_pointer += len(json_data["Sprite Crops"])*20
-        #Element Banks
-        f.write(packInt(len(json_data["Element Banks"]), 4)) 
-        pointer_list.append(f.tell())
-        f.write(packPointer(data_offset))
-        
-        #Account for each element bank pointer - Already checked
-        if mobile_flag:
-            data_offset += len(json_data["Element Banks"])*24
-            weird_pointer += len(json_data["Element Banks"])*16
-        else:
-            data_offset += len(json_data["Element Banks"])*16
-            weird_pointer += len(json_data["Element Banks"])*16
-            
-        #Element names
-        amount_of_elements = 0
-        for group in json_data["Element Banks"]:
-            for element in group:
-                amount_of_elements+=1
-        f.write(packInt(amount_of_elements, 4)) 
-        pointer_list.append(f.tell())
-        f.write(packPointer(data_offset))
-        
-        #Account for each element name pointer - Already checked
-        if mobile_flag:
-            data_offset += amount_of_elements*16
-            weird_pointer += amount_of_elements*12
-        else:
-            data_offset += amount_of_elements*12
-            weird_pointer += amount_of_elements*12
-        #Animations
-        f.write(packInt(len(json_data["Animations"]), 4)) 
-        pointer_list.append(f.tell())
-        f.write(packPointer(data_offset))
-        
-        #Account for each animation pointer - Already Checked
-        if mobile_flag:
-            data_offset += len(json_data["Animations"])*12
-            weird_pointer += len(json_data["Animations"])*8
-        else:
-            data_offset += len(json_data["Animations"])*8
-            weird_pointer += len(json_data["Animations"])*8
-        #Animation Names
-        pointer_list.append(f.tell())
-        f.write(packPointer(data_offset))
-        
-        #Account for each animation name pointer
-        if mobile_flag:
-            data_offset += len(json_data["Animations"])*12
-            weird_pointer += len(json_data["Animations"])*8
-        else:
-            data_offset += len(json_data["Animations"])*8
-            weird_pointer += len(json_data["Animations"])*8
-            
-        #Aspect Ratio
-        aspect_ratio = int(json_data["Misc. Info"]["Aspect Ratio"].split("/")[0]) / int(json_data["Misc. Info"]["Aspect Ratio"].split("/")[1])
-        f.write(packFloat(aspect_ratio))
-        
-        #Animation Lengths pointer
-        pointer_list.append(f.tell())
-        f.write(packPointer(data_offset))
-        
-        #Account for animation lengths
-        data_offset += len(json_data["Animations"])*8
-        weird_pointer += len(json_data["Animations"])*8
-        ##HEADER DONE!!
-        
-        #Unk patterns
-        for unk_pattern in json_data["Unk. Patterns"]:
-            f.write(packFloat(unk_pattern[0]))
-            f.write(packFloat(unk_pattern[1]))
-        
-        #Sprite Crops
-        for crop in json_data["Sprite Crops"]:
-            f.write(packInt(crop["texture"],4))
-            f.write(packFloat(crop["top_left_X"]))
-            f.write(packFloat(crop["top_left_Y"]))
-            f.write(packFloat(crop["bottom_right_X"]))
-            f.write(packFloat(crop["bottom_right_Y"]))
-            
-        #Element bank pointers D:
-        for bank in json_data["Element Banks"]:
-            f.write(packInt(len(bank),4))
-            pointer_list.append(f.tell())
-            f.write(packPointer(data_offset))
-            
-            #Account for each element pointer in bank
-            if mobile_flag:
-                data_offset += len(bank)*8
-                weird_pointer += len(bank)*4
-            else:
-                data_offset += len(bank)*4
-                weird_pointer += len(bank)*4
-                
-            f.write(packInt(0,4)) #Unknown 0 value between the two element pointers (?)
-            pointer_list.append(f.tell())
-            f.write(packPointer(data_offset))
-            #I need to account for each element in the bank for it's hierarchy...
-            for element in bank:
-                data_offset += 8 #account for 2 values per element for hierarchy.
-                weird_pointer += 8
-        
-        #does name order matter?
-        if "Name Index" in json_data["Element Banks"][0][0].keys():
-            name_index = True
-        else:
-            name_index = False
-        
-        # Element Name pointers
-        temp_name_order = {}
-        bank_index = 0
-        if name_index:
-            for bank in json_data["Element Banks"]:
-                element_index = 0
-                for element in bank:
-                    temp_name_order[element["Name Index"]] = (bank_index,element_index)
-                    element_index+= 1
-                bank_index += 1
-        #order doesn't matter, who cares
-        else:
-            cnt = 0
-            for bank in json_data["Element Banks"]:
-                element_index = 0
-                for element in bank:
-                    temp_name_order[cnt] = (bank_index,element_index)
-                    element_index+= 1
-                    cnt += 1
-                bank_index += 1
-        #log(temp_name_order)
-        
-        #Element name pointers here
-        for i in range(amount_of_elements):
-            bank = temp_name_order[i][0]
-            index = temp_name_order[i][1]
-            pointer_list.append(f.tell())
-            f.write(packPointer(data_offset))
-            name_length = len(padString(json_data["Element Banks"][bank][index]["Name"], 4))
-            data_offset+= name_length
-            weird_pointer += name_length
-            f.write(packInt(bank, 4))
-            f.write(packInt(index, 4))
-        
-        #Animation pointers
-        for anim in json_data["Animations"]:
-            number_of_groups = len(anim["Element Banks"])
-            #anim_index = json_data["Animations"].index(anim)
-            f.write(packInt(number_of_groups, 4))
-            pointer_list.append(f.tell())
-            f.write(packPointer(data_offset))
-            #account for animation pointers
-            if mobile_flag:
-                data_offset += number_of_groups*12
-                weird_pointer += number_of_groups*8
-            else:
-                data_offset += number_of_groups*8
-                weird_pointer += number_of_groups*8
-        
-        #Animation name pointers
-        for anim in json_data["Animations"]:
-            anim_index = json_data["Animations"].index(anim)
-            name_length = len(padString(anim["Name"], 4))
-            pointer_list.append(f.tell())
-            f.write(packPointer(data_offset))
-            data_offset += name_length
-            weird_pointer += name_length
-            f.write(packInt(anim_index, 4))
-        
-        #Animation lengths
-        for anim in json_data["Animations"]:
-            f.write(packFloat(anim["Length Range"][0]))
-            f.write(packFloat(anim["Length Range"][1]))
-        
-        #Element pointers + hierarchy
-        for bank in json_data["Element Banks"]:
-            hierarchy = []
-            for element in bank:
-                hierarchy.append(element["Parent"])
-                edge_list = getEdgeList(hierarchy)
-                pointer_list.append(f.tell())
-                f.write(packPointer(data_offset))
-                #account for element length.
-                if mobile_flag:
-                    data_offset += 96
-                    weird_pointer += 80
-                else:
-                    data_offset += 80
-                    weird_pointer += 80
-            for i in edge_list:
-                f.write(packInt(i[0], 4))
-                f.write(packInt(i[1], 4))
-                
-        #NAMES
-        for i in range(len(temp_name_order)):
-            #element_name = padString(json_data["Element Banks"][temp_name_order[name][0]][temp_name_order[name][1]]["Name"])
-            element_name = padString(json_data["Element Banks"][temp_name_order[i][0]][temp_name_order[i][1]]["Name"])
-            #log(element_name.replace(" ", "@"))
-            f.write(bytes(element_name, "shift-jis").replace(b' ', b'\x00'))
-            
-        #Element bank Pointers for animations
-        for anim in json_data["Animations"]:
-            for bank in anim["Element Banks"]:
-                num_of_elems = len(bank)
-                f.write(packInt(num_of_elems, 4))
-                pointer_list.append(f.tell())
-                f.write(packPointer(data_offset))
-                #account for a pointer for each element's motion + pointer
-                if mobile_flag:
-                    data_offset+= num_of_elems*12
-                    weird_pointer += num_of_elems*8
-                else:
-                    data_offset+= num_of_elems*8
-                    weird_pointer += num_of_elems*8
-        
-        #Animation names
-        for anim in json_data["Animations"]:
-            padded_name = padString(anim["Name"])
-            f.write(bytes(padded_name, "shift-jis").replace(b' ', b'\x00'))
-        
-        #Elements!!!
-        for bank in json_data["Element Banks"]:
-            for element in bank:
-                f.write(packInt(element["Unknown Flag 0"],4))
-                f.write(packInt(element["Render Flag"],4))
-                f.write(packInt(element["Unknown Flag 1"],4))
-                for i in element["2D Polygon"]:
-                    f.write(packFloat(i))
-                f.write(packInt(element["Unknown Values"][0],4))
-                pointer_list.append(f.tell())
-                f.write(packPointer(data_offset+len(element["Sprite List"])*4))
-                f.write(packInt(element["Unknown Values"][1],4))
-                if endianness == "<":
-                    f.write(struct.pack("<B", element["Render Settings"]["dodge_blend"]))
-                    f.write(struct.pack("<B", element["Render Settings"]["unknown_1"]))
-                    f.write(struct.pack("<B", element["Render Settings"]["unknown_2"]))
-                    f.write(struct.pack("<B", 0))
-                if endianness == ">":
-                    f.write(struct.pack("<B", 0))
-                    f.write(struct.pack("<B", element["Render Settings"]["unknown_2"]))
-                    f.write(struct.pack("<B", element["Render Settings"]["unknown_1"]))
-                    f.write(struct.pack("<B", element["Render Settings"]["dodge_blend"]))
-                f.write(packInt(len(element["Sprite List"]), 4))
-                
-                pointer_list.append(f.tell())
-                f.write(packPointer(data_offset))
-                f.write(packInt(element["Unknown Values"][2],4))
-                f.write(packPointer(0)) #???
-                f.write(packPointer(0)) #???
-                weird_pointer += 60
-                data_offset+= 60
-                weird_pointer += len(element["Sprite List"])*4
-                data_offset+= len(element["Sprite List"])*4
-        
-        #Motion + offset
-        for anim in json_data["Animations"]:
-            for bank in anim["Element Banks"]:
-                for element in bank:
-                    #I would like to set the correct order of the motions first before moving on
-                    element["Animations"] = sorted(element["Animations"], key=sortMotion)
-                    motion_int = 0
-                    motions = []
-                    for motion in element["Animations"]:
-                        motion_int += int(motion_names[motion["Motion"]])
-                    #log(motion_int)
-                    
-                    f.write(packInt(motion_int,4))
-                    if len(element["Animations"]) != 0:
-                        pointer_list.append(f.tell())
-                        f.write(packPointer(data_offset))
-                        if mobile_flag:
-                            data_offset+= len(element["Animations"])*16
-                            weird_pointer += len(element["Animations"])*12
-                        else:
-                            data_offset+= len(element["Animations"])*12
-                            weird_pointer += len(element["Animations"])*12
-                    else:
-                        f.write(packPointer(0))
-        
-        #Element sprite list + settings
-        for bank in json_data["Element Banks"]:
-            for element in bank:
-                for sprite in element["Sprite List"]:
-                    f.write(packInt(sprite, 4))
-                
-                #Settings
-                f.write(packInt(element["Default Settings"]["hide"], 4))
-                f.write(packFloat(element["Default Settings"]["posx"]))
-                f.write(packFloat(element["Default Settings"]["posy"]))
-                f.write(packFloat(element["Default Settings"]["angle"]))
-                f.write(packFloat(element["Default Settings"]["scalex"]))
-                f.write(packFloat(element["Default Settings"]["scaley"]))
-                f.write(packFloat(element["Default Settings"]["sprite_index"]))
-                packRGBA(element["Default Settings"]["rgba"], f)
-                packRGBA(element["Default Settings"]["rgba_tl"], f)
-                packRGBA(element["Default Settings"]["rgba_bl"], f)
-                packRGBA(element["Default Settings"]["rgba_tr"], f)
-                packRGBA(element["Default Settings"]["rgba_br"], f)
-                
-                # element_settings["audio_cue?"] = bytesToInt(elem_settings_off, 4)
-                # elem_settings_off +=4
-                
-                # element_settings["3d_depth"] = bytesToInt(elem_settings_off, 4)
-                # elem_settings_off +=4
-                
-                # element_settings["unk_motion"] = bytesToInt(elem_settings_off, 4)
-                # elem_settings_off +=4
-                
-                f.write(packInt(element["Default Settings"]["audio_cue?"], 4))
-                f.write(packInt(element["Default Settings"]["3d_depth"], 4))
-                f.write(packInt(element["Default Settings"]["unk_motion"], 4))
-        
-        #Keyframes pointers!!
-        for anim in json_data["Animations"]:
-            for bank in anim["Element Banks"]:
-                for element in bank:
-                    for motion in element["Animations"]:
-                        f.write(packInt(motion["Loop"],4))
-                        f.write(packInt(len(motion["Keyframes"]),4))
-                        pointer_list.append(f.tell())
-                        f.write(packPointer(data_offset))
-                        data_offset += len(motion["Keyframes"])*24
-                        weird_pointer += len(motion["Keyframes"])*24
-        
-        #keyframes themselves and i'm basically done
-        for anim in json_data["Animations"]:
-            for bank in anim["Element Banks"]:
-                for element in bank:
-                    for motion in element["Animations"]:
-                        for keyframe in motion["Keyframes"]:
-                            f.write(packInt(keyframe["timestamp"], 4))
-                            if motion["Motion"].find("rgba") != -1:
-                                packRGBA(keyframe["data"], f)
-                            elif motion["Motion"].find("hide") != -1 or motion["Motion"].find("3d_depth") != -1 or motion["Motion"].find("audio_cue?") != -1 or motion["Motion"].find("unk_motion") != -1:
-                                f.write(packInt(keyframe["data"], 4))
-                            else:
-                                f.write(packFloat(keyframe["data"]))
-                            f.write(packInt(keyframe["tweening"], 4))
-                            f.write(packFloat(keyframe["ease_in"]))
-                            f.write(packFloat(keyframe["ease_out"]))
-                            f.write(packFloat(keyframe["unk"]))
-        current_offset = f.tell()
-        f.seek(4)
-        f.write(packInt(current_offset-8,4, "<"))
-        #add padding i guess
-        while current_offset % 16 != 0:
-            current_offset += 1
-            weird_pointer += 1
-            #print(current_offset)
-        
-        f.seek(current_offset)
-        nof0_pointer = current_offset
-        nof0_size = len(pointer_list)*4 + 12
-        f.write(bytes("NOF0", 'UTF-8'))
-        f.write(packInt(len(pointer_list)*4 + 12,4, "<"))
-        f.write(packInt(len(pointer_list),4))
-        f.write(packInt(0,4))
-        for i in pointer_list:
-            f.write(packInt(i,4))
-        
-        current_offset = f.tell()
-        #add padding i guess
-        while current_offset % 16 != 0:
-            current_offset += 1
-        f.seek(current_offset)
-        f.write(bytes("NEND", 'UTF-8'))
-        f.write(packInt(0,8))
-        f.write(packInt(0,4))
-        f.close()
-    
-    
-    with open(output_file, "r+b") as f:
-        animation_hex = f.read()
-        f.close()
-    
-    with open(output_file, "wb") as f:
-        f.write(bytes(json_data["Misc. Info"]["Header Magic"], 'UTF-8'))
-        f.write(packInt(24, 4, "<"))
-        f.write(packInt(1, 4))
-        f.write(packInt(32, 4))
-        if mobile_flag:
-            f.write(packInt(weird_pointer, 4))
-        else:
-            f.write(packInt(weird_pointer, 4))
-        f.write(packInt(nof0_pointer+32, 4))
-        f.write(packInt(nof0_size+4, 4))
-        f.write(packInt(1, 4))
-        f.write(animation_hex)
-    log("Pointer List:")
-    log(pointer_list) 
-print("Done.")
\ No newline at end of file
+import os, sys, gc, copy, random, struct, json, glob, mmap, time, operator, itertools, array, hashlib, shutil, bisect
+import concurrent.futures
+from fractions import Fraction
+
+#numpy is optional, it's only needed for the vectorized keyframe paths.
+#Without it encode() packs record by record with struct
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+aspect_ratio_dict = {1.7647058963775635 : "480x272",        #PSP
+                     1.666748046875 : "400x240",            #3DS top screen
+                     1.333251953125 : "256x192",            #3DS bottom screen
+                     1.4285714626312256 : "640x448",        #Wii 4:3
+                     1.7763158082962036 : "811x456",        #Wii 16:9
+                     0.5625 : "720x1280",                   #Mobile
+                     0.5633803009986877 : "720x1280",       #Mobile - Newer versions of Quest?
+                     0.6666666865348816 : "720x1280",       #Taller Mobile (?) Puyo touch
+                     1.3333333730697632 : "256x192",        #unk 4:3, possibly DS
+                     1.7777777910232544 : "1280x720"}       #unk 16:9
+
+#Platforms understood by decode() / encode(). None is PS2, PSP and Wii.
+platforms = (None, "ds", "3ds", "mobile")
+
+class InvalidAnimationError(Exception):
+    pass
+
+class AnimContext:
+    #Everything a single conversion needs. These used to be module globals set from sys.argv,
+    #keeping them here lets one process convert as many files as it wants.
+    def __init__(self, platform = None, name_order = False, debug = False):
+        if platform not in platforms:
+            raise ValueError("Unknown platform " + repr(platform) + ", expected one of " + str(platforms))
+        self.platform = platform
+        self.flag_3ds = platform == "3ds"
+        self.ds_flag = platform in ("ds", "3ds")
+        self.mobile_flag = platform == "mobile"
+        self.name_order_flag = name_order
+        self.debug = debug
+        self.endianness = "<"
+        self.alignment = 32
+
+    def log(self, string):
+        if self.debug:
+            if type(string) == dict or type(string) == list :
+                print(json.dumps(string, indent=4))
+            else:
+                print(string)
+
+    def getScreenSize(self, aspect_ratio):
+        screen_size = aspect_ratio_dict[aspect_ratio]
+        if screen_size == "256x192" and self.flag_3ds:
+            screen_size = "320x240"
+        return screen_size
+
+class Profiler:
+    #Wall time, bytes and item counts for each phase of decode() / encode().
+    #Hand the same one to several conversions and it adds them up.
+    def __init__(self):
+        self.operations = {}
+
+    def add(self, operation, phase, seconds, size = 0, items = 0):
+        phases = self.operations.setdefault(operation, {})
+        if phase not in phases:
+            phases[phase] = {"time" : 0.0, "bytes" : 0, "items" : 0, "calls" : 0}
+        totals = phases[phase]
+        totals["time"] += seconds
+        totals["bytes"] += size
+        totals["items"] += items
+        totals["calls"] += 1
+
+    def merge(self, report):
+        #Adds up a report() from somewhere else, a batch worker for example
+        for operation in report:
+            for phase, totals in report[operation]["phases"].items():
+                phases = self.operations.setdefault(operation, {})
+                if phase not in phases:
+                    phases[phase] = {"time" : 0.0, "bytes" : 0, "items" : 0, "calls" : 0}
+                for key in ("time", "bytes", "items", "calls"):
+                    phases[phase][key] += totals[key]
+
+    def report(self):
+        report = {}
+        for operation, phases in self.operations.items():
+            operation_report = {"time" : 0.0, "bytes" : 0, "phases" : {}}
+            for phase, totals in phases.items():
+                phase_report = dict(totals)
+                if totals["time"] > 0:
+                    phase_report["bytes_per_second"] = totals["bytes"] / totals["time"]
+                    phase_report["items_per_second"] = totals["items"] / totals["time"]
+                operation_report["phases"][phase] = phase_report
+                operation_report["time"] += totals["time"]
+                operation_report["bytes"] += totals["bytes"]
+            report[operation] = operation_report
+        return report
+
+class NameTables:
+    #Name <-> index lookups for the animations and elements of a decoded json, built in one pass.
+    #Pass one to decode() to fill it from the file, or build it from a json with NameTables(json_data).
+    #Names don't have to be unique, name -> index gives the first one
+    def __init__(self, json_data = None):
+        self.animation_index = {}   #name -> animation index
+        self.animation_names = {}   #animation index -> name
+        self.element_index = {}     #name -> (bank, index)
+        self.element_names = {}     #(bank, index) -> name
+        self.element_order = []     #(bank, index) of each entry of the element name table, in file order
+        if json_data != None:
+            self.add_json(json_data)
+
+    def add_json(self, json_data):
+        for anim_index, anim in enumerate(json_data["Animations"]):
+            self.add_animation(anim_index, anim["Name"])
+        self.add_element_banks(json_data["Element Banks"])
+
+    def add_animation(self, anim_index, name):
+        self.animation_names[anim_index] = name
+        self.animation_index.setdefault(name, anim_index)
+
+    def add_element_banks(self, element_banks, element_order = None):
+        for bank_index, bank in enumerate(element_banks):
+            for elm_index, element in enumerate(bank):
+                self.element_names[(bank_index, elm_index)] = element["Name"]
+                self.element_index.setdefault(element["Name"], (bank_index, elm_index))
+        if element_order == None:
+            #Without the file's order it's the "Name Index" order if there's one, the bank order if not
+            element_order = sorted(self.element_names, key = lambda key: element_banks[key[0]][key[1]].get("Name Index", 0))
+        self.element_order = list(element_order)
+
+    def animation(self, json_data, name):
+        #The animation called name, KeyError if there's none
+        return json_data["Animations"][self.animation_index[name]]
+
+    def element(self, json_data, name):
+        bank_index, elm_index = self.element_index[name]
+        return json_data["Element Banks"][bank_index][elm_index]
+
+#Every record in the file, in the order of its fields. Field types are
+#  i int, f float (20.12 fixed point on DS), B byte,
+#  p pointer (4 bytes, 8 on mobile, relative to the nCSC block and listed in NOF0),
+#  n pointer sized field that's always 0 and isn't listed in NOF0.
+#A number in front repeats the field like in struct. Both decode() and encode() go through these.
+anim_layout = {
+    #outer header after the magic and its size, in the file's byte order
+    "file_header" : (("byte_order", "i"), ("alignment", "i"), ("data_end", "i"), ("nof0", "i"), ("nof0_size", "i"), ("unknown", "i")),
+    #nCSC header after the magic and the data length
+    "header" : (("unknown", "3i"), ("unknown_floats", "4f"),
+                ("num_unk_patterns", "i"), ("unk_patterns", "p"),
+                ("num_sprite_crops", "i"), ("sprite_crops", "p"),
+                ("num_element_banks", "i"), ("element_banks", "p"),
+                ("num_element_names", "i"), ("element_names", "p"),
+                ("num_animations", "i"), ("animations", "p"),
+                ("animation_names", "p"), ("aspect_ratio", "f"), ("animation_lengths", "p")),
+    "int_value" : (("value", "i"),),
+    "pointer_value" : (("pointer", "p"),),                                              #element lists
+    "float_pair" : (("a", "f"), ("b", "f")),                                            #unk patterns, animation lengths
+    "int_pair" : (("first_child", "i"), ("next_sibling", "i")),                         #hierarchy
+    "count_pointer" : (("count", "i"), ("pointer", "p")),                               #animation table, banks of an animation, motion records
+    "pointer_index" : (("name", "p"), ("index", "i")),                                  #animation name table
+    "name_entry" : (("name", "p"), ("bank", "i"), ("index", "i")),                      #element name table
+    "bank_entry" : (("num_elements", "i"), ("elements", "p"), ("unknown", "i"), ("hierarchy", "p")),
+    "crop" : (("texture", "i"), ("corners", "4f")),
+    "element" : (("unknown_flag_0", "i"), ("render_flag", "i"), ("unknown_flag_1", "i"), ("polygon", "8f"),
+                 ("unknown_value_0", "i"), ("settings", "p"), ("unknown_value_1", "i"), ("render_settings", "4B"),
+                 ("num_sprites", "i"), ("sprites", "p"), ("unknown_value_2", "i"), ("unknown_pointers", "2n")),
+    "settings" : (("hide", "i"), ("transform", "6f"), ("rgba", "20B"), ("audio_cue?", "i"), ("3d_depth", "i"), ("unk_motion", "i")),
+    "keyframe_list_entry" : (("loop", "i"), ("num_keyframes", "i"), ("keyframes", "p")),
+    "keyframe_int" : (("timestamp", "i"), ("data", "i"), ("tweening", "i"), ("ease_in", "f"), ("ease_out", "f"), ("unk", "f")),
+    "keyframe_float" : (("timestamp", "i"), ("data", "f"), ("tweening", "i"), ("ease_in", "f"), ("ease_out", "f"), ("unk", "f")),
+    "keyframe_rgba" : (("timestamp", "i"), ("data", "4B"), ("tweening", "i"), ("ease_in", "f"), ("ease_out", "f"), ("unk", "f")),
+}
+
+class Record:
+    #One anim_layout record compiled for a byte order, float format and pointer format.
+    #pointers are the offsets of its p fields, size_32 its size with 4 byte pointers (see weird_pointer in encode)
+    def __init__(self, fields, endianness, float_format, pointer_format):
+        formats = {"i" : "i", "f" : float_format, "B" : "B", "p" : pointer_format, "n" : pointer_format}
+        record_format = endianness
+        pointers = []
+        size_32 = 0
+        for name, field in fields:
+            count = int(field[:-1]) if len(field) > 1 else 1
+            field_type = field[-1]
+            for i in range(count):
+                if field_type == "p":
+                    pointers.append(struct.calcsize(record_format))
+                record_format += formats[field_type]
+            size_32 += count*(1 if field_type == "B" else 4)
+        self.fields = fields
+        self.format = record_format
+        self.struct = struct.Struct(record_format)
+        self.size = self.struct.size
+        self.size_32 = size_32
+        self.pointers = tuple(pointers)
+        self.pack = self.struct.pack
+        self.pack_into = self.struct.pack_into
+        self.unpack_from = self.struct.unpack_from
+        self.iter_unpack = self.struct.iter_unpack
+
+#Compiled records for each (byte order, DS, mobile) variant, so batches only compile them once
+compiled_layouts = {}
+
+def compileLayout(endianness, ds_flag, mobile_flag):
+    variant = (endianness, ds_flag, mobile_flag)
+    if variant not in compiled_layouts:
+        float_format = "i" if ds_flag else "f"      #DS floats are 20.12 fixed point
+        pointer_format = "q" if mobile_flag else "i"
+        layout = {}
+        for name, fields in anim_layout.items():
+            layout[name] = Record(fields, endianness, float_format, pointer_format)
+        compiled_layouts[variant] = layout
+    return compiled_layouts[variant]
+
+class AnimStructs:
+    #The compiled anim_layout for one byte order and platform (DS fixed point floats, 64 bit mobile pointers),
+    #one attribute per record. Shared by the reader and the writer.
+    def __init__(self, endianness = "<", ds_flag = False, mobile_flag = False):
+        self.endianness = endianness
+        self.ds_flag = ds_flag
+        self.mobile_flag = mobile_flag
+        for name, record in compileLayout(endianness, ds_flag, mobile_flag).items():
+            setattr(self, name, record)
+        self.pointer_size = self.pointer_value.size
+        self.keyframe_structs = {"int" : self.keyframe_int, "float" : self.keyframe_float, "rgba" : self.keyframe_rgba}
+        self.keyframe_dtypes = {}
+
+    def keyframe_dtype(self, data_type):
+        #numpy dtype of a keyframe the way it is in the file, from its layout
+        if data_type not in self.keyframe_dtypes:
+            e = self.endianness
+            formats = {"i" : e + "i4", "f" : e + ("i4" if self.ds_flag else "f4")}
+            fields = []
+            for name, field in self.keyframe_structs[data_type].fields:
+                if field == "4B":
+                    fields += [(channel, "u1") for channel in rgbaFileOrder(e)]
+                else:
+                    fields.append((name, formats[field]))
+            self.keyframe_dtypes[data_type] = numpy.dtype(fields)
+        return self.keyframe_dtypes[data_type]
+
+class AnimReader(AnimStructs):
+    #Reads values straight out of the file data, whole records at a time.
+    def __init__(self, anim_file_data, endianness = "<", ds_flag = False, mobile_flag = False, alignment = 32):
+        AnimStructs.__init__(self, endianness, ds_flag, mobile_flag)
+        self.anim_file_data = anim_file_data
+        self.alignment = alignment
+
+    def ints(self, offset, count):
+        return struct.unpack_from(self.endianness + str(count) + "i", self.anim_file_data, offset)
+
+    def record(self, record_struct, offset):
+        return record_struct.unpack_from(self.anim_file_data, offset)
+
+    def records(self, record_struct, offset, count):
+        view = memoryview(self.anim_file_data)[offset:offset + record_struct.size*count]
+        return record_struct.iter_unpack(view)
+
+    def keyframe_array(self, offset, count, data_type):
+        #Decodes a whole keyframe block in one go, see keyframeArrayDtype
+        raw = numpy.frombuffer(self.anim_file_data, self.keyframe_dtype(data_type), count, offset)
+        track = numpy.empty(count, keyframeArrayDtype(data_type))
+        for name in track.dtype.names:
+            track[name] = raw[name]
+            if self.ds_flag and track.dtype[name].kind == "f":
+                track[name] /= 2 **12
+        return track
+
+    def string(self, offset, length = None):
+        if length == None:
+            end = self.anim_file_data.find(b"\0", offset)
+            if end == -1:
+                end = len(self.anim_file_data)
+        else:
+            end = self.anim_file_data.find(b"\0", offset, offset + length)
+            if end == -1:
+                end = offset + length
+        return bytes(self.anim_file_data[offset:end]).decode("shift-jis")
+
+    def rgba(self, channels):
+        #channels are the 4 bytes in file order
+        if self.endianness == "<":
+            return {"red" : channels[3], "green" : channels[2], "blue" : channels[1],"alpha" : channels[0]}
+        return {"red" : channels[0], "green" : channels[1], "blue" : channels[2],"alpha" : channels[3]}
+
+    def render_method(self, channels):
+        if self.endianness == ">":
+            return {"dodge_blend": channels[3],
+                    "unknown_1" : channels[2],
+                    "unknown_2" : channels[1],}
+        return {"dodge_blend": channels[0],
+                "unknown_1" : channels[1],
+                "unknown_2" : channels[2],}
+
+class AnimWriter(AnimStructs):
+    #Packs whole records into one bytearray. The first 32 bytes are the outer header,
+    #they're filled in place once everything else is written.
+    def __init__(self, endianness = "<", ds_flag = False, mobile_flag = False):
+        AnimStructs.__init__(self, endianness, ds_flag, mobile_flag)
+        self.buffer = bytearray(32)
+        self.pointer_list = []
+        if ds_flag:
+            self.fixed = floatToFixed
+        else:
+            self.fixed = lambda number: number
+        #numpy pays off where every float has to be turned into fixed point. On the other platforms
+        #struct.pack straight from the json values is just as fast, so only keyframe arrays go through numpy there
+        self.bulk = numpy != None and ds_flag
+
+    def tell(self):
+        #Offsets in the file are relative to the nCSC block, right after the outer header
+        return len(self.buffer) - 32
+
+    def write(self, data):
+        self.buffer += data
+
+    def pack(self, record_struct, *values):
+        self.buffer += record_struct.pack(*values)
+
+    def pack_pointers(self, record, *values):
+        #Same as pack, but also adds the record's pointers to the NOF0 list
+        position = self.tell()
+        for offset in record.pointers:
+            self.pointer_list.append(position + offset)
+        self.buffer += record.pack(*values)
+
+    def floats(self, values):
+        if self.ds_flag:
+            return [floatToFixed(value) for value in values]
+        return values
+
+    def rgba(self, rgba_dict):
+        #the 4 bytes in file order
+        if self.endianness == "<":
+            return (rgba_dict["alpha"], rgba_dict["blue"], rgba_dict["green"], rgba_dict["red"])
+        return (rgba_dict["red"], rgba_dict["green"], rgba_dict["blue"], rgba_dict["alpha"])
+
+    def render_method(self, render):
+        if self.endianness == "<":
+            return (render["dodge_blend"], render["unknown_1"], render["unknown_2"], 0)
+        return (0, render["unknown_2"], render["unknown_1"], render["dodge_blend"])
+
+    def align(self, block_size):
+        self.buffer += bytes(-self.tell() % block_size)
+
+    def finish(self, pointer_list, weird_pointer, magic, unknown = 1):
+        #Everything after the data: its length, the NOF0 table and NEND, then the outer header in front.
+        #weird_pointer is the data end counted with 4 byte pointers
+        self.outer_header(magic, unknown, *self.nof0(pointer_list, weird_pointer))
+
+    def nof0(self, pointer_list, weird_pointer):
+        #The data length, NOF0 and NEND. Returns what the outer header needs, weird_pointer with the padding before NOF0 added
+        data_end = self.tell()
+        struct.pack_into("<i", self.buffer, 32 + 4, data_end - 8)
+        self.align(16)
+        weird_pointer += self.tell() - data_end
+        nof0_pointer = self.tell()
+        nof0_size = len(pointer_list)*4 + 12
+        self.write(bytes("NOF0", 'UTF-8'))
+        self.write(struct.pack("<i", nof0_size))
+        self.pack(self.int_pair, len(pointer_list), 0)
+        self.write(struct.pack(self.endianness + str(len(pointer_list)) + "i", *pointer_list))
+        self.align(16)
+        self.write(bytes("NEND", 'UTF-8'))
+        self.write(bytes(12))
+        return (weird_pointer, nof0_pointer, nof0_size)
+
+    def outer_header(self, magic, unknown, weird_pointer, nof0_pointer, nof0_size):
+        struct.pack_into("<4si", self.buffer, 0, magic, 24)
+        self.file_header.pack_into(self.buffer, 8, 1, 32, weird_pointer, nof0_pointer+32, nof0_size+4, unknown)
+
+    def float_words(self, values):
+        #A whole numpy array of floats in file format, as 4 byte words so they can go into a word array
+        if self.ds_flag:
+            return floatsToFixed(values).astype(self.endianness + "i4")
+        values = numpy.asarray(values, "f8")
+        words = values.astype(self.endianness + "f4")
+        if numpy.isinf(words).any() and not numpy.isinf(values[numpy.isinf(words)]).all():
+            raise OverflowError("float too large to pack with f format")
+        return words.view(self.endianness + "i4")
+
+    def keyframes(self, tracks):
+        #tracks are (data type, keyframes) in file order, the keyframes being lists of dicts or keyframe arrays.
+        #Every keyframe is 6 words, so all of them go into one word array, one column at a time, and get written with a single tobytes().
+        #See self.bulk for when plain json keyframes still go through keyframe_records()
+        if not self.bulk and all(type(keyframes) == list for data_type, keyframes in tracks):
+            self.keyframe_records(tracks)
+            return
+        columns = keyframeColumns(tracks, self.endianness)
+        e = self.endianness
+        row_types = columns["row_types"]
+        words = numpy.empty((len(row_types), 6), e + "i4")
+
+        for data_type in keyframe_data_types:
+            rows = columns[data_type]
+            type_words = numpy.empty((len(rows), 6), e + "i4")
+            type_words[:, 0] = integerArray(rows[:, 0])
+            if data_type == "rgba":
+                #the 4 bytes are already in file order
+                type_words[:, 1] = integerArray(columns["channels"], 0, 256).astype("u1").view(e + "i4")[:, 0]
+                rows = rows[:, 1:]
+            else:
+                if data_type == "int":
+                    type_words[:, 1] = integerArray(rows[:, 1])
+                else:
+                    type_words[:, 1] = self.float_words(rows[:, 1])
+                rows = rows[:, 2:]
+            type_words[:, 2] = integerArray(rows[:, 0])
+            type_words[:, 3:6] = self.float_words(rows[:, 1:4])
+            words[row_types == keyframe_data_types.index(data_type)] = type_words
+        self.buffer += words.tobytes()
+
+    def keyframe_records(self, tracks):
+        #Same as keyframes(), one struct.pack per keyframe
+        fixed = self.fixed
+        rgba = self.rgba
+        buffer = self.buffer
+        for data_type, keyframes in tracks:
+            keyframe_struct = self.keyframe_structs[data_type]
+            if data_type == "rgba":
+                for keyframe in keyframes:
+                    buffer += keyframe_struct.pack(keyframe["timestamp"], *rgba(keyframe["data"]), keyframe["tweening"],
+                                                   fixed(keyframe["ease_in"]), fixed(keyframe["ease_out"]), fixed(keyframe["unk"]))
+            elif data_type == "float":
+                for keyframe in keyframes:
+                    buffer += keyframe_struct.pack(keyframe["timestamp"], fixed(keyframe["data"]), keyframe["tweening"],
+                                                   fixed(keyframe["ease_in"]), fixed(keyframe["ease_out"]), fixed(keyframe["unk"]))
+            else:
+                for keyframe in keyframes:
+                    buffer += keyframe_struct.pack(keyframe["timestamp"], keyframe["data"], keyframe["tweening"],
+                                                   fixed(keyframe["ease_in"]), fixed(keyframe["ease_out"]), fixed(keyframe["unk"]))
+
+    def sprite_settings(self, elements):
+        #Each element's sprite list followed by its default settings. The settings are 15 words
+        #(hide, 6 floats, 5 rgba, 3 ints), so they're all converted at once like the keyframes
+        if not self.bulk:
+            self.sprite_settings_records(elements)
+            return
+        if len(elements) == 0:
+            return
+        e = self.endianness
+        rgba = self.rgba
+        settings = [element["Default Settings"] for element in elements]
+        words = numpy.empty((len(settings), 15), e + "i4")
+        words[:, 0] = intArray([setting["hide"] for setting in settings])
+        words[:, 1:7] = self.float_words([(setting["posx"], setting["posy"], setting["angle"], setting["scalex"], setting["scaley"], setting["sprite_index"])
+                                          for setting in settings])
+        colors = [rgba(setting["rgba"]) + rgba(setting["rgba_tl"]) + rgba(setting["rgba_bl"]) + rgba(setting["rgba_tr"]) + rgba(setting["rgba_br"])
+                  for setting in settings]
+        words[:, 7:12] = intArray(colors, 0, 256).astype("u1").view(e + "i4")
+        words[:, 12:15] = intArray([(setting["audio_cue?"], setting["3d_depth"], setting["unk_motion"]) for setting in settings])
+        settings_data = words.tobytes()
+        settings_size = self.settings.size
+
+        sprite_lists = [element["Sprite List"] for element in elements]
+        sprite_data = intArray([sprite for sprite_list in sprite_lists for sprite in sprite_list]).astype(e + "i4").tobytes()
+        position = 0
+        for index in range(len(sprite_lists)):
+            sprites_end = position + len(sprite_lists[index])*4
+            self.buffer += sprite_data[position:sprites_end]
+            self.buffer += settings_data[index*settings_size:(index + 1)*settings_size]
+            position = sprites_end
+
+    def sprite_settings_records(self, elements):
+        #Same as sprite_settings(), with struct
+        rgba = self.rgba
+        for element in elements:
+            sprite_list = element["Sprite List"]
+            self.buffer += struct.pack(self.endianness + str(len(sprite_list)) + "i", *sprite_list)
+
+            settings = element["Default Settings"]
+            self.pack(self.settings, settings["hide"],
+                      *self.floats((settings["posx"], settings["posy"], settings["angle"], settings["scalex"], settings["scaley"], settings["sprite_index"])),
+                      *(rgba(settings["rgba"]) + rgba(settings["rgba_tl"]) + rgba(settings["rgba_bl"]) + rgba(settings["rgba_tr"]) + rgba(settings["rgba_br"])),
+                      settings["audio_cue?"], settings["3d_depth"], settings["unk_motion"])
+
+def rgbaFileOrder(endianness):
+    if endianness == "<":
+        return ("alpha", "blue", "green", "red")
+    return ("red", "green", "blue", "alpha")
+
+#Keyframe arrays are numpy structured arrays, one row per keyframe, with the same fields as the json
+#keyframes. Floats are float64 (DS fixed point already converted) and rgba data is split into channels.
+keyframe_array_dtypes = {}
+
+def keyframeArrayDtype(data_type):
+    if data_type not in keyframe_array_dtypes:
+        if data_type == "rgba":
+            data = [("red", "u1"), ("green", "u1"), ("blue", "u1"), ("alpha", "u1")]
+        elif data_type == "int":
+            data = [("data", "i4")]
+        else:
+            data = [("data", "f8")]
+        keyframe_array_dtypes[data_type] = numpy.dtype([("timestamp", "i4")] + data + [("tweening", "i4"), ("ease_in", "f8"), ("ease_out", "f8"), ("unk", "f8")])
+    return keyframe_array_dtypes[data_type]
+
+def keyframesToList(track):
+    #Keyframe array -> the json keyframe dicts, the same values decode() gives without arrays
+    if type(track) == list:
+        return track
+    names = track.dtype.names
+    columns = [track[name].tolist() for name in names]
+    if "red" in names:
+        return [{"timestamp" : timestamp, "data" : {"red" : red, "green" : green, "blue" : blue, "alpha" : alpha}, "tweening" : tweening,
+                 "ease_in" : ease_in, "ease_out" : ease_out, "unk" : unk}
+                for timestamp, red, green, blue, alpha, tweening, ease_in, ease_out, unk in zip(*columns)]
+    return [{"timestamp" : timestamp, "data" : data, "tweening" : tweening, "ease_in" : ease_in, "ease_out" : ease_out, "unk" : unk}
+            for timestamp, data, tweening, ease_in, ease_out, unk in zip(*columns)]
+
+def keyframeArraysToLists(json_data):
+    #Turns every keyframe array in a decoded json into plain keyframe lists, in place
+    for anim in json_data["Animations"]:
+        for bank in anim["Element Banks"]:
+            for element in bank:
+                for motion in element["Animations"]:
+                    motion["Keyframes"] = keyframesToList(motion["Keyframes"])
+    return json_data
+
+#What the keyframe data field holds for each motion
+def keyframeDataType(motion):
+    if motion.find("rgba") != -1:
+        return "rgba"
+    elif motion.find("hide") != -1 or motion.find("3d_depth") != -1:
+        return "int"
+    return "float"
+
+#The encoder has always written these as ints too
+def encodeDataType(motion):
+    if motion.find("rgba") != -1:
+        return "rgba"
+    elif motion.find("hide") != -1 or motion.find("3d_depth") != -1 or motion.find("audio_cue?") != -1 or motion.find("unk_motion") != -1:
+        return "int"
+    return "float"
+
+def floatToFixed(number):
+    number = int(number* 4096)
+    return number
+
+def floatsToFixed(values):
+    #floatToFixed over a whole numpy array, same truncation toward zero.
+    #Out of range values would wrap around silently in numpy, struct refuses them so this does too
+    scaled = numpy.asarray(values, "f8") * 4096
+    if not ((scaled > -2**31 - 1) & (scaled < 2**31)).all():
+        raise struct.error("argument out of range")
+    return scaled.astype("i4")
+
+def intArray(values, low = -2**31, high = 2**31):
+    #values as a numpy int array, refusing floats and out of range values like struct does
+    array = numpy.asarray(values)
+    if array.size == 0:
+        return array.astype("i8")
+    if array.dtype.kind not in "iub":
+        raise struct.error("required argument is not an integer")
+    if array.min() < low or array.max() >= high:
+        raise struct.error("argument out of range")
+    return array
+
+def integerArray(values, low = -2**31, high = 2**31):
+    #Same checks for a float64 array gathered from json numbers, anything that isn't a whole number is refused
+    if not ((values == numpy.trunc(values)) & (values >= low) & (values < high)).all():
+        raise struct.error("required argument is not an integer or out of range")
+    return values.astype("i8")
+
+keyframe_data_types = ("int", "float", "rgba")
+#What's in a keyframe row for int / float data and for rgba data, whose channels are gathered on their own
+numeric_row = ("timestamp", "data", "tweening", "ease_in", "ease_out", "unk")
+rgba_row = ("timestamp", "tweening", "ease_in", "ease_out", "unk")
+
+def gatherRows(chunks, keyframes, rows):
+    #Runs of keyframe lists are gathered as iterators over their rows (tuples), so the rows only exist one at a time.
+    #Runs of keyframe arrays as a list of arrays, to be joined with a single concatenate
+    kind = type(keyframes) == list
+    if len(chunks) == 0 or chunks[-1][0] != kind:
+        chunks.append((kind, []))
+    if kind:
+        chunks[-1][1].append(rows)
+    else:
+        chunks[-1][1].append(keyframes)
+
+def joinKeyframeArrays(arrays):
+    #numpy.concatenate promotes the fields of structured arrays one array at a time in python, which is slow for
+    #thousands of short tracks. When they all have the same dtype their bytes can just be joined
+    dtype = arrays[0].dtype
+    if all(array.dtype == dtype for array in arrays):
+        try:
+            return numpy.frombuffer(b"".join(arrays), dtype)
+        except BufferError:
+            pass
+    return numpy.concatenate(arrays)
+
+def joinRows(chunks, names):
+    #One float64 array with a row per keyframe. fromiter flattens the rows a lot faster than numpy.array would
+    width = len(names)
+    arrays = [numpy.zeros((0, width))]
+    for is_list, chunk in chunks:
+        if is_list:
+            rows = itertools.chain.from_iterable(chunk)
+            arrays.append(numpy.fromiter(itertools.chain.from_iterable(rows), "f8").reshape(-1, width))
+        else:
+            keyframes = joinKeyframeArrays(chunk)
+            arrays.append(numpy.column_stack([keyframes[name].astype("f8") for name in names]))
+    return numpy.concatenate(arrays)
+
+def keyframeColumns(tracks, endianness = "<"):
+    #Every keyframe of every track as float64 arrays, one per data type with a row per keyframe (numeric_row or rgba_row),
+    #plus "channels" with the 4 bytes of each rgba keyframe in file order.
+    #Each array keeps the file order of its keyframes, row_types says which array each keyframe in the file comes from,
+    #as an index into keyframe_data_types
+    channels = rgbaFileOrder(endianness)
+    get_numeric = operator.itemgetter(*numeric_row)
+    get_rgba = operator.itemgetter(*rgba_row)
+    get_channels = operator.itemgetter(*channels)
+    get_data = operator.itemgetter("data")
+    chunks = {"int" : [], "float" : [], "rgba" : [], "channels" : []}
+    type_codes = []
+    lengths = []
+    for data_type, keyframes in tracks:
+        if len(keyframes) == 0:
+            continue
+        is_list = type(keyframes) == list
+        if data_type == "rgba":
+            gatherRows(chunks["rgba"], keyframes, is_list and map(get_rgba, keyframes))
+            gatherRows(chunks["channels"], keyframes, is_list and map(get_channels, map(get_data, keyframes)))
+        else:
+            gatherRows(chunks[data_type], keyframes, is_list and map(get_numeric, keyframes))
+        type_codes.append(keyframe_data_types.index(data_type))
+        lengths.append(len(keyframes))
+    return {"int" : joinRows(chunks["int"], numeric_row),
+            "float" : joinRows(chunks["float"], numeric_row),
+            "rgba" : joinRows(chunks["rgba"], rgba_row),
+            "channels" : joinRows(chunks["channels"], channels),
+            "row_types" : numpy.repeat(numpy.array(type_codes, "i1"), lengths)}
+
+def padString(text, block_size = 4):
+    pad_size = block_size - len(text)% block_size
+    fit_text = text + (" "*pad_size)
+    return (fit_text)
+
+########## Misc functions #########
+
+
+def getEdgeList(hierarchy):
+    #Parent array -> [first child, next sibling] for each element, -1 where there's none.
+    #Children and the top level elements (parent -1) are siblings in index order, element 0 has to be the first of the top level ones
+    #since that's where the game (and decode) start walking the tree
+    num_of_elms = len(hierarchy)
+    children = [[] for _ in range(num_of_elms)]
+    top_level = []
+    for element, parent in enumerate(hierarchy):
+        if parent == -1:
+            top_level.append(element)
+        elif 0 <= parent < num_of_elms:
+            children[parent].append(element)
+        else:
+            raise InvalidAnimationError("element " + str(element) + " has parent " + str(parent) + ", which isn't in the bank")
+    if num_of_elms != 0 and hierarchy[0] != -1:
+        raise InvalidAnimationError("element 0 can't have a parent")
+
+    edge = [[-1, -1] for _ in range(num_of_elms)]
+    #Every element has one parent, so anything the top level can't reach is stuck in a cycle
+    reached = [False] * num_of_elms
+    siblings_lists = [top_level]
+    while len(siblings_lists) != 0:
+        siblings = siblings_lists.pop()
+        for element in siblings:
+            reached[element] = True
+        for i in range(len(siblings) - 1):
+            edge[siblings[i]][1] = siblings[i + 1]
+        for element in siblings:
+            if len(children[element]) != 0:
+                edge[element][0] = children[element][0]
+                siblings_lists.append(children[element])
+    if not all(reached):
+        raise InvalidAnimationError("element " + str(reached.index(False)) + " is in a cycle of parents, it can't reach the top level")
+    return(edge)
+
+def sortMotion(dict):
+    return ["hide", "posx", "posy", "angle", "scalex", "scaley", "sprite_index", "rgba", "rgba_tl", "rgba_bl", "rgba_tr", "rgba_br", "audio_cue?" , "3d_depth", "unk_motion"].index(dict['Motion'])
+
+motion_names = {1 : "hide",
+                2 : "posx",
+                4 : "posy",
+                8 : "angle",
+                16: "scalex",
+                32: "scaley",
+                64: "sprite_index",
+                128 : "rgba",
+                256 : "rgba_tl",
+                512 : "rgba_bl",
+                1024 : "rgba_tr",
+                2048 : "rgba_br",
+                4096 : "audio_cue?",
+                8192 : "3d_depth",
+                16384 : "unk_motion",
+                "hide"         : 1    ,
+                "posx"         : 2    ,
+                "posy"         : 4    ,
+                "angle"        : 8    ,
+                "scalex"       : 16   ,
+                "scaley"       : 32   ,
+                "sprite_index" : 64   ,
+                "rgba"         : 128  ,
+                "rgba_tl"      : 256  ,
+                "rgba_bl"      : 512  ,
+                "rgba_tr"      : 1024 ,
+                "rgba_br"      : 2048 ,
+                "audio_cue?"   : 4096 ,
+                "3d_depth"     : 8192 ,
+                "unk_motion"   : 16384
+                }
+
+
+def get_powers(number):
+    powers = (16384, 8192, 4096, 2048, 1024 , 512, 256, 128, 64, 32, 16, 8,4, 2, 1)
+    which_power = 0
+    power_list = []
+    while True:
+        if (number / powers[which_power]).is_integer():
+            power_list.append(powers[which_power])
+            number -= powers[which_power]
+            which_power = 0
+            if number < 1:
+                break
+        else:
+            which_power += 1
+    return power_list
+
+
+def get_hierarchy(reader, offset, num_of_elms):
+    links = reader.ints(offset, num_of_elms*2)
+    hierarchy = []
+    for i in range(num_of_elms):
+        hierarchy.append([links[i*2], links[i*2+1]])
+
+    parenting = getParentData(hierarchy)
+    hierarchy = []
+    for a in parenting:
+        if a == None:
+            hierarchy.append(-1)
+        else:
+            hierarchy.append(a)
+
+    return hierarchy
+
+def getParentData(array):
+    #[first child, next sibling] for each element -> parent array. Walks the tree from element 0 with a stack
+    #instead of recursing, so deep and wide banks are fine. An element the walk never reaches would come out as a top level one,
+    #which encodes to a different tree, so that's an error like a cycle is in getEdgeList
+    num_of_elms = len(array)
+    parents = [-1] * num_of_elms
+    if num_of_elms == 0:
+        return parents
+    visited = [False] * num_of_elms
+    stack = [(0, -1)]
+    while len(stack) != 0:
+        node, parent = stack.pop()
+        if not 0 <= node < num_of_elms:
+            raise InvalidAnimationError("element hierarchy links to element " + str(node) + ", the bank has " + str(num_of_elms))
+        if visited[node]:
+            raise InvalidAnimationError("element " + str(node) + " is reached twice in the element hierarchy")
+        visited[node] = True
+        parents[node] = parent
+        left_child, right_sibling = array[node]
+        if right_sibling != -1:
+            stack.append((right_sibling, parent))
+        if left_child != -1:
+            stack.append((left_child, node))
+    if not all(visited):
+        raise InvalidAnimationError("element " + str(visited.index(False)) + " isn't reached from element 0 in the element hierarchy")
+    return parents
+
+
+#Anim to json
+def decode(anim_file_data, platform = None, name_order = False, debug = False, profiler = None, keyframe_arrays = False, name_tables = None, workers = 1):
+    #keyframe_arrays decodes each motion's keyframes into a numpy keyframe array instead of a list of dicts.
+    #keyframeArraysToLists() turns them into the usual json when it's time to write it.
+    #name_tables is filled in with the file's names if given, see NameTables
+    #workers above 1 decodes the animations on that many processes, see decodeAnimationsParallel. None is one per core
+    final_json, animations = decode_stream(anim_file_data, platform, name_order, debug, profiler, keyframe_arrays, name_tables, workers)
+    final_json["Animations"] = list(animations)
+    return final_json
+
+def readAnimHeader(anim_file_data, ctx):
+    #Checks for nCSC, sets ctx's byte order and alignment and reads the nCSC header.
+    #Returns (reader, magic, header values from num_unk_patterns on), the pointers already have the alignment added.
+    if bytes(anim_file_data[32:36]) != b"nCSC" :
+        raise InvalidAnimationError("not a valid animation file")
+    log = ctx.log
+
+    #determine endianness
+    if struct.unpack_from("<i", anim_file_data, 8)[0] == 1:
+        ctx.endianness = "<"
+    else:
+        ctx.endianness = ">"
+    log("byte order: " + ctx.endianness)
+
+    #determine alignment
+    #For now it seems to be 32 always, but i can change it later here if that's not the case.
+    ctx.alignment = struct.unpack_from(ctx.endianness + "i", anim_file_data, 12)[0]
+    log("alignment: " + str(ctx.alignment) )
+
+    reader = AnimReader(anim_file_data, ctx.endianness, ctx.ds_flag, ctx.mobile_flag, ctx.alignment)
+    magic = reader.string(0,4)
+
+    #The whole nCSC header is one record, right after its magic and data length
+    header = list(reader.record(reader.header, 40)[7:])
+    #unk patterns, sprite crops, element banks, element names, animations, animation names, animation lengths
+    for i in (1, 3, 5, 7, 9, 10, 12):
+        header[i] += ctx.alignment
+    return (reader, magic, header)
+
+def decodeElementBanks(reader, elem_banks_off, num_elem_banks, debug = False, log = None):
+    #Returns (element banks without their names, bytes read, number of elements)
+    alignment = reader.alignment
+    record = reader.record
+    records = reader.records
+    scale = 1/2 **12 if reader.ds_flag else 1
+    if log == None:
+        log = AnimContext(debug = debug).log
+    element_banks = []
+    bank_bytes = num_elem_banks*reader.bank_entry.size
+    num_elements = 0
+    #for every bank of elements
+    for num_elem_in_bank, elem_list_off, unk_bank_value, hierarchy_off in records(reader.bank_entry, elem_banks_off, num_elem_banks):
+        log("unknown int(?) value: " + str(unk_bank_value))
+        element_bank = []
+        hierarchy = get_hierarchy(reader, hierarchy_off + alignment, num_elem_in_bank)
+        log("parenting array: ")
+        log(hierarchy)
+        bank_bytes += num_elem_in_bank*(reader.pointer_value.size + reader.int_pair.size + reader.element.size + reader.settings.size)
+        num_elements += num_elem_in_bank
+        element_pointers = [pointer for pointer, in records(reader.pointer_value, elem_list_off + alignment, num_elem_in_bank)]
+        #Let's start storing the element data
+        for a in range(num_elem_in_bank):
+            values = record(reader.element, element_pointers[a] + alignment)
+            element = {}
+            element["Index"] = a
+            element["Name"] = "" #dummy for now
+            element["Parent"] = hierarchy[a]
+            element["Unknown Flag 0"] = values[0]
+            element["Render Flag"] = values[1]
+            element["Unknown Flag 1"] = values[2]
+
+            #2D Polygon
+            element["2D Polygon"] = [v*scale for v in values[3:11]]
+
+            element["Unknown Values"] = [values[11]]
+            elem_settings_off = values[12] + alignment
+            element["Unknown Values"].append(values[13])
+            element["Render Settings"] = reader.render_method(values[14:18])
+            num_element_sprites = values[18]
+            element_sprites_off = values[19] + alignment
+            sprite_list = list(reader.ints(element_sprites_off, num_element_sprites))
+            bank_bytes += num_element_sprites*4
+            if debug:
+                #For the sake of debugging, let's stop duplicates
+                sprite_list = [sprite for i, sprite in enumerate(sprite_list) if sprite not in sprite_list[:i]]
+            element["Sprite List"] = sprite_list
+
+            settings = record(reader.settings, elem_settings_off)
+            element_settings = {}
+            element_settings["hide"] = settings[0]
+            element_settings["posx"] = settings[1]*scale
+            element_settings["posy"] = settings[2]*scale
+            element_settings["angle"] = settings[3]*scale
+            element_settings["scalex"] = settings[4]*scale
+            element_settings["scaley"] = settings[5]*scale
+            element_settings["sprite_index"] = int(settings[6]*scale)
+            element_settings["rgba"] = reader.rgba(settings[7:11])
+            element_settings["rgba_tl"] = reader.rgba(settings[11:15])
+            element_settings["rgba_bl"] = reader.rgba(settings[15:19])
+            element_settings["rgba_tr"] = reader.rgba(settings[19:23])
+            element_settings["rgba_br"] = reader.rgba(settings[23:27])
+            element_settings["audio_cue?"] = settings[27]
+            element_settings["3d_depth"] = settings[28]
+            element_settings["unk_motion"] = settings[29]
+            element["Default Settings"] = element_settings
+            #add the rest of the unk values as INT because i don't know what else they are... They're usually 00 00 00 00 .
+            element["Unknown Values"].append(values[20])
+            #The rest (values[21], values[22]) seem to be offsets since they get larger if mobile or not (?)
+            #I don't know which one is the integer and which ones are the pointer.
+
+            element_bank.append(element)
+        element_banks.append(element_bank)
+        log(element_bank)
+    return (element_banks, bank_bytes, num_elements)
+
+def animationNames(reader, anim_names_off, num_anims):
+    #The name of every animation, in order. The name table is read once into index -> name.
+    #If an index is in there twice the last one wins, same as scanning it did
+    names = {}
+    for name_offset, name_index in reader.records(reader.pointer_index, anim_names_off, num_anims):
+        names[name_index] = reader.string(name_offset + reader.alignment)
+    anim_names = []
+    for anim_num in range(num_anims):
+        if anim_num in names:
+            anim_name = names[anim_num]
+        elif anim_num == 0:
+            raise InvalidAnimationError("animation 0 has no name")
+        #(an animation missing from the name table has always kept the previous one's name)
+        anim_names.append(anim_name)
+    return anim_names
+
+def decodeAnimation(reader, bank_num, anim_bank_off, keyframe_arrays = False, log = None):
+    #The "Element Banks" of one animation, anim_bank_off being its entry's pointer with the alignment added.
+    #Returns (element banks, bytes read, number of keyframes, time spent on keyframes)
+    alignment = reader.alignment
+    record = reader.record
+    records = reader.records
+    scale = 1/2 **12 if reader.ds_flag else 1
+    clock = time.perf_counter
+    if log == None:
+        log = AnimContext().log
+    keyframe_time = 0.0
+    num_keyframes_total = 0
+    anim_bytes = bank_num*reader.count_pointer.size
+    animation_element_bank_list = []
+    element_bank = 0
+    for num_elems, anim_off in records(reader.count_pointer, anim_bank_off, bank_num): #for element bank in animation
+        log("bank " + str(element_bank) + " with " + str(num_elems) + " element(s)")
+        animation_list = []
+        anim_bytes += num_elems*reader.count_pointer.size
+
+        element = 0
+        for motions, keyframelist_offset in records(reader.count_pointer, anim_off + alignment, num_elems):
+            #Store motion types
+            log("motion_int : " + str(motions))
+            motion_list = []
+            if motions != 0:
+                motions = get_powers(motions)
+                for motion in motions:
+                    motion_list.append(motion_names[motion])
+
+            element_animation = []
+            keyframelist_offset += alignment
+            for motion in motion_list:
+                loop_value, num_keyframes, keyframe_offset = record(reader.keyframe_list_entry, keyframelist_offset)
+                keyframelist_offset += reader.keyframe_list_entry.size
+
+                #GetKeyframes
+                keyframe_start = clock()
+                anim_bytes += reader.keyframe_list_entry.size
+                num_keyframes_total += num_keyframes
+                keyframe_offset += alignment
+                log(keyframe_offset)
+                data_type = keyframeDataType(motion)
+                keyframe_list = []
+                if keyframe_arrays:
+                    keyframe_list = reader.keyframe_array(keyframe_offset, num_keyframes, data_type)
+                elif data_type == "rgba":
+                    for timestamp, c0, c1, c2, c3, tweening, ease_in, ease_out, unk in records(reader.keyframe_structs["rgba"], keyframe_offset, num_keyframes):
+                        keyframe_list.append({"timestamp" : timestamp, "data" : reader.rgba((c0, c1, c2, c3)), "tweening" : tweening,
+                                              "ease_in" : ease_in*scale, "ease_out" : ease_out*scale, "unk" : unk*scale})
+                else:
+                    data_scale = 1 if data_type == "int" else scale
+                    for timestamp, data, tweening, ease_in, ease_out, unk in records(reader.keyframe_structs[data_type], keyframe_offset, num_keyframes):
+                        keyframe_list.append({"timestamp" : timestamp, "data" : data*data_scale, "tweening" : tweening,
+                                              "ease_in" : ease_in*scale, "ease_out" : ease_out*scale, "unk" : unk*scale})
+                element_animation.append({"Motion" : motion, "Loop" : loop_value, "Keyframes" : keyframe_list})
+                keyframe_time += clock() - keyframe_start
+            animation_list.append({"Index" : element, "Animations" : element_animation})
+            element += 1
+        animation_element_bank_list.append(animation_list)
+        element_bank += 1
+    return (animation_element_bank_list, anim_bytes, num_keyframes_total, keyframe_time)
+
+#The file a decode worker process reads its animations out of, see decodeAnimationsParallel
+decode_worker_state = {}
+
+def _decode_worker_init(anim_file_data, endianness, ds_flag, mobile_flag, alignment, keyframe_arrays, dump):
+    #With fork the worker starts out with everything the parent had. The garbage collector going through all of that
+    #would touch, and so really copy, every page of it, so it's left out
+    gc.freeze()
+    decode_worker_state["reader"] = AnimReader(anim_file_data, endianness, ds_flag, mobile_flag, alignment)
+    decode_worker_state["keyframe_arrays"] = keyframe_arrays
+    decode_worker_state["dump"] = dump
+
+def _decode_worker(entries):
+    #Runs in the pool. decodeAnimation() of a run of (number of banks, banks offset, name, length range),
+    #with the whole animation as json text instead of its banks when dumping
+    reader = decode_worker_state["reader"]
+    keyframe_arrays = decode_worker_state["keyframe_arrays"]
+    dump = decode_worker_state["dump"]
+    results = []
+    for bank_num, anim_bank_off, anim_name, anim_len in entries:
+        result = decodeAnimation(reader, bank_num, anim_bank_off, keyframe_arrays)
+        if dump != None:
+            anim = {"Name" : anim_name, "Length Range" : anim_len, "Element Banks" : result[0]}
+            result = (dumpAnimation(anim, keyframe_arrays, dump),) + result[1:]
+        results.append(result)
+    return results
+
+def dumpAnimation(anim, keyframe_arrays, compact):
+    #One animation as write_json() writes it
+    if keyframe_arrays:
+        anim = keyframeArraysToLists({"Animations" : [anim]})["Animations"][0]
+    return dumpJson(anim, 2, compact)
+
+def decodeAnimationsParallel(reader, entries, keyframe_arrays = False, workers = None, dump = None):
+    #decodeAnimation() of every (number of banks, banks offset, name, length range) in entries on a process pool,
+    #yielded in order so the json comes out the same. An animation only reads its own banks, motions and keyframes.
+    #Every worker gets the file once when it starts (with fork, the default on Linux, they share this process' copy),
+    #then the animations go out in runs. See decode_stream() for dump
+    anim_file_data = reader.anim_file_data
+    if type(anim_file_data) != bytes:
+        #(an mmap can't go to a worker)
+        anim_file_data = bytes(anim_file_data)
+    if workers == None:
+        workers = os.cpu_count() or 1
+    run = max(1, len(entries) // (workers*4))
+    runs = [entries[i:i + run] for i in range(0, len(entries), run)]
+    workers = max(1, min(workers, len(runs)))
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer = _decode_worker_init,
+                                                initargs = (anim_file_data, reader.endianness, reader.ds_flag, reader.mobile_flag, reader.alignment, keyframe_arrays, dump)) as pool:
+        for results in pool.map(_decode_worker, runs):
+            for result in results:
+                yield result
+
+def decode_stream(anim_file_data, platform = None, name_order = False, debug = False, profiler = None, keyframe_arrays = False, name_tables = None, workers = 1, dump = None):
+    #Same as decode(), but returns (json without "Animations", iterator over the animations).
+    #The animations are decoded as the iterator gets to them, see write_json()
+    #dump True or False (compact) gives every animation already written out as json text the way write_json() writes it.
+    #With workers that gets done on the pool too, only the text has to come back
+    if keyframe_arrays and numpy == None:
+        raise RuntimeError("keyframe_arrays needs numpy")
+    ctx = AnimContext(platform, name_order, debug)
+    log = ctx.log
+    if profiler == None:
+        profiler = Profiler()
+    clock = time.perf_counter
+    phase_start = clock()
+
+    log("starting conversion to json")
+
+    #Let's begin!!!!!!!
+    #Let's first get the relevant header data.
+    reader, magic, header = readAnimHeader(anim_file_data, ctx)
+    records = reader.records
+    scale = 1/2 **12 if ctx.ds_flag else 1  #DS fixed point -> float, exact since it's a power of 2
+    (num_unk_pattern, unk_pattern_off, num_sprite_crops, sprite_crops_off, num_elem_banks, elem_banks_off,
+     num_elem_names, elem_names_off, num_anims, anims_off, anim_names_off, aspect_ratio, anim_len_off) = header
+    data_offset = 40 + reader.header.size
+
+    #aspect ratio
+    if ctx.ds_flag:
+        aspect_ratio = aspect_ratio/2 **12
+    screen_size = ctx.getScreenSize(aspect_ratio)
+    aspect_ratio = Fraction(aspect_ratio).limit_denominator()
+    log("unk patterns: " + str(num_unk_pattern))
+    log("sprite crops: " + str(num_sprite_crops))
+    log("element banks: " + str(num_elem_banks))
+    log("elements: " + str(num_elem_names))
+    log("animations: " + str(num_anims))
+    log("screen size: " + str(screen_size))
+    alignment = ctx.alignment
+
+    #Header data is over. Now let's start storing the data.
+    now = clock()
+    profiler.add("decode", "header", now - phase_start, data_offset, 1)
+    phase_start = now
+
+    #Unknown Patterns
+    unk_pattern_list = []
+    for a, b in records(reader.float_pair, unk_pattern_off, num_unk_pattern):
+        unk_pattern_list.append((a*scale, b*scale))
+    log("\nunknown patterns:")
+    log(unk_pattern_list)
+    now = clock()
+    profiler.add("decode", "unknown patterns", now - phase_start, num_unk_pattern*reader.float_pair.size, num_unk_pattern)
+    phase_start = now
+
+    sprite_crop_list = []
+    #Sprite Crops:
+    for texture, top_left_X, top_left_Y, bottom_right_X, bottom_right_Y in records(reader.crop, sprite_crops_off, num_sprite_crops):
+        sprite_crop_list.append({"texture": texture,
+                                 "top_left_X": top_left_X*scale,
+                                 "top_left_Y": top_left_Y*scale,
+                                 "bottom_right_X": bottom_right_X*scale,
+                                 "bottom_right_Y": bottom_right_Y*scale})
+    log("\nsprite crops")
+    for i in sprite_crop_list:
+        log(i)
+    now = clock()
+    profiler.add("decode", "sprite crops", now - phase_start, num_sprite_crops*reader.crop.size, num_sprite_crops)
+    phase_start = now
+
+    #element banks (uh oh)
+    element_banks, bank_bytes, num_elements = decodeElementBanks(reader, elem_banks_off, num_elem_banks, debug, log)
+    now = clock()
+    profiler.add("decode", "element banks", now - phase_start, bank_bytes, num_elements)
+    phase_start = now
+
+    #Let's now get the names for each element.
+    name_bytes = num_elem_names*reader.name_entry.size
+    i = 0
+    element_order = []
+    for name_offset, bank_index, elm_index in records(reader.name_entry, elem_names_off, num_elem_names):
+        element_order.append((bank_index, elm_index))
+        element_banks[bank_index][elm_index]["Name"] = name = reader.string(name_offset + alignment)
+        name_bytes += len(name) + 1
+        if ctx.name_order_flag:
+            element_banks[bank_index][elm_index]["Name Index"] = i
+        log(element_banks[bank_index][elm_index])
+        i += 1
+    now = clock()
+    profiler.add("decode", "element names", now - phase_start, name_bytes, num_elem_names)
+    phase_start = now
+
+    #Misc info i guess
+    misc_info = {"Header Magic" : magic,
+                 "Aspect Ratio" : str(aspect_ratio),
+                 "Screen Size" : screen_size,
+                 "Byte Order" : ctx.endianness,
+                 }
+
+    json_head = {"Misc. Info": misc_info, "Unk. Patterns" : unk_pattern_list, "Sprite Crops" : sprite_crop_list, "Element Banks" : element_banks}
+    if name_tables != None:
+        name_tables.add_element_banks(element_banks, element_order)
+
+    def decode_animations():
+        #Decodes one animation per next(), so only the one being written has to be in memory
+        anim_time = 0.0
+        keyframe_time = 0.0
+        num_keyframes_total = 0
+        anim_bytes = num_anims*(reader.count_pointer.size + reader.pointer_index.size + reader.float_pair.size)
+        #Time to store animations
+        anim_lengths = list(records(reader.float_pair, anim_len_off, num_anims))
+        anim_names = animationNames(reader, anim_names_off, num_anims)
+        #(number of banks, banks offset, name, length range) of every animation
+        entries = []
+        for bank_num, anim_bank_off in records(reader.count_pointer, anims_off, num_anims):
+            anim_num = len(entries)
+            entries.append((bank_num, anim_bank_off + alignment, anim_names[anim_num], (anim_lengths[anim_num][0]*scale, anim_lengths[anim_num][1]*scale)))
+        #(debug prints as it goes, so that stays on this process)
+        parallel = workers != 1 and num_anims > 1 and not debug
+        if parallel:
+            decoded = decodeAnimationsParallel(reader, entries, keyframe_arrays, workers, dump)
+        else:
+            decoded = (decodeAnimation(reader, bank_num, anim_bank_off, keyframe_arrays, log) for bank_num, anim_bank_off, anim_name, anim_len in entries)
+        anim_num = 0
+        for bank_num, anim_bank_off, anim_name, anim_len in entries:
+            anim_start = clock()
+            log("animation " + str(anim_num) + " with " + str(bank_num) + " element bank(s). offset: " + str(anim_bank_off))
+            animation_element_bank_list, bank_bytes, num_keyframes, bank_keyframe_time = next(decoded)
+            anim_bytes += bank_bytes
+            num_keyframes_total += num_keyframes
+            #On a pool the keyframe time is spread over the workers, waiting for them all goes to the animations
+            if not parallel:
+                keyframe_time += bank_keyframe_time
+
+            log(anim_name)
+            anim_bytes += len(anim_name) + 1
+            if name_tables != None:
+                name_tables.add_animation(anim_num, anim_name)
+            anim_num += 1
+            if parallel and dump != None:
+                #already json text
+                anim = animation_element_bank_list
+            else:
+                anim = {"Name" : anim_name, "Length Range" : anim_len, "Element Banks" : animation_element_bank_list}
+                if dump != None:
+                    anim = dumpAnimation(anim, keyframe_arrays, dump)
+            anim_time += clock() - anim_start
+            yield anim
+        profiler.add("decode", "animations", anim_time - keyframe_time, anim_bytes, num_anims)
+        profiler.add("decode", "keyframes", keyframe_time, num_keyframes_total*reader.keyframe_float.size, num_keyframes_total)
+
+    return (json_head, decode_animations())
+
+def probe(anim_file_data):
+    #Works out the platform of an animation file from the outer header, the nCSC header and the NOF0 table alone.
+    #The pointer size comes from where the nCSC header's pointers are in NOF0, fixed point or float from which
+    #reading of the aspect ratio is in aspect_ratio_dict. "recognised" is False when it had to guess.
+    if len(anim_file_data) < 40 or bytes(anim_file_data[32:36]) != b"nCSC":
+        raise InvalidAnimationError("not a valid animation file")
+    endianness = "<" if struct.unpack_from("<i", anim_file_data, 8)[0] == 1 else ">"
+    layouts = {}
+    for ds_flag in (False, True):
+        for mobile_flag in (False, True):
+            layouts[(ds_flag, mobile_flag)] = compileLayout(endianness, ds_flag, mobile_flag)
+    nof0_offset = layouts[(False, False)]["file_header"].unpack_from(anim_file_data, 8)[3]
+    if bytes(anim_file_data[nof0_offset:nof0_offset + 4]) != b"NOF0":
+        raise InvalidAnimationError("no NOF0 table")
+    num_pointers = struct.unpack_from(endianness + "i", anim_file_data, nof0_offset + 8)[0]
+    #The header's pointers come first in NOF0, the first few are enough
+    first_pointers = set(struct.unpack_from(endianness + str(min(num_pointers, 16)) + "i", anim_file_data, nof0_offset + 16))
+
+    matches = {}
+    for mobile_flag in (False, True):
+        header_pointers = set(8 + offset for offset in layouts[(False, mobile_flag)]["header"].pointers)
+        matches[mobile_flag] = len(first_pointers & header_pointers)
+    mobile_flag = matches[True] > matches[False]
+    recognised = matches[mobile_flag] == len(layouts[(False, mobile_flag)]["header"].pointers)
+
+    counts = {}
+    (counts["unk_patterns"], unk_pattern_off, counts["sprite_crops"], sprite_crops_off, counts["element_banks"], elem_banks_off,
+     counts["elements"], elem_names_off, counts["animations"], anims_off, anim_names_off, aspect_ratio, anim_len_off) = layouts[(False, mobile_flag)]["header"].unpack_from(anim_file_data, 40)[7:]
+    fixed_aspect_ratio = layouts[(True, mobile_flag)]["header"].unpack_from(anim_file_data, 40)[18] / 2 **12
+    if aspect_ratio in aspect_ratio_dict:
+        fixed_point = False
+    elif fixed_aspect_ratio in aspect_ratio_dict:
+        fixed_point = True
+        aspect_ratio = fixed_aspect_ratio
+    else:
+        #Whichever reading looks like a screen
+        recognised = False
+        fixed_point = not 0.1 < abs(aspect_ratio) < 10
+        if fixed_point:
+            aspect_ratio = fixed_aspect_ratio
+
+    if mobile_flag:
+        platform = "mobile"
+    elif fixed_point:
+        #Both DS and 3DS files decode the same, the 3DS top screen is the only way to tell them apart
+        platform = "3ds" if aspect_ratio == 1.666748046875 else "ds"
+    else:
+        platform = None
+    info = {"platform" : platform,
+            "recognised" : recognised,
+            "byte_order" : endianness,
+            "pointer_size" : 8 if mobile_flag else 4,
+            "fixed_point" : fixed_point,
+            "header_magic" : bytes(anim_file_data[0:4]).decode("shift-jis", "replace"),
+            "aspect_ratio" : aspect_ratio,
+            "screen_size" : aspect_ratio_dict.get(aspect_ratio),
+            "pointers" : num_pointers}
+    info.update(counts)
+    return info
+
+class AnimFile:
+    #Random access to the animations of one file. Only the header and the name tables are read up front,
+    #an animation is decoded the first time it's asked for and kept after that, so getting one
+    #out of a big file costs the same as getting it out of a small one.
+    #anim_file_data has to stay open while it's in use, same as for decode().
+    def __init__(self, anim_file_data, platform = None, name_order = False, debug = False, keyframe_arrays = False):
+        if keyframe_arrays and numpy == None:
+            raise RuntimeError("keyframe_arrays needs numpy")
+        if platform == "auto":
+            platform = probe(anim_file_data)["platform"]
+        self.anim_file_data = anim_file_data
+        self.ctx = AnimContext(platform, name_order, debug)
+        self.keyframe_arrays = keyframe_arrays
+        self.reader, magic, header = readAnimHeader(anim_file_data, self.ctx)
+        reader = self.reader
+        num_elem_names, elem_names_off, num_anims, self.anims_off, anim_names_off = header[6:11]
+        self.anim_len_off = header[12]
+        self.scale = 1/2 **12 if self.ctx.ds_flag else 1
+
+        #Same names decode() would give, without the element banks
+        self.names = NameTables()
+        for anim_index, name in enumerate(animationNames(reader, anim_names_off, num_anims)):
+            self.names.add_animation(anim_index, name)
+        for name_offset, bank_index, elm_index in reader.records(reader.name_entry, elem_names_off, num_elem_names):
+            self.names.element_names[(bank_index, elm_index)] = reader.string(name_offset + reader.alignment)
+            self.names.element_order.append((bank_index, elm_index))
+        for key in sorted(self.names.element_names):
+            self.names.element_index.setdefault(self.names.element_names[key], key)
+        self.json_head = None
+        self.animations = {}
+
+    def __len__(self):
+        return len(self.names.animation_names)
+
+    def index(self, animation):
+        #Animation index or name -> index
+        if isinstance(animation, str):
+            if animation not in self.names.animation_index:
+                raise KeyError("no animation called " + animation)
+            return self.names.animation_index[animation]
+        if not 0 <= animation < len(self):
+            raise IndexError("no animation " + str(animation))
+        return animation
+
+    def animation(self, animation):
+        #The json of one animation, by index or name
+        anim_index = self.index(animation)
+        if anim_index not in self.animations:
+            reader = self.reader
+            bank_num, anim_bank_off = reader.record(reader.count_pointer, self.anims_off + anim_index*reader.count_pointer.size)
+            element_banks = decodeAnimation(reader, bank_num, anim_bank_off + reader.alignment, self.keyframe_arrays, self.ctx.log)[0]
+            start, end = reader.record(reader.float_pair, self.anim_len_off + anim_index*reader.float_pair.size)
+            self.animations[anim_index] = {"Name" : self.names.animation_names[anim_index], "Length Range" : (start*self.scale, end*self.scale),
+                                           "Element Banks" : element_banks}
+        return self.animations[anim_index]
+
+    def head(self):
+        #The json without "Animations", decoded once
+        if self.json_head == None:
+            self.json_head = decode_stream(self.anim_file_data, self.ctx.platform, self.ctx.name_order_flag, self.ctx.debug)[0]
+        return self.json_head
+
+    def to_json(self, animations = None):
+        #The json with only the given animations (indices or names, in that order), all of them if None
+        if animations == None:
+            animations = range(len(self))
+        json_data = dict(self.head())
+        json_data["Animations"] = [self.animation(animation) for animation in animations]
+        return json_data
+
+    def export(self, output_file, animations = None, compact = False):
+        #Writes to_json(animations) to a .json, or to a container if output_file ends in container_extension
+        if animations == None:
+            animations = range(len(self))
+        #Unknown names fail before anything is written
+        selected = [self.index(animation) for animation in animations]
+        if is_container_path(output_file):
+            write_output(output_file, True, lambda f: write_container(f, self.head(), (self.animation(i) for i in selected)))
+            return
+
+        def json_animations():
+            for anim_index in selected:
+                anim = self.animation(anim_index)
+                if self.keyframe_arrays:
+                    #Lists for json, without touching the cached arrays
+                    anim = keyframeArraysToLists({"Animations" : [copy.deepcopy(anim)]})["Animations"][0]
+                yield anim
+        write_output(output_file, False, lambda f: write_json(f, self.head(), json_animations(), compact))
+
+def headerTables(json_data, structs):
+    #(count, record) of every table the nCSC header points to, in file order
+    amount_of_elements = 0
+    for group in json_data["Element Banks"]:
+        amount_of_elements += len(group)
+    num_anims = len(json_data["Animations"])
+    return [(len(json_data["Unk. Patterns"]), structs.float_pair),
+            (len(json_data["Sprite Crops"]), structs.crop),
+            (len(json_data["Element Banks"]), structs.bank_entry),
+            (amount_of_elements, structs.name_entry),
+            (num_anims, structs.count_pointer),
+            (num_anims, structs.pointer_index),
+            (num_anims, structs.float_pair)]
+
+def elementNameOrder(element_banks):
+    #(bank, index) of each element in the order of the element name table
+    #does name order matter?
+    if "Name Index" in element_banks[0][0].keys():
+        name_index = True
+    else:
+        name_index = False
+    temp_name_order = {}
+    bank_index = 0
+    if name_index:
+        for bank in element_banks:
+            element_index = 0
+            for element in bank:
+                temp_name_order[element["Name Index"]] = (bank_index,element_index)
+                element_index+= 1
+            bank_index += 1
+    #order doesn't matter, who cares
+    else:
+        cnt = 0
+        for bank in element_banks:
+            element_index = 0
+            for element in bank:
+                temp_name_order[cnt] = (bank_index,element_index)
+                element_index+= 1
+                cnt += 1
+            bank_index += 1
+    return [temp_name_order[i] for i in range(sum(len(bank) for bank in element_banks))]
+
+#Json to anim
+def encode(json_data, platform = None, debug = False, profiler = None, pool_strings = False):
+    #pool_strings writes every distinct name once, the element and animation name tables point the repeats at that copy.
+    #The bytes and names that saves go in the "string pool" phase
+    ctx = AnimContext(platform, debug = debug)
+    log = ctx.log
+    if profiler == None:
+        profiler = Profiler()
+    clock = time.perf_counter
+    mobile_flag = ctx.mobile_flag
+
+    log("starting conversion to anim")
+    ctx.endianness = endianness = json_data["Misc. Info"]["Byte Order"]
+    log("Byte Order: " + str(endianness))
+    writer = AnimWriter(endianness, ctx.ds_flag, mobile_flag)
+    pack = writer.pack
+    pack_pointers = writer.pack_pointers
+    floats = writer.floats
+    fixed = writer.fixed
+    count_pointer = writer.count_pointer
+    header = writer.header
+    #data_offset is where the next section goes. weird_pointer is the same thing counted with 4 byte pointers,
+    #which is what the outer header wants even on mobile
+    data_offset = 8 + header.size
+    weird_pointer = 8 + header.size_32
+    pointer_list = writer.pointer_list #Will be used later
+
+    def lap(phase, start, items):
+        #Adds the time and bytes written since start to the phase
+        now = clock()
+        profiler.add("encode", phase, now - start[0], writer.tell() - start[1], items)
+        return (now, writer.tell())
+    phase_start = (clock(), 0)
+
+    #Mostly header for now -
+    #Each table in the header points right after the previous one
+    amount_of_elements = 0
+    for group in json_data["Element Banks"]:
+        amount_of_elements += len(group)
+    header_tables = headerTables(json_data, writer)
+    table_offsets = []
+    for count, record in header_tables:
+        table_offsets.append(data_offset)
+        data_offset += count*record.size
+        weird_pointer += count*record.size_32
+
+    #Aspect Ratio
+    aspect_ratio = int(json_data["Misc. Info"]["Aspect Ratio"].split("/")[0]) / int(json_data["Misc. Info"]["Aspect Ratio"].split("/")[1])
+
+    writer.write(bytes("nCSC", 'UTF-8')) #Write nCSC magic
+    writer.write(bytes(4)) #For now let's skip this spot as it's the length of the data.
+    #Mostly unknown floats that don't seem to have any effect when changed, so i'll keep the common values among files
+    pack_pointers(header, 16, 0, 2, fixed(0), fixed(60), fixed(0), fixed(60),
+                  header_tables[0][0], table_offsets[0],     #UnknownPatterns
+                  header_tables[1][0], table_offsets[1],     #SpriteCrops
+                  header_tables[2][0], table_offsets[2],     #Element Banks
+                  header_tables[3][0], table_offsets[3],     #Element names
+                  header_tables[4][0], table_offsets[4],     #Animations
+                  table_offsets[5], fixed(aspect_ratio), table_offsets[6])  #Animation names, aspect ratio, animation lengths
+    ##HEADER DONE!!
+
+    #Unk patterns
+    for unk_pattern in json_data["Unk. Patterns"]:
+        pack(writer.float_pair, fixed(unk_pattern[0]), fixed(unk_pattern[1]))
+
+    #Sprite Crops
+    for crop in json_data["Sprite Crops"]:
+        pack(writer.crop, crop["texture"], *floats((crop["top_left_X"], crop["top_left_Y"], crop["bottom_right_X"], crop["bottom_right_Y"])))
+    phase_start = lap("header", phase_start, 1)
+
+    #Element bank pointers D:
+    for bank in json_data["Element Banks"]:
+        elem_list_pointer = data_offset
+        #Account for each element pointer in bank
+        data_offset += len(bank)*writer.pointer_value.size
+        weird_pointer += len(bank)*writer.pointer_value.size_32
+
+        #Unknown 0 value between the two element pointers (?)
+        pack_pointers(writer.bank_entry, len(bank), elem_list_pointer, 0, data_offset)
+        #I need to account for each element in the bank for it's hierarchy...
+        data_offset += len(bank)*writer.int_pair.size #account for 2 values per element for hierarchy.
+        weird_pointer += len(bank)*writer.int_pair.size_32
+
+    # Element Name pointers
+    temp_name_order = elementNameOrder(json_data["Element Banks"])
+    #log(temp_name_order)
+
+    #Element name pointers here
+    name_pool = {}          #name -> where its copy is, when pooling
+    element_names = []      #names written, in order
+    pooled_bytes = 0
+    pooled_names = 0
+    for i in range(amount_of_elements):
+        bank = temp_name_order[i][0]
+        index = temp_name_order[i][1]
+        name = json_data["Element Banks"][bank][index]["Name"]
+        name_length = len(padString(name, 4))
+        if pool_strings and name in name_pool:
+            pack_pointers(writer.name_entry, name_pool[name], bank, index)
+            pooled_bytes += name_length
+            pooled_names += 1
+            continue
+        name_pool[name] = data_offset
+        element_names.append(name)
+        pack_pointers(writer.name_entry, data_offset, bank, index)
+        data_offset+= name_length
+        weird_pointer += name_length
+
+    #Animation pointers
+    for anim in json_data["Animations"]:
+        number_of_groups = len(anim["Element Banks"])
+        pack_pointers(count_pointer, number_of_groups, data_offset)
+        #account for animation pointers
+        data_offset += number_of_groups*count_pointer.size
+        weird_pointer += number_of_groups*count_pointer.size_32
+
+    #Animation name pointers
+    anim_names = []
+    for anim_index, anim in enumerate(json_data["Animations"]):
+        name_length = len(padString(anim["Name"], 4))
+        if pool_strings and anim["Name"] in name_pool:
+            #(the copy can be an element's name too)
+            pack_pointers(writer.pointer_index, name_pool[anim["Name"]], anim_index)
+            pooled_bytes += name_length
+            pooled_names += 1
+            continue
+        name_pool[anim["Name"]] = data_offset
+        anim_names.append(anim["Name"])
+        pack_pointers(writer.pointer_index, data_offset, anim_index)
+        data_offset += name_length
+        weird_pointer += name_length
+
+    #Animation lengths
+    for anim in json_data["Animations"]:
+        pack(writer.float_pair, fixed(anim["Length Range"][0]), fixed(anim["Length Range"][1]))
+
+    #Element pointers + hierarchy
+    for bank in json_data["Element Banks"]:
+        for element in bank:
+            pack_pointers(writer.pointer_value, data_offset)
+            #account for element length.
+            data_offset += writer.element.size
+            weird_pointer += writer.element.size_32
+        edge_list = getEdgeList([element["Parent"] for element in bank])
+        for i in edge_list:
+            pack(writer.int_pair, i[0], i[1])
+
+    #NAMES
+    for name in element_names:
+        writer.write(bytes(padString(name), "shift-jis").replace(b' ', b'\x00'))
+
+    #Element bank Pointers for animations
+    for anim in json_data["Animations"]:
+        for bank in anim["Element Banks"]:
+            num_of_elems = len(bank)
+            pack_pointers(count_pointer, num_of_elems, data_offset)
+            #account for a pointer for each element's motion + pointer
+            data_offset+= num_of_elems*count_pointer.size
+            weird_pointer += num_of_elems*count_pointer.size_32
+
+    #Animation names
+    for name in anim_names:
+        writer.write(bytes(padString(name), "shift-jis").replace(b' ', b'\x00'))
+    phase_start = lap("pointer tables", phase_start, len(pointer_list))
+    if pool_strings:
+        profiler.add("encode", "string pool", 0.0, pooled_bytes, pooled_names)
+
+    #Elements!!!
+    for bank in json_data["Element Banks"]:
+        for element in bank:
+            num_sprites = len(element["Sprite List"])
+            pack_pointers(writer.element,
+                          element["Unknown Flag 0"], element["Render Flag"], element["Unknown Flag 1"],
+                          *floats(element["2D Polygon"]),
+                          element["Unknown Values"][0], data_offset+num_sprites*4, element["Unknown Values"][1],
+                          *writer.render_method(element["Render Settings"]),
+                          num_sprites, data_offset, element["Unknown Values"][2],
+                          0, 0) #???
+            weird_pointer += writer.settings.size_32
+            data_offset+= writer.settings.size
+            weird_pointer += num_sprites*4
+            data_offset+= num_sprites*4
+    phase_start = lap("elements", phase_start, amount_of_elements)
+
+    #Motion + offset
+    motion_records = 0
+    for anim in json_data["Animations"]:
+        for bank in anim["Element Banks"]:
+            for element in bank:
+                motion_int = 0
+                for motion in element["Animations"]:
+                    motion_int += int(motion_names[motion["Motion"]])
+
+                motion_records += 1
+                if len(element["Animations"]) != 0:
+                    pack_pointers(count_pointer, motion_int, data_offset)
+                    data_offset+= len(element["Animations"])*writer.keyframe_list_entry.size
+                    weird_pointer += len(element["Animations"])*writer.keyframe_list_entry.size_32
+                else:
+                    pack(count_pointer, motion_int, 0)
+    phase_start = lap("motions", phase_start, motion_records)
+
+    #Element sprite list + settings
+    writer.sprite_settings([element for bank in json_data["Element Banks"] for element in bank])
+    phase_start = lap("elements", phase_start, 0)
+
+    #I would like to set the correct order of the motions first before moving on
+    #(sorted copies, the caller's json shouldn't change under them)
+    sorted_motions = []
+    for anim in json_data["Animations"]:
+        for bank in anim["Element Banks"]:
+            for element in bank:
+                sorted_motions.append(sorted(element["Animations"], key=sortMotion))
+
+    #Keyframes pointers!!
+    motion_records = 0
+    num_keyframes = 0
+    for element_motions in sorted_motions:
+        for motion in element_motions:
+            pack_pointers(writer.keyframe_list_entry, motion["Loop"], len(motion["Keyframes"]), data_offset)
+            data_offset += len(motion["Keyframes"])*writer.keyframe_float.size
+            weird_pointer += len(motion["Keyframes"])*writer.keyframe_float.size_32
+            motion_records += 1
+            num_keyframes += len(motion["Keyframes"])
+    phase_start = lap("motions", phase_start, motion_records)
+
+    #keyframes themselves and i'm basically done
+    writer.keyframes([(encodeDataType(motion["Motion"]), motion["Keyframes"]) for element_motions in sorted_motions for motion in element_motions])
+    phase_start = lap("keyframes", phase_start, num_keyframes)
+
+    #Same as writer.finish(), in two parts for the profiler
+    nof0_values = writer.nof0(pointer_list, weird_pointer)
+    phase_start = lap("NOF0", phase_start, len(pointer_list))
+
+    #Outer header goes in front of everything (the phase also counts copying the buffer out into bytes)
+    writer.outer_header(bytes(json_data["Misc. Info"]["Header Magic"], 'UTF-8'), 1, *nof0_values)
+    log("Pointer List:")
+    log(pointer_list)
+    anim_data = bytes(writer.buffer)
+    profiler.add("encode", "final header rewrite", clock() - phase_start[0], 32, 1)
+    return anim_data
+
+########## Incremental encode #########
+
+def encodeRegions(json_data, structs):
+    #The layout encode() gives json_data, as (key, size, size counted with 4 byte pointers, number of pointers) in file order.
+    #Every animation and element has its own regions (its keyframes, motion records, name, settings...),
+    #"head" is the nCSC header and the tables it points to
+    s = structs
+    element_banks = json_data["Element Banks"]
+    anims = json_data["Animations"]
+    elements = [(bank_index, element_index) for bank_index, bank in enumerate(element_banks) for element_index in range(len(bank))]
+    head = [8 + s.header.size, 8 + s.header.size_32, len(s.header.pointers)]
+    for count, record in headerTables(json_data, s):
+        head[0] += count*record.size
+        head[1] += count*record.size_32
+        head[2] += count*len(record.pointers)
+    regions = [("head", head[0], head[1], head[2])]
+    for bank_index, bank in enumerate(element_banks):
+        regions.append((("bank", bank_index), len(bank)*(s.pointer_value.size + s.int_pair.size), len(bank)*(s.pointer_value.size_32 + s.int_pair.size_32), len(bank)))
+    for key in elementNameOrder(element_banks):
+        name_length = len(padString(element_banks[key[0]][key[1]]["Name"]))
+        regions.append((("element_name", key), name_length, name_length, 0))
+    #(banks, elements, elements with motions, motions, keyframes) of each animation
+    anim_counts = []
+    for anim in anims:
+        counts = [len(anim["Element Banks"]), 0, 0, 0, 0]
+        for bank in anim["Element Banks"]:
+            counts[1] += len(bank)
+            for element in bank:
+                if len(element["Animations"]) != 0:
+                    counts[2] += 1
+                    counts[3] += len(element["Animations"])
+                    for motion in element["Animations"]:
+                        counts[4] += len(motion["Keyframes"])
+        anim_counts.append(counts)
+    for anim_index, counts in enumerate(anim_counts):
+        regions.append((("anim_banks", anim_index), counts[0]*s.count_pointer.size, counts[0]*s.count_pointer.size_32, counts[0]))
+    for anim_index, anim in enumerate(anims):
+        name_length = len(padString(anim["Name"]))
+        regions.append((("anim_name", anim_index), name_length, name_length, 0))
+    for key in elements:
+        regions.append((("element", key), s.element.size, s.element.size_32, len(s.element.pointers)))
+    for anim_index, counts in enumerate(anim_counts):
+        regions.append((("motions", anim_index), counts[1]*s.count_pointer.size, counts[1]*s.count_pointer.size_32, counts[2]))
+    for key in elements:
+        size = len(element_banks[key[0]][key[1]]["Sprite List"])*4 + s.settings.size
+        regions.append((("sprite_settings", key), size, size, 0))
+    for anim_index, counts in enumerate(anim_counts):
+        regions.append((("keyframe_lists", anim_index), counts[3]*s.keyframe_list_entry.size, counts[3]*s.keyframe_list_entry.size_32, counts[3]))
+    for anim_index, counts in enumerate(anim_counts):
+        regions.append((("keyframes", anim_index), counts[4]*s.keyframe_float.size, counts[4]*s.keyframe_float.size_32, 0))
+    return regions
+
+def sameAnimation(old_anim, new_anim):
+    if old_anim["Name"] != new_anim["Name"] or list(old_anim["Length Range"]) != list(new_anim["Length Range"]):
+        return False
+    if [len(bank) for bank in old_anim["Element Banks"]] != [len(bank) for bank in new_anim["Element Banks"]]:
+        return False
+    for old_bank, new_bank in zip(old_anim["Element Banks"], new_anim["Element Banks"]):
+        for old_element, new_element in zip(old_bank, new_bank):
+            if len(old_element["Animations"]) != len(new_element["Animations"]):
+                return False
+            for old_motion, new_motion in zip(old_element["Animations"], new_element["Animations"]):
+                if old_motion["Motion"] != new_motion["Motion"] or old_motion["Loop"] != new_motion["Loop"]:
+                    return False
+                old_keyframes = old_motion["Keyframes"]
+                new_keyframes = new_motion["Keyframes"]
+                if len(old_keyframes) != len(new_keyframes):
+                    return False
+                if type(old_keyframes) == list and type(new_keyframes) == list:
+                    if old_keyframes != new_keyframes:
+                        return False
+                #keyframe arrays don't compare with ==
+                elif keyframesToList(old_keyframes) != keyframesToList(new_keyframes):
+                    return False
+    return True
+
+#Digests of the last files incremental_encode() wrote. Those are known to be what encode() makes of their json,
+#so when an edit loop passes one back in the old file doesn't have to be checked again
+incremental_outputs = []
+
+def incremental_encode(old_anim_data, json_data, platform = None, old_json = None, debug = False, profiler = None):
+    #Same result as encode(json_data), but only the animations and elements that differ from old_json get encoded.
+    #Everything else is copied out of old_anim_data, with its pointers moved using the old NOF0 list.
+    #old_anim_data has to be what encode() wrote for old_json, the previous output of an edit loop for example.
+    #That's checked before anything is copied, any other file (one from the game) gets a full encode.
+    #If old_json isn't given it's decoded from old_anim_data, which takes about as long as encoding.
+    #When the header tables change (crops, number of elements or animations, name order...) it's a full encode
+    ctx = AnimContext(platform, debug = debug)
+    log = ctx.log
+    if profiler == None:
+        profiler = Profiler()
+    clock = time.perf_counter
+    phase_start = clock()
+
+    def full_encode(reason):
+        log("full encode: " + reason)
+        return encode(json_data, platform, debug, profiler)
+
+    element_banks = json_data["Element Banks"]
+    anims = json_data["Animations"]
+    if old_json == None:
+        name_order = len(element_banks) != 0 and len(element_banks[0]) != 0 and "Name Index" in element_banks[0][0]
+        try:
+            old_json = decode(old_anim_data, platform, name_order)
+        except Exception:
+            #Whatever is wrong with it, a full encode doesn't need it
+            return full_encode("the old file can't be decoded")
+    old_banks = old_json["Element Banks"]
+    old_anims = old_json["Animations"]
+
+    #(the screen size is only there for people to read)
+    misc_keys = ("Header Magic", "Aspect Ratio", "Byte Order")
+    if ([old_json["Misc. Info"][key] for key in misc_keys] != [json_data["Misc. Info"][key] for key in misc_keys] or [list(pattern) for pattern in old_json["Unk. Patterns"]] != [list(pattern) for pattern in json_data["Unk. Patterns"]]
+            or old_json["Sprite Crops"] != json_data["Sprite Crops"] or [len(bank) for bank in old_banks] != [len(bank) for bank in element_banks]
+            or len(old_anims) != len(anims) or elementNameOrder(old_banks) != elementNameOrder(element_banks)):
+        return full_encode("the header tables changed")
+    #encode() counts name lengths in characters, which only matches the file for ascii names
+    for names in ([element["Name"] for bank in old_banks + element_banks for element in bank], [anim["Name"] for anim in old_anims + anims]):
+        for name in names:
+            if len(name.encode("shift-jis")) != len(name):
+                return full_encode("non ascii names")
+
+    endianness = json_data["Misc. Info"]["Byte Order"]
+    writer = AnimWriter(endianness, ctx.ds_flag, ctx.mobile_flag)
+    old_regions = encodeRegions(old_json, writer)
+    new_regions = encodeRegions(json_data, writer)
+
+    #The old file has to be laid out the way encode() would have done it
+    file_header = writer.file_header.unpack_from(old_anim_data, 8)
+    nof0_offset = file_header[3]
+    old_data_end = struct.unpack_from("<i", old_anim_data, 36)[0] + 8
+    num_pointers = writer.int_pair.unpack_from(old_anim_data, nof0_offset + 8)[0]
+    if old_data_end != sum(region[1] for region in old_regions) or num_pointers != sum(region[3] for region in old_regions):
+        return full_encode("the old file doesn't match the old json")
+    old_pointers = struct.unpack_from(endianness + str(num_pointers) + "i", old_anim_data, nof0_offset + 16)
+
+    #What changed
+    changed = set(["head"])
+    for anim_index in range(len(anims)):
+        if not sameAnimation(old_anims[anim_index], anims[anim_index]):
+            for kind in ("anim_banks", "anim_name", "motions", "keyframe_lists", "keyframes"):
+                changed.add((kind, anim_index))
+    for bank_index, bank in enumerate(element_banks):
+        for element_index, element in enumerate(bank):
+            if element != old_banks[bank_index][element_index]:
+                key = (bank_index, element_index)
+                changed.update([("element", key), ("sprite_settings", key), ("element_name", key), ("bank", bank_index)])
+    log("changed regions: " + str(len(changed)) + " of " + str(len(new_regions)))
+
+    old_starts = []
+    old_start = {}
+    position = 0
+    for key, size, size_32, count in old_regions:
+        old_starts.append(position)
+        old_start[key] = position
+        position += size
+    new_start = {}
+    new_size = {}
+    position = 0
+    weird_pointer = 0
+    for key, size, size_32, count in new_regions:
+        new_start[key] = position
+        new_size[key] = size
+        position += size
+        weird_pointer += size_32
+    data_end = position
+    now = clock()
+    profiler.add("incremental", "compare", now - phase_start, 0, len(changed))
+    phase_start = now
+
+    #Regions that changed are encoded again, at their new offsets
+    buffer = bytearray(32 + data_end)
+    pointer_list = []
+    fixed = writer.fixed
+    count_pointer = writer.count_pointer
+
+    def take():
+        #The region the writer just encoded and its pointers, leaving the writer empty for the next one
+        data = writer.buffer[32:]
+        pointers = writer.pointer_list
+        writer.buffer = bytearray(32)
+        writer.pointer_list = []
+        return (data, pointers)
+
+    def place(key):
+        data, pointers = take()
+        start = new_start[key]
+        if len(data) != new_size[key]:
+            raise AssertionError("region " + str(key) + " came out the wrong size")
+        buffer[32 + start:32 + start + len(data)] = data
+        pointer_list.extend(pointer + start for pointer in pointers)
+
+    def encode_region(key, json_data, start):
+        #Encodes one region of json_data the way encode() does, start being where each region goes
+        element_banks = json_data["Element Banks"]
+        anims = json_data["Animations"]
+        kind, index = (key, None) if key == "head" else key
+        if kind == "head":
+            header_tables = headerTables(json_data, writer)
+            table_offsets = []
+            offset = 8 + writer.header.size
+            for table_count, record in header_tables:
+                table_offsets.append(offset)
+                offset += table_count*record.size
+            aspect_ratio = int(json_data["Misc. Info"]["Aspect Ratio"].split("/")[0]) / int(json_data["Misc. Info"]["Aspect Ratio"].split("/")[1])
+            writer.write(bytes("nCSC", 'UTF-8'))
+            writer.write(bytes(4))
+            writer.pack_pointers(writer.header, 16, 0, 2, fixed(0), fixed(60), fixed(0), fixed(60),
+                                 header_tables[0][0], table_offsets[0], header_tables[1][0], table_offsets[1],
+                                 header_tables[2][0], table_offsets[2], header_tables[3][0], table_offsets[3],
+                                 header_tables[4][0], table_offsets[4], table_offsets[5], fixed(aspect_ratio), table_offsets[6])
+            for unk_pattern in json_data["Unk. Patterns"]:
+                writer.pack(writer.float_pair, fixed(unk_pattern[0]), fixed(unk_pattern[1]))
+            for crop in json_data["Sprite Crops"]:
+                writer.pack(writer.crop, crop["texture"], *writer.floats((crop["top_left_X"], crop["top_left_Y"], crop["bottom_right_X"], crop["bottom_right_Y"])))
+            for bank_index, bank in enumerate(element_banks):
+                bank_start = start[("bank", bank_index)]
+                writer.pack_pointers(writer.bank_entry, len(bank), bank_start, 0, bank_start + len(bank)*writer.pointer_value.size)
+            for name_key in elementNameOrder(element_banks):
+                writer.pack_pointers(writer.name_entry, start[("element_name", name_key)], name_key[0], name_key[1])
+            for anim_index, anim in enumerate(anims):
+                writer.pack_pointers(count_pointer, len(anim["Element Banks"]), start[("anim_banks", anim_index)])
+            for anim_index, anim in enumerate(anims):
+                writer.pack_pointers(writer.pointer_index, start[("anim_name", anim_index)], anim_index)
+            for anim in anims:
+                writer.pack(writer.float_pair, fixed(anim["Length Range"][0]), fixed(anim["Length Range"][1]))
+        elif kind == "bank":
+            bank = element_banks[index]
+            for element_index in range(len(bank)):
+                writer.pack_pointers(writer.pointer_value, start[("element", (index, element_index))])
+            for first_child, next_sibling in getEdgeList([element["Parent"] for element in bank]):
+                writer.pack(writer.int_pair, first_child, next_sibling)
+        elif kind == "element_name":
+            writer.write(bytes(padString(element_banks[index[0]][index[1]]["Name"]), "shift-jis").replace(b' ', b'\x00'))
+        elif kind == "anim_name":
+            writer.write(bytes(padString(anims[index]["Name"]), "shift-jis").replace(b' ', b'\x00'))
+        elif kind == "element":
+            element = element_banks[index[0]][index[1]]
+            sprites_start = start[("sprite_settings", index)]
+            num_sprites = len(element["Sprite List"])
+            writer.pack_pointers(writer.element,
+                                 element["Unknown Flag 0"], element["Render Flag"], element["Unknown Flag 1"],
+                                 *writer.floats(element["2D Polygon"]),
+                                 element["Unknown Values"][0], sprites_start + num_sprites*4, element["Unknown Values"][1],
+                                 *writer.render_method(element["Render Settings"]),
+                                 num_sprites, sprites_start, element["Unknown Values"][2],
+                                 0, 0)
+        elif kind == "sprite_settings":
+            writer.sprite_settings([element_banks[index[0]][index[1]]])
+        elif kind == "anim_banks":
+            motions_start = start[("motions", index)]
+            for bank in anims[index]["Element Banks"]:
+                writer.pack_pointers(count_pointer, len(bank), motions_start)
+                motions_start += len(bank)*count_pointer.size
+        elif kind == "motions":
+            keyframe_lists_start = start[("keyframe_lists", index)]
+            for bank in anims[index]["Element Banks"]:
+                for element in bank:
+                    motion_int = 0
+                    for motion in element["Animations"]:
+                        motion_int += int(motion_names[motion["Motion"]])
+                    if len(element["Animations"]) != 0:
+                        writer.pack_pointers(count_pointer, motion_int, keyframe_lists_start)
+                        keyframe_lists_start += len(element["Animations"])*writer.keyframe_list_entry.size
+                    else:
+                        writer.pack(count_pointer, motion_int, 0)
+        elif kind == "keyframe_lists":
+            keyframes_start = start[("keyframes", index)]
+            for bank in anims[index]["Element Banks"]:
+                for element in bank:
+                    for motion in sorted(element["Animations"], key=sortMotion):
+                        writer.pack_pointers(writer.keyframe_list_entry, motion["Loop"], len(motion["Keyframes"]), keyframes_start)
+                        keyframes_start += len(motion["Keyframes"])*writer.keyframe_float.size
+        elif kind == "keyframes":
+            writer.keyframes([(encodeDataType(motion["Motion"]), motion["Keyframes"]) for bank in anims[index]["Element Banks"]
+                              for element in bank for motion in sorted(element["Animations"], key=sortMotion)])
+
+    #Only a file laid out exactly like encode() does it can be copied from. Decoding drops some of what's in a file
+    #(the elements' unknown pointers, bytes after a name's terminator, which region a pointer goes to...),
+    #so every region that will be copied is encoded again from old_json and has to come out the same.
+    #Keyframes and default settings are left out, they're decoded in full, have no pointers and are most of the file.
+    #Files this wrote itself are skipped, see incremental_outputs
+    file_key = (ctx.ds_flag, ctx.mobile_flag, hashlib.sha256(old_anim_data).digest())
+    if file_key not in incremental_outputs:
+        expected_pointers = []
+        for key, size, size_32, count in old_regions:
+            if key in changed or key[0] in ("keyframes", "sprite_settings"):
+                continue
+            encode_region(key, old_json, old_start)
+            data, pointers = take()
+            if data != bytes(old_anim_data[32 + old_start[key]:32 + old_start[key] + size]):
+                return full_encode("the old file isn't what encode() makes of the old json at " + str(key))
+            expected_pointers.extend(pointer + old_start[key] for pointer in pointers)
+        old_keys = [region[0] for region in old_regions]
+        copied_pointers = [location for location in old_pointers if old_keys[bisect.bisect_right(old_starts, location) - 1] not in changed]
+        if sorted(copied_pointers) != sorted(expected_pointers):
+            return full_encode("the old file's NOF0 list isn't what encode() makes of the old json")
+    now = clock()
+    profiler.add("incremental", "check old file", now - phase_start, 0, len(old_regions) - len(changed))
+    phase_start = now
+
+    for key, size, size_32, count in new_regions:
+        if key in changed:
+            encode_region(key, json_data, new_start)
+            place(key)
+    now = clock()
+    profiler.add("incremental", "encode changes", now - phase_start, 0, len(changed))
+    phase_start = now
+
+    #The rest is copied, its pointers are moved by how much their region and the region they point into moved.
+    #A region that points into another one always belongs to the same animation or element, so both are either
+    #copied or encoded again. Which region that is goes by the one holding the pointer, not by where it points:
+    #a motion without keyframes points at the end of its animation's keyframes, which is also where the next
+    #animations' keyframes start, and those can be empty in the old file but not in the new one.
+    #Element lists are the only pointers with more than one region to go to, elements are never empty so looking them up is fine
+    pointer_targets = {"anim_banks" : "motions", "motions" : "keyframe_lists", "keyframe_lists" : "keyframes", "element" : "sprite_settings"}
+    deltas = []
+    moved = []
+    #how much the region each region points into moved, None where it has to be looked up
+    targets = []
+    for key, size, size_32, count in old_regions:
+        deltas.append(new_start[key] - old_start[key])
+        moved.append(key not in changed)
+        if key not in changed:
+            buffer[32 + new_start[key]:32 + new_start[key] + size] = old_anim_data[32 + old_start[key]:32 + old_start[key] + size]
+        if key != "head" and key[0] in pointer_targets:
+            target = (pointer_targets[key[0]], key[1])
+            targets.append(new_start[target] - old_start[target])
+        else:
+            targets.append(None)
+    pointer_format = endianness + ("q" if ctx.mobile_flag else "i")
+    pointer_size = struct.calcsize(pointer_format)
+    if numpy != None:
+        locations = numpy.array(old_pointers, "i8")
+        deltas = numpy.array(deltas, "i8")
+        regions = numpy.searchsorted(old_starts, locations, "right") - 1
+        locations = locations[numpy.array(moved)[regions]]
+        regions = regions[numpy.array(moved)[regions]]
+        byte_offsets = numpy.arange(pointer_size)
+        old_bytes = numpy.frombuffer(old_anim_data, "u1")
+        values = old_bytes[locations[:, None] + 32 + byte_offsets].copy().view(pointer_format[0] + "i" + str(pointer_size)).ravel()
+        target_deltas = numpy.array([0 if delta == None else delta for delta in targets], "i8")[regions]
+        looked_up = numpy.array([delta == None for delta in targets])[regions]
+        target_deltas[looked_up] = deltas[numpy.searchsorted(old_starts, values[looked_up], "right") - 1]
+        values += target_deltas
+        locations += deltas[regions]
+        new_bytes = numpy.frombuffer(buffer, "u1")
+        new_bytes[locations[:, None] + 32 + byte_offsets] = values.astype(pointer_format[0] + "i" + str(pointer_size)).view("u1").reshape(-1, pointer_size)
+        del new_bytes #the buffer can't grow while numpy has a view of it
+        pointer_list = sorted(pointer_list + locations.tolist())
+    else:
+        for location in old_pointers:
+            region = bisect.bisect_right(old_starts, location) - 1
+            if not moved[region]:
+                continue
+            value = struct.unpack_from(pointer_format, old_anim_data, 32 + location)[0]
+            if targets[region] == None:
+                value += deltas[bisect.bisect_right(old_starts, value) - 1]
+            else:
+                value += targets[region]
+            location += deltas[region]
+            struct.pack_into(pointer_format, buffer, 32 + location, value)
+            pointer_list.append(location)
+        pointer_list.sort()
+    now = clock()
+    profiler.add("incremental", "relocate", now - phase_start, data_end, len(pointer_list))
+    phase_start = now
+
+    writer.buffer = buffer
+    writer.finish(pointer_list, weird_pointer, bytes(json_data["Misc. Info"]["Header Magic"], 'UTF-8'))
+    anim_data = bytes(writer.buffer)
+    incremental_outputs.append((ctx.ds_flag, ctx.mobile_flag, hashlib.sha256(anim_data).digest()))
+    del incremental_outputs[:-8]
+    profiler.add("incremental", "NOF0", clock() - phase_start, len(pointer_list)*4 + 12, len(pointer_list))
+    return anim_data
+
+########## Transcoding #########
+
+#(indexes of the float values, of the pointer values, of the first of every 4 bytes) among the values of a record, by its fields
+transcode_plans = {}
+#numpy dtype with one field per value of a record, by its format
+transcode_dtypes = {}
+
+def transcodePlan(fields):
+    if fields not in transcode_plans:
+        floats = []
+        pointers = []
+        byte_groups = []
+        index = 0
+        for name, field in fields:
+            count = int(field[:-1]) if len(field) > 1 else 1
+            field_type = field[-1]
+            if field_type == "f":
+                floats += range(index, index + count)
+            elif field_type == "p":
+                pointers += range(index, index + count)
+            elif field_type == "B":
+                byte_groups += range(index, index + count, 4)
+            index += count
+        transcode_plans[fields] = (floats, pointers, byte_groups)
+    return transcode_plans[fields]
+
+def transcodeDtype(record):
+    if record.format not in transcode_dtypes:
+        e = record.format[0]
+        codes = {"i" : e + "i4", "f" : e + "f4", "B" : "u1", "q" : e + "i8"}
+        transcode_dtypes[record.format] = numpy.dtype([("v" + str(i), codes[code]) for i, code in enumerate(record.format[1:])])
+    return transcode_dtypes[record.format]
+
+def fixedToFloat(number):
+    return number/2 **12
+
+def transcodeSections(anim_file_data, s):
+    #Every table and record of the nCSC block, found by following the pointers the way decode() does, as {offset : (record, count)}.
+    #Only what's needed to get there gets read. Keyframes are laid out the way encode() writes them for their motion
+    sections = {}
+    def add(offset, record, count):
+        if count <= 0:
+            return
+        if sections.get(offset, (record, count)) != (record, count):
+            raise InvalidAnimationError("two different sections at " + hex(offset + 32))
+        sections[offset] = (record, count)
+    def records(record, offset, count):
+        view = memoryview(anim_file_data)[offset + 32:offset + 32 + record.size*max(count, 0)]
+        return record.iter_unpack(view)
+
+    add(8, s.header, 1)
+    header = s.header.unpack_from(anim_file_data, 40)[7:]
+    table_counts = (header[0], header[2], header[4], header[6], header[8], header[8], header[8])
+    table_offsets = (header[1], header[3], header[5], header[7], header[9], header[10], header[12])
+    tables = headerTables({"Unk. Patterns" : [], "Sprite Crops" : [], "Element Banks" : [], "Animations" : []}, s)
+    for count, offset, (zero, record) in zip(table_counts, table_offsets, tables):
+        add(offset, record, count)
+
+    for num_elements, elements, unknown, hierarchy in records(s.bank_entry, table_offsets[2], table_counts[2]):
+        add(elements, s.pointer_value, num_elements)
+        add(hierarchy, s.int_pair, num_elements)
+        for element, in records(s.pointer_value, elements, num_elements):
+            add(element, s.element, 1)
+            values = s.element.unpack_from(anim_file_data, element + 32)
+            add(values[12], s.settings, 1)
+            add(values[19], s.int_value, values[18])
+
+    for num_banks, banks in records(s.count_pointer, table_offsets[4], table_counts[4]):
+        add(banks, s.count_pointer, num_banks)
+        for num_elements, motion_records in records(s.count_pointer, banks, num_banks):
+            add(motion_records, s.count_pointer, num_elements)
+            for motion_int, keyframe_lists in records(s.count_pointer, motion_records, num_elements):
+                if motion_int == 0:
+                    continue
+                motions = get_powers(motion_int)
+                add(keyframe_lists, s.keyframe_list_entry, len(motions))
+                for motion, (loop, num_keyframes, keyframes) in zip(motions, records(s.keyframe_list_entry, keyframe_lists, len(motions))):
+                    add(keyframes, s.keyframe_structs[encodeDataType(motion_names[motion])], num_keyframes)
+    return sections
+
+def transcodeArray(anim_file_data, offset, count, record, new_record, convert, swap_bytes):
+    #count records without pointers at offset, converted a column at a time with numpy. Same result as one at a time
+    floats, pointers, byte_groups = transcodePlan(record.fields)
+    old = numpy.frombuffer(anim_file_data, transcodeDtype(record), count, offset)
+    new = numpy.empty(count, transcodeDtype(new_record))
+    columns = list(old.dtype.names)
+    if swap_bytes:
+        for i in byte_groups:
+            columns[i:i + 4] = columns[i:i + 4][::-1]
+    floats = set(floats)
+    for i, name in enumerate(new.dtype.names):
+        values = old[columns[i]]
+        if convert == floatToFixed and i in floats:
+            values = floatsToFixed(values)
+        elif convert == fixedToFloat and i in floats:
+            values = values / 2 **12
+        new[name] = values
+    return new.tobytes()
+
+def transcode(anim_file_data, platform = None, byte_order = None, source_platform = "auto"):
+    #Rewrites an animation file for another platform and / or byte order straight from the binary, no json in between.
+    #Every table and record is repacked in the new format (20.12 fixed point or float, 4 or 8 byte pointers, byte order),
+    #the names and whatever else is between them are copied as they are, then the pointers are moved to where things ended up
+    #and NOF0 is written again. byte_order None keeps the file's. Floats are only rounded when they go to or from fixed point.
+    info = probe(anim_file_data)
+    if source_platform == "auto":
+        source_platform = info["platform"]
+    if byte_order == None:
+        byte_order = info["byte_order"]
+    if byte_order not in ("<", ">"):
+        raise ValueError("Unknown byte order " + repr(byte_order) + ", expected '<' or '>'")
+    source = AnimContext(source_platform)
+    target = AnimContext(platform)
+    s = AnimStructs(info["byte_order"], source.ds_flag, source.mobile_flag)
+    writer = AnimWriter(byte_order, target.ds_flag, target.mobile_flag)
+    targets = {}
+    for name in anim_layout:
+        targets[getattr(s, name)] = getattr(writer, name)
+    convert = None
+    if source.ds_flag and not target.ds_flag:
+        convert = fixedToFloat
+    elif target.ds_flag and not source.ds_flag:
+        convert = floatToFixed
+    swap_bytes = s.endianness != writer.endianness
+
+    file_header = s.file_header.unpack_from(anim_file_data, 8)
+    nof0_offset = file_header[3]
+    num_pointers = s.int_pair.unpack_from(anim_file_data, nof0_offset + 8)[0]
+    listed = set(struct.unpack_from(s.endianness + str(num_pointers) + "i", anim_file_data, nof0_offset + 16))
+    data_end = struct.unpack_from("<i", anim_file_data, 36)[0] + 8
+
+    #The block as (start, size, record, count) chunks, record being None for bytes that are copied (names, padding...)
+    chunks = []
+    position = 8
+    for offset, (record, count) in sorted(transcodeSections(anim_file_data, s).items()):
+        if offset < position:
+            raise InvalidAnimationError("sections overlap at " + hex(offset + 32))
+        if offset > position:
+            chunks.append((position, offset - position, None, 0))
+        elif len(chunks) != 0 and chunks[-1][2] is record:
+            #Runs of the same record (keyframes of one type...) are one chunk
+            chunks[-1] = (chunks[-1][0], chunks[-1][1] + count*record.size, record, chunks[-1][3] + count)
+            position = offset + count*record.size
+            continue
+        chunks.append((offset, count*record.size, record, count))
+        position = offset + count*record.size
+    if position > data_end:
+        raise InvalidAnimationError("sections go past the end of the data at " + hex(data_end + 32))
+    if position < data_end:
+        chunks.append((position, data_end - position, None, 0))
+
+    #Where each chunk goes, and the end of the block after them
+    old_starts = []
+    new_starts = []
+    position = 8
+    weird_pointer = 8
+    for start, size, record, count in chunks:
+        old_starts.append(start)
+        new_starts.append(position)
+        if record == None:
+            position += size
+            weird_pointer += size
+        else:
+            position += count*targets[record].size
+            weird_pointer += count*targets[record].size_32
+    old_starts.append(data_end)
+    new_starts.append(position)
+
+    def relocate(value):
+        #A pointer into the old block -> the same place in the new one
+        if value < 8 or value > data_end:
+            raise InvalidAnimationError("pointer to " + hex(value + 32) + " outside the data")
+        i = bisect.bisect_right(old_starts, value) - 1
+        if i == len(chunks) or chunks[i][2] == None:
+            return new_starts[i] + value - old_starts[i]
+        record = chunks[i][2]
+        index, within = divmod(value - old_starts[i], record.size)
+        return new_starts[i] + index*targets[record].size + within
+
+    writer.write(bytes("nCSC", 'UTF-8'))
+    writer.write(bytes(4))
+    for start, size, record, count in chunks:
+        if record == None:
+            writer.write(bytes(anim_file_data[32 + start:32 + start + size]))
+            continue
+        new_record = targets[record]
+        floats, pointers, byte_groups = transcodePlan(record.fields)
+        if numpy != None and len(pointers) == 0 and count >= 16:
+            writer.write(transcodeArray(anim_file_data, 32 + start, count, record, new_record, convert, swap_bytes))
+            continue
+        location = start
+        for values in record.iter_unpack(memoryview(anim_file_data)[32 + start:32 + start + size]):
+            values = list(values)
+            if convert != None:
+                for i in floats:
+                    values[i] = convert(values[i])
+            if swap_bytes:
+                for i in byte_groups:
+                    values[i:i + 4] = values[i:i + 4][::-1]
+            #pointers that aren't in NOF0 are 0 and stay that way
+            for pointer_index, i in enumerate(pointers):
+                if location + record.pointers[pointer_index] in listed:
+                    values[i] = relocate(values[i])
+                    writer.pointer_list.append(writer.tell() + new_record.pointers[pointer_index])
+            writer.pack(new_record, *values)
+            location += record.size
+
+    #The header magic and the unknown value at the end of the outer header are kept
+    writer.finish(writer.pointer_list, weird_pointer, bytes(anim_file_data[0:4]), file_header[5])
+    return bytes(writer.buffer)
+
+########## Container #########
+
+#A binary stand-in for the json, for tools that don't need to edit it by hand. Little endian, made of sections:
+#  "PANC", version (H), flags (H)
+#  then sections of tag (4s), payload size (I), payload: one "HEAD", one "ANIM" per animation and an empty "END " at the end.
+#Every payload starts with its own string table (count, the utf-8 length of each string, the strings),
+#strings are stored as indices into it. Keyframes are stored a column at a time, grouped by data type, see container_keyframe_columns.
+#Records use the same field types as anim_layout, with f being a double here so the json values come back exactly.
+container_magic = b"PANC"
+container_version = 1
+container_extension = ".panim"
+
+container_layout = {
+    #Misc. Info strings
+    "misc_info" : (("header_magic", "i"), ("aspect_ratio", "i"), ("screen_size", "i"), ("byte_order", "i")),
+    "float_pair" : (("a", "f"), ("b", "f")),
+    "crop" : (("texture", "i"), ("corners", "4f")),
+    "element" : (("index", "i"), ("name", "i"), ("parent", "i"), ("unknown_flag_0", "i"), ("render_flag", "i"), ("unknown_flag_1", "i"),
+                 ("polygon", "8f"), ("unknown_values", "3i"), ("render_settings", "3B"), ("num_sprites", "i"),
+                 ("hide", "i"), ("transform", "5f"), ("sprite_index", "i"), ("rgba", "20B"), ("audio_cue?", "i"), ("3d_depth", "i"), ("unk_motion", "i"),
+                 ("name_index", "i")),
+    "animation" : (("name", "i"), ("length_range", "2f"), ("num_banks", "i")),
+    "element_animation" : (("index", "i"), ("num_motions", "i")),
+    "motion" : (("motion", "i"), ("loop", "i"), ("data_type", "B"), ("num_keyframes", "i")),
+}
+container_records = {"file_header" : struct.Struct("<4sHH"), "section" : struct.Struct("<4sI")}
+for name, fields in container_layout.items():
+    container_records[name] = Record(fields, "<", "d", "i")
+
+#The keyframe columns of each data type, same fields and order as the keyframe arrays (see keyframeArrayDtype)
+#with array module type codes
+container_keyframe_columns = {"int" : (("timestamp", "i"), ("data", "i"), ("tweening", "i"), ("ease_in", "d"), ("ease_out", "d"), ("unk", "d")),
+                              "float" : (("timestamp", "i"), ("data", "d"), ("tweening", "i"), ("ease_in", "d"), ("ease_out", "d"), ("unk", "d")),
+                              "rgba" : (("timestamp", "i"), ("red", "B"), ("green", "B"), ("blue", "B"), ("alpha", "B"),
+                                        ("tweening", "i"), ("ease_in", "d"), ("ease_out", "d"), ("unk", "d"))}
+container_dtypes = {"i" : "<i4", "d" : "<f8", "B" : "u1"}
+
+class StringTable:
+    #The strings of one container section, each one stored once
+    def __init__(self):
+        self.strings = []
+        self.indices = {}
+
+    def add(self, text):
+        if text not in self.indices:
+            if type(text) != str:
+                raise TypeError("expected a string, got " + repr(text))
+            self.indices[text] = len(self.strings)
+            self.strings.append(text)
+        return self.indices[text]
+
+    def pack(self):
+        encoded = [text.encode("utf-8") for text in self.strings]
+        return struct.pack("<" + str(len(encoded) + 1) + "I", len(encoded), *[len(text) for text in encoded]) + b"".join(encoded)
+
+def unpackStrings(data, offset):
+    #Returns the strings and the offset right after them
+    count = struct.unpack_from("<I", data, offset)[0]
+    lengths = struct.unpack_from("<" + str(count) + "I", data, offset + 4)
+    offset += 4 + count*4
+    strings = []
+    for length in lengths:
+        strings.append(bytes(data[offset:offset + length]).decode("utf-8"))
+        offset += length
+    return (strings, offset)
+
+def packColumn(type_code, values):
+    column = array.array(type_code, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+def unpackColumn(type_code, data, offset, count):
+    #Returns the column as a list and the offset right after it
+    column = array.array(type_code)
+    column.frombytes(bytes(data[offset:offset + count*column.itemsize]))
+    if sys.byteorder == "big":
+        column.byteswap()
+    return (column.tolist(), offset + count*column.itemsize)
+
+def containerDataType(motion, keyframes):
+    #Int data stays int so hand edited json keeps what it had. Decoded json has floats in every float motion,
+    #and the int motions the encoder writes (audio_cue?, unk_motion) need ints, so this is all it takes
+    if keyframeDataType(motion) == "rgba":
+        return "rgba"
+    if type(keyframes) != list:
+        return "int" if keyframes.dtype["data"].kind in "iub" else "float"
+    for keyframe in keyframes:
+        if type(keyframe["data"]) != int:
+            return "float"
+    return "int"
+
+def packKeyframeColumns(data_type, tracks):
+    #All the keyframes of one data type in a section, a column at a time
+    columns = container_keyframe_columns[data_type]
+    if len(tracks) != 0 and all(type(keyframes) != list for keyframes in tracks):
+        keyframes = joinKeyframeArrays(tracks)
+        return [keyframes[name].astype(container_dtypes[type_code]).tobytes() for name, type_code in columns]
+    keyframes = [keyframe for track in tracks for keyframe in keyframesToList(track)]
+    data = []
+    for name, type_code in columns:
+        if data_type == "rgba" and name in ("red", "green", "blue", "alpha"):
+            values = map(operator.itemgetter(name), map(operator.itemgetter("data"), keyframes))
+        else:
+            values = map(operator.itemgetter(name), keyframes)
+        data.append(packColumn(type_code, values))
+    return data
+
+def unpackKeyframeColumns(data_type, data, offset, count, keyframe_arrays):
+    #Returns every keyframe of the data type, as one keyframe array or a list of dicts, and the offset after them
+    columns = container_keyframe_columns[data_type]
+    if keyframe_arrays:
+        keyframes = numpy.empty(count, keyframeArrayDtype(data_type))
+        for name, type_code in columns:
+            dtype = numpy.dtype(container_dtypes[type_code])
+            keyframes[name] = numpy.frombuffer(data, dtype, count, offset)
+            offset += count*dtype.itemsize
+        return (keyframes, offset)
+    values = []
+    for name, type_code in columns:
+        column, offset = unpackColumn(type_code, data, offset, count)
+        values.append(column)
+    if data_type == "rgba":
+        keyframes = [{"timestamp" : timestamp, "data" : {"red" : red, "green" : green, "blue" : blue, "alpha" : alpha}, "tweening" : tweening,
+                      "ease_in" : ease_in, "ease_out" : ease_out, "unk" : unk}
+                     for timestamp, red, green, blue, alpha, tweening, ease_in, ease_out, unk in zip(*values)]
+    else:
+        keyframes = [{"timestamp" : timestamp, "data" : data, "tweening" : tweening, "ease_in" : ease_in, "ease_out" : ease_out, "unk" : unk}
+                     for timestamp, data, tweening, ease_in, ease_out, unk in zip(*values)]
+    return (keyframes, offset)
+
+def rgbaChannels(rgba_dict):
+    return (rgba_dict["red"], rgba_dict["green"], rgba_dict["blue"], rgba_dict["alpha"])
+
+def rgbaDict(channels):
+    return {"red" : channels[0], "green" : channels[1], "blue" : channels[2], "alpha" : channels[3]}
+
+def writeSection(output, tag, strings, chunks):
+    payload = strings.pack() + b"".join(chunks)
+    output.write(container_records["section"].pack(tag, len(payload)))
+    output.write(payload)
+
+def write_container(output, json_head, animations):
+    #Writes the json (or what decode_stream() returns, one animation at a time) into a binary file object.
+    #Animations whose keyframes are keyframe arrays are written without going through dicts
+    records = container_records
+    output.write(records["file_header"].pack(container_magic, container_version, 0))
+
+    strings = StringTable()
+    misc_info = json_head["Misc. Info"]
+    chunks = [records["misc_info"].pack(strings.add(misc_info["Header Magic"]), strings.add(misc_info["Aspect Ratio"]),
+                                        strings.add(misc_info["Screen Size"]), strings.add(misc_info["Byte Order"]))]
+    chunks.append(struct.pack("<I", len(json_head["Unk. Patterns"])))
+    for unk_pattern in json_head["Unk. Patterns"]:
+        chunks.append(records["float_pair"].pack(*unk_pattern))
+    chunks.append(struct.pack("<I", len(json_head["Sprite Crops"])))
+    for crop in json_head["Sprite Crops"]:
+        chunks.append(records["crop"].pack(crop["texture"], crop["top_left_X"], crop["top_left_Y"], crop["bottom_right_X"], crop["bottom_right_Y"]))
+
+    element_banks = json_head["Element Banks"]
+    #Same check as encode(), either every element has a name index or none does
+    name_index = len(element_banks) != 0 and len(element_banks[0]) != 0 and "Name Index" in element_banks[0][0]
+    chunks.append(packColumn("I", [len(element_banks), name_index] + [len(bank) for bank in element_banks]))
+    element_record = records["element"]
+    sprites = []
+    for bank in element_banks:
+        for element in bank:
+            render = element["Render Settings"]
+            settings = element["Default Settings"]
+            values = [element["Index"], strings.add(element["Name"]), element["Parent"], element["Unknown Flag 0"], element["Render Flag"], element["Unknown Flag 1"]]
+            values += element["2D Polygon"]
+            values += element["Unknown Values"]
+            values += [render["dodge_blend"], render["unknown_1"], render["unknown_2"], len(element["Sprite List"])]
+            values += [settings["hide"], settings["posx"], settings["posy"], settings["angle"], settings["scalex"], settings["scaley"], settings["sprite_index"]]
+            for color in ("rgba", "rgba_tl", "rgba_bl", "rgba_tr", "rgba_br"):
+                values += rgbaChannels(settings[color])
+            values += [settings["audio_cue?"], settings["3d_depth"], settings["unk_motion"], element["Name Index"] if name_index else -1]
+            chunks.append(element_record.pack(*values))
+            sprites += element["Sprite List"]
+    chunks.append(packColumn("i", sprites))
+    writeSection(output, b"HEAD", strings, chunks)
+
+    for anim in animations:
+        strings = StringTable()
+        chunks = [records["animation"].pack(strings.add(anim["Name"]), anim["Length Range"][0], anim["Length Range"][1], len(anim["Element Banks"])),
+                  packColumn("I", [len(bank) for bank in anim["Element Banks"]])]
+        tracks = {"int" : [], "float" : [], "rgba" : []}
+        motion_chunks = []
+        for bank in anim["Element Banks"]:
+            for element in bank:
+                chunks.append(records["element_animation"].pack(element["Index"], len(element["Animations"])))
+                for motion in element["Animations"]:
+                    data_type = containerDataType(motion["Motion"], motion["Keyframes"])
+                    tracks[data_type].append(motion["Keyframes"])
+                    motion_chunks.append(records["motion"].pack(strings.add(motion["Motion"]), motion["Loop"],
+                                                                keyframe_data_types.index(data_type), len(motion["Keyframes"])))
+        chunks += motion_chunks
+        for data_type in keyframe_data_types:
+            chunks.append(struct.pack("<I", sum(len(keyframes) for keyframes in tracks[data_type])))
+            chunks += packKeyframeColumns(data_type, tracks[data_type])
+        writeSection(output, b"ANIM", strings, chunks)
+    writeSection(output, b"END ", StringTable(), [])
+
+def read_container(container_data, keyframe_arrays = False):
+    #Container -> the same json decode() gives. keyframe_arrays works like decode()'s
+    json_data, animations = read_container_stream(container_data, keyframe_arrays)
+    json_data["Animations"] = list(animations)
+    return json_data
+
+def read_container_stream(container_data, keyframe_arrays = False):
+    #Same as read_container(), but returns (json without "Animations", iterator over the animations) like decode_stream()
+    if keyframe_arrays and numpy == None:
+        raise RuntimeError("keyframe_arrays needs numpy")
+    records = container_records
+    if len(container_data) < records["file_header"].size:
+        raise InvalidAnimationError("not an animation container")
+    magic, version, flags = records["file_header"].unpack_from(container_data, 0)
+    if magic != container_magic:
+        raise InvalidAnimationError("not an animation container")
+    if version > container_version:
+        raise InvalidAnimationError("container version " + str(version) + " isn't supported")
+
+    def sections():
+        offset = records["file_header"].size
+        while True:
+            tag, size = records["section"].unpack_from(container_data, offset)
+            offset += records["section"].size
+            if offset + size > len(container_data):
+                raise InvalidAnimationError("container is cut short")
+            strings, payload = unpackStrings(container_data, offset)
+            yield (tag, strings, payload)
+            if tag == b"END ":
+                return
+            offset += size
+    section_iter = sections()
+
+    tag, strings, offset = next(section_iter)
+    if tag != b"HEAD":
+        raise InvalidAnimationError("container has no HEAD section")
+    magic, aspect_ratio, screen_size, byte_order = records["misc_info"].unpack_from(container_data, offset)
+    offset += records["misc_info"].size
+    misc_info = {"Header Magic" : strings[magic],
+                 "Aspect Ratio" : strings[aspect_ratio],
+                 "Screen Size" : strings[screen_size],
+                 "Byte Order" : strings[byte_order],
+                 }
+    count = struct.unpack_from("<I", container_data, offset)[0]
+    offset += 4
+    unk_pattern_list = list(records["float_pair"].iter_unpack(container_data[offset:offset + count*records["float_pair"].size]))
+    offset += count*records["float_pair"].size
+    count = struct.unpack_from("<I", container_data, offset)[0]
+    offset += 4
+    sprite_crop_list = []
+    for texture, top_left_X, top_left_Y, bottom_right_X, bottom_right_Y in records["crop"].iter_unpack(container_data[offset:offset + count*records["crop"].size]):
+        sprite_crop_list.append({"texture": texture,
+                                 "top_left_X": top_left_X,
+                                 "top_left_Y": top_left_Y,
+                                 "bottom_right_X": bottom_right_X,
+                                 "bottom_right_Y": bottom_right_Y})
+    offset += count*records["crop"].size
+
+    num_banks, name_index = struct.unpack_from("<2I", container_data, offset)
+    bank_sizes, offset = unpackColumn("I", container_data, offset + 8, num_banks)
+    element_record = records["element"]
+    element_rows = element_record.iter_unpack(container_data[offset:offset + sum(bank_sizes)*element_record.size])
+    offset += sum(bank_sizes)*element_record.size
+    element_rows = list(element_rows)
+    sprites, offset = unpackColumn("i", container_data, offset, sum(values[20] for values in element_rows))
+    element_banks = []
+    row = 0
+    sprite_position = 0
+    for bank_size in bank_sizes:
+        element_bank = []
+        for values in element_rows[row:row + bank_size]:
+            element = {"Index" : values[0], "Name" : strings[values[1]], "Parent" : values[2],
+                       "Unknown Flag 0" : values[3], "Render Flag" : values[4], "Unknown Flag 1" : values[5],
+                       "2D Polygon" : list(values[6:14]), "Unknown Values" : list(values[14:17]),
+                       "Render Settings" : {"dodge_blend" : values[17], "unknown_1" : values[18], "unknown_2" : values[19]},
+                       "Sprite List" : sprites[sprite_position:sprite_position + values[20]]}
+            sprite_position += values[20]
+            element["Default Settings"] = {"hide" : values[21], "posx" : values[22], "posy" : values[23], "angle" : values[24],
+                                           "scalex" : values[25], "scaley" : values[26], "sprite_index" : values[27],
+                                           "rgba" : rgbaDict(values[28:32]), "rgba_tl" : rgbaDict(values[32:36]), "rgba_bl" : rgbaDict(values[36:40]),
+                                           "rgba_tr" : rgbaDict(values[40:44]), "rgba_br" : rgbaDict(values[44:48]),
+                                           "audio_cue?" : values[48], "3d_depth" : values[49], "unk_motion" : values[50]}
+            if name_index:
+                element["Name Index"] = values[51]
+            element_bank.append(element)
+        element_banks.append(element_bank)
+        row += bank_size
+
+    json_head = {"Misc. Info": misc_info, "Unk. Patterns" : unk_pattern_list, "Sprite Crops" : sprite_crop_list, "Element Banks" : element_banks}
+
+    def read_animations():
+        for tag, strings, offset in section_iter:
+            if tag != b"ANIM":
+                continue
+            name, length_start, length_end, num_banks = records["animation"].unpack_from(container_data, offset)
+            bank_sizes, offset = unpackColumn("I", container_data, offset + records["animation"].size, num_banks)
+            elements = []
+            for index in range(sum(bank_sizes)):
+                elements.append(records["element_animation"].unpack_from(container_data, offset))
+                offset += records["element_animation"].size
+            num_motions = sum(element[1] for element in elements)
+            motions = list(records["motion"].iter_unpack(container_data[offset:offset + num_motions*records["motion"].size]))
+            offset += num_motions*records["motion"].size
+            keyframes = []
+            for data_type in keyframe_data_types:
+                count = struct.unpack_from("<I", container_data, offset)[0]
+                type_keyframes, offset = unpackKeyframeColumns(data_type, container_data, offset + 4, count, keyframe_arrays)
+                keyframes.append(type_keyframes)
+            positions = [0, 0, 0]
+
+            element_banks = []
+            motion_index = 0
+            element_index = 0
+            for bank_size in bank_sizes:
+                animation_list = []
+                for index, element_motions in elements[element_index:element_index + bank_size]:
+                    element_animation = []
+                    for motion, loop_value, data_type, num_keyframes in motions[motion_index:motion_index + element_motions]:
+                        start = positions[data_type]
+                        positions[data_type] += num_keyframes
+                        element_animation.append({"Motion" : strings[motion], "Loop" : loop_value, "Keyframes" : keyframes[data_type][start:start + num_keyframes]})
+                    motion_index += element_motions
+                    animation_list.append({"Index" : index, "Animations" : element_animation})
+                element_banks.append(animation_list)
+                element_index += bank_size
+            yield {"Name" : strings[name], "Length Range" : (length_start, length_end), "Element Banks" : element_banks}
+
+    return (json_head, read_animations())
+
+########## Playback #########
+
+#Evaluates the motion tracks of an animation at any times with numpy, for previews and game side playback.
+#Every element gets a value for each channel at each time, rgba motions being 4 channels. A motion an element
+#doesn't have stays at its "Default Settings" value.
+#What the games do with tweening isn't fully worked out. Here 0 holds a keyframe's value until the next one, 1 goes
+#linearly to the next one and 2 is a hermite curve, ease_out and ease_in being the slopes (per frame) leaving a keyframe
+#and arriving at the next one. Loop tracks start over from their first keyframe once past the last one.
+#Motions holding indices or flags (stepped_motions) always hold their value.
+stepped_motions = ("hide", "sprite_index", "audio_cue?", "3d_depth", "unk_motion")
+rgba_channels = ("red", "green", "blue", "alpha")
+baked_extension = ".npz"
+
+#Channel names in baked order ("rgba.red"...), and motion -> (first channel, number of channels)
+bake_channels = []
+bake_columns = {}
+for bit in sorted(bit for bit in motion_names if type(bit) == int):
+    motion = motion_names[bit]
+    if keyframeDataType(motion) == "rgba":
+        bake_columns[motion] = (len(bake_channels), 4)
+        bake_channels += [motion + "." + channel for channel in rgba_channels]
+    else:
+        bake_columns[motion] = (len(bake_channels), 1)
+        bake_channels.append(motion)
+
+def trackColumns(motion, keyframes):
+    #(timestamps, values, tweening, ease_in, ease_out) of a keyframe list or array as numpy arrays, values being (n, 4) for rgba
+    if type(keyframes) != list:
+        if "red" in keyframes.dtype.names:
+            values = numpy.stack([keyframes[channel] for channel in rgba_channels], 1).astype("f8")
+        else:
+            values = keyframes["data"].astype("f8")
+        return (keyframes["timestamp"].astype("f8"), values, keyframes["tweening"], keyframes["ease_in"], keyframes["ease_out"])
+    if keyframeDataType(motion) == "rgba":
+        values = [[keyframe["data"][channel] for channel in rgba_channels] for keyframe in keyframes]
+    else:
+        values = [keyframe["data"] for keyframe in keyframes]
+    columns = [[keyframe[name] for keyframe in keyframes] for name in ("timestamp", "tweening", "ease_in", "ease_out")]
+    return (numpy.array(columns[0], "f8"), numpy.array(values, "f8"), numpy.array(columns[1]), numpy.array(columns[2], "f8"), numpy.array(columns[3], "f8"))
+
+def sample_track(track, times):
+    #The values of one motion ({"Motion", "Loop", "Keyframes"}) at every time in times (frames, not necessarily whole),
+    #an array of len(times), or len(times) x 4 for rgba. Before the first keyframe it's the first keyframe's value.
+    if numpy == None:
+        raise RuntimeError("sample_track needs numpy")
+    motion = track["Motion"]
+    timestamps, values, tweening, ease_in, ease_out = trackColumns(motion, track["Keyframes"])
+    if len(timestamps) == 0:
+        raise ValueError(motion + " has no keyframes")
+    times = numpy.asarray(times, "f8")
+    last = len(timestamps) - 1
+    span = timestamps[last] - timestamps[0]
+    if track["Loop"] and span > 0:
+        times = numpy.where(times > timestamps[last], timestamps[0] + (times - timestamps[0]) % span, times)
+
+    #The keyframes on either side of each time, and how far between them it is
+    start = numpy.clip(numpy.searchsorted(timestamps, times, "right") - 1, 0, last)
+    end = numpy.minimum(start + 1, last)
+    length = timestamps[end] - timestamps[start]
+    u = numpy.clip(numpy.divide(times - timestamps[start], length, out = numpy.zeros_like(times), where = length > 0), 0, 1)
+    value_from = values[start]
+    if motion in stepped_motions:
+        return value_from
+    value_to = values[end]
+    mode = tweening[start]
+    slope_out = ease_out[start]*length
+    slope_in = ease_in[end]*length
+    if values.ndim == 2:
+        u, mode, slope_out, slope_in = u[:, None], mode[:, None], slope_out[:, None], slope_in[:, None]
+
+    linear = value_from + (value_to - value_from)*u
+    u2 = u*u
+    u3 = u2*u
+    curve = (2*u3 - 3*u2 + 1)*value_from + (u3 - 2*u2 + u)*slope_out + (3*u2 - 2*u3)*value_to + (u3 - u2)*slope_in
+    sampled = numpy.where(mode == 0, value_from, numpy.where(mode == 1, linear, curve))
+    if values.ndim == 2:
+        sampled = numpy.clip(sampled, 0, 255)
+    return sampled
+
+def bakeElements(element_banks):
+    #(bank, index) of every element, the rows of evaluate_animation()
+    return [(bank_index, elm_index) for bank_index, bank in enumerate(element_banks) for elm_index in range(len(bank))]
+
+def bakeDefaults(element_banks):
+    #Every element's "Default Settings" as one row of channels
+    defaults = numpy.zeros((sum(len(bank) for bank in element_banks), len(bake_channels)))
+    row = 0
+    for bank in element_banks:
+        for element in bank:
+            for motion, value in element["Default Settings"].items():
+                column, width = bake_columns[motion]
+                if width == 4:
+                    defaults[row, column:column + 4] = [value[channel] for channel in rgba_channels]
+                else:
+                    defaults[row, column] = value
+            row += 1
+    return defaults
+
+def animationFrames(animation):
+    #Every whole frame of an animation's "Length Range"
+    first, last = animation["Length Range"]
+    return numpy.arange(first, last + 1, dtype = "f8")
+
+def evaluate_animation(json_data, animation, times = None):
+    #Every element's channels (bake_channels) at times, an array of elements x len(times) x channels,
+    #the elements being in "Element Banks" order (see bakeElements). animation is the animation's json,
+    #without times it's every frame of its "Length Range".
+    if numpy == None:
+        raise RuntimeError("evaluate_animation needs numpy")
+    if times is None:
+        times = animationFrames(animation)
+    times = numpy.asarray(times, "f8")
+    element_banks = json_data["Element Banks"]
+    values = numpy.repeat(bakeDefaults(element_banks)[:, None, :], len(times), 1)
+    first_row = 0
+    for bank_index, bank in enumerate(animation["Element Banks"]):
+        for element in bank:
+            row = first_row + element["Index"]
+            for track in element["Animations"]:
+                if len(track["Keyframes"]) == 0:
+                    continue
+                column, width = bake_columns[track["Motion"]]
+                values[row, :, column:column + width] = sample_track(track, times).reshape(len(times), width)
+        first_row += len(element_banks[bank_index])
+    return values
+
+def write_baked(output, json_data, animations = None):
+    #Writes every frame of the given animations (indices or names, all of them if None) to output as an uncompressed .npz:
+    #  "channels", "elements" and "animations" (names), "element_keys" ((bank, index) of every element),
+    #  then "frames_<n>" (times) and "values_<n>" (float32, elements x frames x channels) for the nth animation written.
+    #output has to be opened in binary mode.
+    if numpy == None:
+        raise RuntimeError("baking needs numpy")
+    if animations == None:
+        animations = range(len(json_data["Animations"]))
+    tables = NameTables(json_data)
+    selected = [json_data["Animations"][tables.animation_index[animation] if isinstance(animation, str) else animation] for animation in animations]
+    elements = bakeElements(json_data["Element Banks"])
+    arrays = {"channels" : numpy.array(bake_channels),
+              "elements" : numpy.array([tables.element_names[key] for key in elements]),
+              "element_keys" : numpy.array(elements, "i4").reshape(len(elements), 2),
+              "animations" : numpy.array([animation["Name"] for animation in selected])}
+    for i, animation in enumerate(selected):
+        frames = animationFrames(animation)
+        arrays["frames_" + str(i)] = frames
+        arrays["values_" + str(i)] = evaluate_animation(json_data, animation, frames).astype("f4")
+    numpy.savez(output, **arrays)
+
+########## Keyframe reduction #########
+
+#Drops the keyframes that don't change the curve sample_track() plays back: ones between neighbours holding the same value,
+#or lying on the line between them. Lossless by default, a tolerance lets the curve move by up to that much instead.
+#Tolerances are given per motion, {"posx" : 0.5, "rgba" : 1}, with "*" for every motion not in there.
+#Tracks using tweening 2 only lose keyframes where they're flat.
+def toleranceFor(tolerances, motion):
+    if tolerances == None:
+        return 0.0
+    return tolerances.get(motion, tolerances.get("*", 0.0))
+
+def reduceTrack(motion, keyframes, loop = 0, tolerance = 0.0):
+    #keyframes (a list or a keyframe array) without the ones that can go, the same object if none can
+    count = len(keyframes)
+    if count < 2:
+        return keyframes
+    keyframe_list = keyframesToList(keyframes)
+    times = [keyframe["timestamp"] for keyframe in keyframe_list]
+    if keyframeDataType(motion) == "rgba":
+        values = [[keyframe["data"][channel] for channel in rgba_channels] for keyframe in keyframe_list]
+    else:
+        values = [[keyframe["data"]] for keyframe in keyframe_list]
+    if motion in stepped_motions:
+        modes = [0]*count
+    else:
+        modes = [keyframe["tweening"] for keyframe in keyframe_list]
+    ease_in = [keyframe["ease_in"] for keyframe in keyframe_list]
+    ease_out = [keyframe["ease_out"] for keyframe in keyframe_list]
+
+    def fits(a, b, hold):
+        #Can the curve from keyframe a to keyframe b stand in for everything in between?
+        #hold checks against keyframe a's value instead, what's left after the last keyframe
+        if modes[a] == 0:
+            hold = True
+        elif modes[a] == 2:
+            #A curve without slopes between (nearly) equal values is flat
+            if ease_out[a] != 0 or ease_in[b] != 0 or max(abs(v - w) for v, w in zip(values[a], values[b])) > tolerance:
+                return False
+            hold = True
+        if times[b] <= times[a]:
+            return False
+        def line(t, channel):
+            if hold:
+                return values[a][channel]
+            return values[a][channel] + (values[b][channel] - values[a][channel])*(t - times[a])/(times[b] - times[a])
+        for i in range(a, b):
+            if modes[i] == 0:
+                #holds its value up to the next keyframe
+                points = ((times[i], values[i]), (times[i + 1], values[i]))
+            elif modes[i] == 1:
+                points = ((times[i], values[i]), (times[i + 1], values[i + 1]))
+            elif ease_out[i] == 0 and ease_in[i + 1] == 0:
+                #stays between the two values, both have to be close at either end
+                points = ((times[i], values[i]), (times[i], values[i + 1]), (times[i + 1], values[i]), (times[i + 1], values[i + 1]))
+            else:
+                return False
+            for t, value in points:
+                for channel in range(len(value)):
+                    if abs(value[channel] - line(t, channel)) > tolerance:
+                        return False
+        return True
+
+    kept = [0]
+    for k in range(1, count - 1):
+        if not fits(kept[-1], k + 1, False):
+            kept.append(k)
+    kept.append(count - 1)
+    #The last keyframe is held forever, if the one before holds the same value already it isn't needed.
+    #Loop tracks keep it, it's where they start over.
+    if not loop and len(kept) > 1 and fits(kept[-2], kept[-1], True):
+        if max(abs(v - w) for v, w in zip(values[kept[-2]], values[kept[-1]])) <= tolerance:
+            kept.pop()
+    if len(kept) == count:
+        return keyframes
+    if type(keyframes) == list:
+        return [keyframes[i] for i in kept]
+    return keyframes[kept]
+
+def reduce_animation(animation, tolerances = None, report = None):
+    #Reduces the keyframes of one animation json in place, adding the counts to report if given (see reduce_keyframes)
+    keyframe_size = compileLayout("<", False, False)["keyframe_float"].size
+    if report == None:
+        report = {"keyframes_before" : 0, "keyframes_after" : 0, "bytes_before" : 0, "bytes_after" : 0}
+    for bank in animation["Element Banks"]:
+        for element in bank:
+            for track in element["Animations"]:
+                before = len(track["Keyframes"])
+                track["Keyframes"] = reduceTrack(track["Motion"], track["Keyframes"], track["Loop"], toleranceFor(tolerances, track["Motion"]))
+                after = len(track["Keyframes"])
+                report["keyframes_before"] += before
+                report["keyframes_after"] += after
+                report["bytes_before"] += before*keyframe_size
+                report["bytes_after"] += after*keyframe_size
+    return report
+
+def reduce_keyframes(json_data, tolerances = None):
+    #Reduces every animation of a json in place.
+    #Returns {"keyframes_before", "keyframes_after", "bytes_before", "bytes_after"}, the bytes being the keyframe section of the file
+    report = {"keyframes_before" : 0, "keyframes_after" : 0, "bytes_before" : 0, "bytes_after" : 0}
+    for animation in json_data["Animations"]:
+        reduce_animation(animation, tolerances, report)
+    return report
+
+def parseTolerances(text):
+    #"0.5" or "posx=0.5,rgba=2" -> tolerances, a bare number being for every motion
+    tolerances = {}
+    for item in text.split(","):
+        if item.find("=") != -1:
+            motion, value = item.split("=", 1)
+            if motion != "*" and motion not in bake_columns:
+                raise ValueError("Unknown motion " + motion)
+            tolerances[motion] = float(value)
+        else:
+            tolerances["*"] = float(item)
+    return tolerances
+
+########## Conversion cache #########
+
+class ConversionCache:
+    #Outputs of earlier conversions, stored under a hash of the input file and everything that changes the output
+    #(options, output format and the script itself, so editing it never hands back stale outputs).
+    #Once the cache is over max_size bytes the least recently used outputs go first, a hit counts as a use.
+    def __init__(self, cache_dir, max_size = 1024*2**20):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        with open(os.path.abspath(__file__), "rb") as f:
+            self.version = hashlib.sha256(f.read()).hexdigest()
+
+    def key(self, input_file, *options):
+        digest = hashlib.sha256()
+        with open(input_file, "rb") as f:
+            while True:
+                data = f.read(2**20)
+                if not data:
+                    break
+                digest.update(data)
+        digest.update((self.version + repr(options)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key, output_file):
+        #Copies the cached output to output_file, returns False if there's none
+        cached = self.path(key)
+        try:
+            shutil.copyfile(cached, output_file)
+        except FileNotFoundError:
+            return False
+        os.utime(cached)
+        return True
+
+    def put(self, key, output_file):
+        #Written under a temporary name first so other processes never see half an entry
+        cached = self.path(key)
+        os.makedirs(os.path.dirname(cached), exist_ok = True)
+        temporary = cached + "." + str(os.getpid()) + ".tmp"
+        shutil.copyfile(output_file, temporary)
+        os.replace(temporary, cached)
+
+    def evict(self):
+        #Removes the least recently used entries until the cache fits in max_size. Returns how many went
+        entries = []
+        total = 0
+        for dir_path, dir_names, file_names in os.walk(self.cache_dir):
+            for name in file_names:
+                path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        removed = 0
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+def read_anim_file(input_file):
+    #Maps the file read-only instead of reading it in, decode() indexes the map directly.
+    #The pages come from the page cache, so every process converting the same dump shares them
+    #and memory use doesn't grow with the file size.
+    with open(input_file, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            #Empty files and anything else that can't be mapped
+            return f.read()
+
+def close_anim_file(anim_file_data):
+    if isinstance(anim_file_data, mmap.mmap):
+        try:
+            anim_file_data.close()
+        except BufferError:
+            #Something still holds a view into it (an exception traceback for example),
+            #it'll be unmapped once that's gone.
+            pass
+
+def is_json_path(path):
+    return path.find(".json") != -1
+
+def is_container_path(path):
+    return path.endswith(container_extension)
+
+def is_baked_path(path):
+    return path.endswith(baked_extension)
+
+def default_output(input_file):
+    if is_container_path(input_file):
+        return input_file[:-len(container_extension)]
+    if is_json_path(input_file):
+        return input_file[:-5] #remove .json from the filename
+    return input_file + ".json"
+
+def dumpJson(value, level, compact = False):
+    #value the way write_json() writes it, indented for its level
+    if compact:
+        return json.dumps(value, ensure_ascii = False, separators = (",", ":"))
+    return json.dumps(value, ensure_ascii = False, indent = 4).replace("\n", "\n" + "    "*level)
+
+def write_json(output, json_head, animations, compact = False):
+    #Writes what decode_stream() returns one animation at a time.
+    #The output is the same as json.dump(indent = 4) (or separators = (",", ":") if compact) of the whole thing.
+    dump = lambda value, level: dumpJson(value, level, compact)
+    if compact:
+        newline = ""
+        colon = ":"
+    else:
+        newline = "\n"
+        colon = ": "
+    output.write("{")
+    for key, value in json_head.items():
+        output.write(newline + "    "*bool(newline) + json.dumps(key, ensure_ascii = False) + colon + dump(value, 1) + ",")
+    output.write(newline + "    "*bool(newline) + '"Animations"' + colon + "[")
+    separator = ""
+    for anim in animations:
+        #(decode_stream() can hand over animations already dumped)
+        if type(anim) != str:
+            anim = dump(anim, 2)
+        output.write(separator + newline + "        "*bool(newline) + anim)
+        separator = ","
+    if separator:
+        output.write(newline + "    "*bool(newline))
+    output.write("]" + newline + "}")
+
+def timeIterator(iterator, elapsed):
+    #Goes through iterator, adding the time spent getting its items to elapsed[0].
+    #Decoding and writing are interleaved when streaming, this keeps them apart for the profiler
+    clock = time.perf_counter
+    iterator = iter(iterator)
+    while True:
+        start = clock()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            elapsed[0] += clock() - start
+            return
+        elapsed[0] += clock() - start
+        yield item
+
+def write_output(output_file, binary, write):
+    #Hands the open output file to write(). If that fails the half written file is removed
+    try:
+        if binary:
+            with open(output_file, "wb") as f:
+                write(f)
+        else:
+            with open(output_file, "w", encoding = "utf-8") as f:
+                write(f)
+    except:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+
+def convert_file(input_file, output_file = None, platform = None, name_order = False, debug = False, profiler = None, compact = False, cache = None, base_file = None, animations = None, reduction = None, pool_strings = False, workers = 1):
+    #The conversion will depend on the file extension of the input, same as the command line.
+    #Containers (container_extension) go to an animation file, or to json if the output is a .json.
+    #Json and animation files go to a container if the output has container_extension.
+    #With a ConversionCache, an input converted the same way before just gets its output copied from the cache.
+    #base_file is an earlier output to encode on top of with incremental_encode(), the result is the same either way
+    #platform "auto" probes animation files for it, json and containers don't say what they were made for
+    #animations (names or indices) only converts those out of an animation file, through AnimFile
+    #An output ending in baked_extension gets every frame of the animations baked by write_baked(), that one takes animations from any input
+    #reduction is the tolerances to reduce the keyframes with on the way (see reduce_keyframes(), {} being lossless), None leaves them alone
+    #pool_strings is passed on to encode(), it always does a full encode since incremental_encode() keeps every name's own copy
+    #workers above 1 decodes the animations of an animation file on that many processes (None for one per core), see decodeAnimationsParallel.
+    #Going to json they get written out as text there too
+    if profiler == None:
+        profiler = Profiler()
+    clock = time.perf_counter
+    if output_file == None:
+        output_file = default_output(input_file)
+    #What if the output doesn't have .json?
+    if not is_container_path(input_file) and not is_json_path(input_file) and output_file.find(".json") == -1 and not is_container_path(output_file) and not is_baked_path(output_file):
+        output_file += ".json"
+    if platform == "auto" and (is_container_path(input_file) or is_json_path(input_file)):
+        raise ValueError("The platform can only be detected from animation files")
+    if animations != None and not is_baked_path(output_file) and (is_container_path(input_file) or is_json_path(input_file) or not (is_json_path(output_file) or is_container_path(output_file))):
+        raise ValueError("Animations can only be picked out of animation files")
+    if is_baked_path(output_file) and numpy == None:
+        raise RuntimeError("baking needs numpy")
+
+    if cache != None:
+        start = clock()
+        cache_key = cache.key(input_file, platform, name_order, debug, compact, is_json_path(output_file), is_container_path(output_file), is_baked_path(output_file), animations, reduction, pool_strings)
+        if cache.get(cache_key, output_file):
+            profiler.add("cache", "hit", clock() - start, os.path.getsize(output_file), 1)
+            return output_file
+        profiler.add("cache", "miss", clock() - start, os.path.getsize(input_file), 1)
+
+    def reduce_animations(animations):
+        #Reduces the animations as they go by, the report ends up in the "reduce" phases
+        report = {"keyframes_before" : 0, "keyframes_after" : 0, "bytes_before" : 0, "bytes_after" : 0}
+        reduce_time = 0.0
+        for animation in animations:
+            start = clock()
+            reduce_animation(animation, reduction, report)
+            reduce_time += clock() - start
+            yield animation
+        profiler.add("reduce", "before", 0.0, report["bytes_before"], report["keyframes_before"])
+        profiler.add("reduce", "after", reduce_time, report["bytes_after"], report["keyframes_after"])
+
+    def write_anim(json_data):
+        if reduction != None:
+            json_data = dict(json_data)
+            json_data["Animations"] = list(reduce_animations(json_data["Animations"]))
+        if base_file != None and os.path.exists(base_file) and not pool_strings:
+            #Read in whole, the output is often the same file
+            with open(base_file, "rb") as f:
+                base_data = f.read()
+            anim_data = incremental_encode(base_data, json_data, platform, debug = debug, profiler = profiler)
+        else:
+            anim_data = encode(json_data, platform, debug, profiler, pool_strings)
+        start = clock()
+        with open(output_file, "wb") as f:
+            f.write(anim_data)
+        profiler.add("files", "write output", clock() - start, len(anim_data), 1)
+
+    def write_stream(json_head, animations, source_phase, source_time):
+        #The animations get read while they're written, source_phase gets the time spent reading them
+        elapsed = [source_time]
+        if reduction != None:
+            animations = reduce_animations(animations)
+        start = clock()
+        if is_container_path(output_file):
+            write_output(output_file, True, lambda f: write_container(f, json_head, timeIterator(animations, elapsed)))
+            output_phase = "container output"
+        else:
+            write_output(output_file, False, lambda f: write_json(f, json_head, timeIterator(animations, elapsed), compact))
+            output_phase = "json output"
+        if source_phase != None:
+            profiler.add("files", source_phase, elapsed[0], os.path.getsize(input_file), 1)
+        profiler.add("files", output_phase, clock() - start - elapsed[0] + source_time, os.path.getsize(output_file), 1)
+
+    def write_bake(json_data, selected):
+        start = clock()
+        write_output(output_file, True, lambda f: write_baked(f, json_data, selected))
+        num_baked = len(json_data["Animations"]) if selected == None else len(selected)
+        profiler.add("files", "baked output", clock() - start, os.path.getsize(output_file), num_baked)
+
+    if is_container_path(input_file):
+        container_data = read_anim_file(input_file)
+        try:
+            start = clock()
+            if is_json_path(output_file):
+                json_head, container_animations = read_container_stream(container_data)
+                write_stream(json_head, container_animations, "container input", clock() - start)
+            elif is_baked_path(output_file):
+                json_data = read_container(container_data, True)
+                profiler.add("files", "container input", clock() - start, os.path.getsize(input_file), 1)
+                write_bake(json_data, animations)
+            else:
+                #encode() takes keyframe arrays straight from the columns
+                json_data = read_container(container_data, numpy != None)
+                profiler.add("files", "container input", clock() - start, os.path.getsize(input_file), 1)
+                write_anim(json_data)
+        finally:
+            close_anim_file(container_data)
+    elif is_json_path(input_file):
+        start = clock()
+        with open(input_file, 'r') as f:
+            json_data = json.load(f)
+        profiler.add("files", "json input", clock() - start, os.path.getsize(input_file), 1)
+        if is_container_path(output_file):
+            write_stream(json_data, json_data["Animations"], None, 0.0)
+        elif is_baked_path(output_file):
+            write_bake(json_data, animations)
+        else:
+            write_anim(json_data)
+    else:
+        anim_file_data = read_anim_file(input_file)
+        try:
+            #Containers store keyframe arrays without going through dicts.
+            #decode() adds its own phases, so the time spent decoding isn't added to the files phases
+            if platform == "auto":
+                start = clock()
+                platform = probe(anim_file_data)["platform"]
+                profiler.add("files", "probe", clock() - start, 0, 1)
+            if is_baked_path(output_file):
+                start = clock()
+                json_data = AnimFile(anim_file_data, platform, name_order, debug, True).to_json(animations)
+                profiler.add("files", "animation input", clock() - start, os.path.getsize(input_file), len(json_data["Animations"]))
+                write_bake(json_data, None)
+            elif animations != None:
+                #Unknown names fail before anything is written
+                anim_file = AnimFile(anim_file_data, platform, name_order, debug, numpy != None and is_container_path(output_file))
+                selected = [anim_file.index(animation) for animation in animations]
+                write_stream(anim_file.head(), (anim_file.animation(i) for i in selected), None, 0.0)
+            else:
+                #(reducing needs them as json)
+                dump = compact if workers != 1 and not is_container_path(output_file) and reduction == None else None
+                json_head, decoded_animations = decode_stream(anim_file_data, platform, name_order, debug, profiler, numpy != None and is_container_path(output_file), workers = workers, dump = dump)
+                write_stream(json_head, decoded_animations, None, 0.0)
+        finally:
+            close_anim_file(anim_file_data)
+
+    if cache != None:
+        start = clock()
+        cache.put(cache_key, output_file)
+        profiler.add("cache", "store", clock() - start, os.path.getsize(output_file), 1)
+    return output_file
+
+########## Batch conversion #########
+
+def find_batch_inputs(paths, direction = "auto"):
+    #Expands directories (recursively) and globs into (input file, root) pairs.
+    #The root is what the mirrored output tree is relative to.
+    #direction "to_json" and "to_container" only pick up animation files from directories, "to_anim" only picks up .json files and containers.
+    jobs = []
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            root = path
+            found = []
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                for name in sorted(file_names):
+                    is_anim = not is_json_path(name) and not is_container_path(name)
+                    if direction in ("to_json", "to_container") and not is_anim:
+                        continue
+                    if direction == "to_anim" and is_anim:
+                        continue
+                    found.append(os.path.join(dir_path, name))
+        elif glob.has_magic(path):
+            #everything before the first wildcard is the root
+            root = path
+            while glob.has_magic(root):
+                root = os.path.dirname(root)
+            found = sorted(p for p in glob.glob(path, recursive = True) if os.path.isfile(p))
+        else:
+            root = os.path.dirname(path)
+            found = [path]
+        for input_file in found:
+            if input_file not in seen:
+                seen.add(input_file)
+                jobs.append((input_file, root))
+    return jobs
+
+def batch_output(input_file, root, output_dir = None, direction = "auto"):
+    if direction == "to_container":
+        output_file = input_file + container_extension
+    else:
+        output_file = default_output(input_file)
+    if output_dir == None:
+        return output_file
+    return os.path.join(output_dir, os.path.relpath(output_file, root or "."))
+
+def _batch_worker(job):
+    #Runs in the pool. Never raises, a bad file just ends up in the failure list.
+    input_file, output_file, platform, name_order, profile, compact, cache_dir, reduction, pool_strings = job
+    profiler = Profiler()
+    try:
+        output_dir = os.path.dirname(output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok = True)
+        #Eviction is left to batch_convert, once the whole batch is done
+        cache = ConversionCache(cache_dir) if cache_dir != None else None
+        convert_file(input_file, output_file, platform, name_order, profiler = profiler, compact = compact, cache = cache, reduction = reduction, pool_strings = pool_strings)
+        error = None
+    except Exception as e:
+        error = type(e).__name__ + ": " + str(e)
+    report = profiler.report() if profile else None
+    return (input_file, output_file, error, report)
+
+def batch_convert(paths, output_dir = None, platform = None, name_order = False, workers = None, direction = "auto", profiler = None, compact = False, cache = None, reduction = None, pool_strings = False):
+    #Converts every file found in paths (files, directories or globs) on a process pool.
+    #Outputs go next to the inputs, or into a mirrored tree under output_dir.
+    #If a profiler is given the workers' numbers get added to it.
+    #With a ConversionCache unchanged inputs are copied from it, and it's trimmed to its size at the end.
+    #reduction and pool_strings are the same as for convert_file()
+    #Returns {"converted" : [(input, output)], "failed" : [(input, error)]}
+    cache_dir = cache.cache_dir if cache != None else None
+    jobs = []
+    for input_file, root in find_batch_inputs(paths, direction):
+        jobs.append((input_file, batch_output(input_file, root, output_dir, direction), platform, name_order, profiler != None, compact, cache_dir, reduction, pool_strings))
+
+    if workers == None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    if workers == 1:
+        results = [_batch_worker(job) for job in jobs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_batch_worker, jobs, chunksize = max(1, len(jobs) // (workers*8))))
+    if cache != None:
+        cache.evict()
+
+    summary = {"converted" : [], "failed" : []}
+    for input_file, output_file, error, report in results:
+        if report != None:
+            profiler.merge(report)
+        if error == None:
+            summary["converted"].append((input_file, output_file))
+        else:
+            summary["failed"].append((input_file, error))
+    return summary
+
+########## Round trip verification #########
+
+#Names of the encodeRegions() sections in verify() reports
+verify_sections = {"head" : "header", "bank" : "element banks", "element_name" : "element names", "anim_banks" : "animation banks",
+                   "anim_name" : "animation names", "element" : "element records", "motions" : "motions", "sprite_settings" : "sprite settings",
+                   "keyframe_lists" : "keyframe lists", "keyframes" : "keyframes"}
+header_table_names = ("unknown pattern", "sprite crop", "element bank", "element name entry", "animation entry", "animation name entry", "animation length")
+
+def recordField(record, offset):
+    #Name of the field at offset in one of record, with the index of repeated fields
+    position = 0
+    codes = iter(record.format[1:])
+    for name, field in record.fields:
+        count = int(field[:-1]) if len(field) > 1 else 1
+        for i in range(count):
+            size = struct.calcsize("<" + next(codes))
+            if offset < position + size:
+                return name if count == 1 else name + "[" + str(i) + "]"
+            position += size
+    return "past the end"
+
+def motionRecords(anim):
+    #(bank, element, motion) of every keyframe list entry of an animation, in the order encode() writes them
+    entries = []
+    for bank_index, bank in enumerate(anim["Element Banks"]):
+        for element in bank:
+            for motion in sorted(element["Animations"], key=sortMotion):
+                entries.append((bank_index, element["Index"], motion))
+    return entries
+
+def describeRegion(json_data, s, key, offset):
+    #(section, what's at offset) inside one of the encodeRegions() regions
+    kind = key if key == "head" else key[0]
+    section = verify_sections[kind]
+    if kind == "head":
+        if offset < 8:
+            return ("header", "nCSC magic" if offset < 4 else "data length")
+        offset -= 8
+        if offset < s.header.size:
+            return ("header", recordField(s.header, offset))
+        offset -= s.header.size
+        for name, (count, record) in zip(header_table_names, headerTables(json_data, s)):
+            if offset < count*record.size:
+                return ("sprite crops" if record is s.crop else "header", name + " " + str(offset // record.size) + " " + recordField(record, offset % record.size))
+            offset -= count*record.size
+    elif kind == "bank":
+        num_elements = len(json_data["Element Banks"][key[1]])
+        if offset < num_elements*s.pointer_value.size:
+            return (section, "bank " + str(key[1]) + " element pointer " + str(offset // s.pointer_value.size))
+        offset -= num_elements*s.pointer_value.size
+        return (section, "bank " + str(key[1]) + " hierarchy " + str(offset // s.int_pair.size) + " " + recordField(s.int_pair, offset % s.int_pair.size))
+    elif kind == "element_name":
+        return (section, "name of element " + str(key[1]) + ", byte " + str(offset))
+    elif kind == "anim_name":
+        return (section, "name of animation " + str(key[1]) + ", byte " + str(offset))
+    elif kind == "anim_banks":
+        return (section, "animation " + str(key[1]) + " bank " + str(offset // s.count_pointer.size) + " " + recordField(s.count_pointer, offset % s.count_pointer.size))
+    elif kind == "element":
+        return (section, "element " + str(key[1]) + " " + recordField(s.element, offset))
+    elif kind == "motions":
+        record_index = offset // s.count_pointer.size
+        for bank_index, bank in enumerate(json_data["Animations"][key[1]]["Element Banks"]):
+            if record_index < len(bank):
+                break
+            record_index -= len(bank)
+        return (section, "animation " + str(key[1]) + " bank " + str(bank_index) + " element " + str(record_index) + " " + recordField(s.count_pointer, offset % s.count_pointer.size))
+    elif kind == "sprite_settings":
+        num_sprites = len(json_data["Element Banks"][key[1][0]][key[1][1]]["Sprite List"])
+        if offset < num_sprites*4:
+            return (section, "element " + str(key[1]) + " sprite " + str(offset // 4))
+        return (section, "element " + str(key[1]) + " " + recordField(s.settings, offset - num_sprites*4))
+    elif kind == "keyframe_lists":
+        bank_index, element_index, motion = motionRecords(json_data["Animations"][key[1]])[offset // s.keyframe_list_entry.size]
+        return (section, "animation " + str(key[1]) + " bank " + str(bank_index) + " element " + str(element_index) + " " + motion["Motion"] + " " +
+                recordField(s.keyframe_list_entry, offset % s.keyframe_list_entry.size))
+    elif kind == "keyframes":
+        keyframe_index = offset // s.keyframe_float.size
+        for bank_index, element_index, motion in motionRecords(json_data["Animations"][key[1]]):
+            if keyframe_index < len(motion["Keyframes"]):
+                break
+            keyframe_index -= len(motion["Keyframes"])
+        return (section, "animation " + str(key[1]) + " bank " + str(bank_index) + " element " + str(element_index) + " " + motion["Motion"] +
+                " keyframe " + str(keyframe_index) + " " + recordField(s.keyframe_float, offset % s.keyframe_float.size))
+    return (section, "")
+
+def locateOffset(json_data, s, anim_file_data, offset):
+    #(section, what's there) of a file offset, by the layout encode() gives json_data
+    if offset < 8:
+        return ("outer header", "magic" if offset < 4 else "size")
+    if offset < 32:
+        return ("outer header", recordField(s.file_header, offset - 8))
+    position = 32
+    for key, size, size_32, num_pointers in encodeRegions(json_data, s):
+        if offset < position + size:
+            return describeRegion(json_data, s, key, offset - position)
+        position += size
+    nof0_offset = s.file_header.unpack_from(anim_file_data, 8)[3]
+    if offset < nof0_offset:
+        return ("padding", "")
+    if offset < nof0_offset + 16:
+        return ("NOF0", "NOF0 header")
+    pointer_index = (offset - nof0_offset - 16) // 4
+    if pointer_index >= struct.unpack_from(s.endianness + "i", anim_file_data, nof0_offset + 8)[0]:
+        return ("NOF0", "NEND")
+    return ("NOF0", "pointer " + str(pointer_index))
+
+def firstDifference(a, b):
+    #First offset where a and b differ, None if they're the same
+    length = min(len(a), len(b))
+    block = 4096
+    for start in range(0, length, block):
+        if a[start:start + block] != b[start:start + block]:
+            for i in range(start, min(start + block, length)):
+                if a[i] != b[i]:
+                    return i
+    if len(a) != len(b):
+        return length
+    return None
+
+def verify(anim_file_data, platform = "auto", profiler = None):
+    #Decodes the file and encodes the result again in memory, the way binary -> json -> binary does with --name_order.
+    #Returns {"platform", "identical", "size", "encoded_size", "offset", "section", "field", "differing_sections"},
+    #offset being the first byte that came out different and section / field what's there. Those are None when identical.
+    if platform == "auto":
+        platform = probe(anim_file_data)["platform"]
+    json_data = decode(anim_file_data, platform, True, profiler = profiler, keyframe_arrays = numpy != None)
+    encoded = encode(json_data, platform, profiler = profiler)
+    result = {"platform" : platform, "identical" : True, "size" : len(anim_file_data), "encoded_size" : len(encoded),
+              "offset" : None, "section" : None, "field" : None, "differing_sections" : []}
+    offset = firstDifference(anim_file_data, encoded)
+    if offset == None:
+        return result
+    s = AnimStructs(json_data["Misc. Info"]["Byte Order"], platform in ("ds", "3ds"), platform == "mobile")
+    result["identical"] = False
+    result["offset"] = offset
+    result["section"], result["field"] = locateOffset(json_data, s, anim_file_data, offset)
+    #Every section that isn't the same, as far as the layouts line up
+    position = 32
+    for key, size, size_32, num_pointers in encodeRegions(json_data, s):
+        section = verify_sections[key if key == "head" else key[0]]
+        if section not in result["differing_sections"] and anim_file_data[position:position + size] != encoded[position:position + size]:
+            result["differing_sections"].append(section)
+        position += size
+    if anim_file_data[position:] != encoded[position:]:
+        result["differing_sections"].append("NOF0")
+    return result
+
+def _verify_worker(job):
+    #Runs in the pool. Never raises, returns (input file, verify() result or None, error)
+    input_file, platform = job
+    try:
+        anim_file_data = read_anim_file(input_file)
+        try:
+            return (input_file, verify(anim_file_data, platform), None)
+        finally:
+            close_anim_file(anim_file_data)
+    except Exception as e:
+        return (input_file, None, type(e).__name__ + ": " + str(e))
+
+def verify_files(paths, platform = "auto", workers = None):
+    #verify() on every animation file in paths (files, directories or globs) on a process pool.
+    #Returns [(input file, result or None, error or None)]
+    jobs = [(input_file, platform) for input_file, root in find_batch_inputs(paths, "to_json")]
+    if workers == None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    if workers == 1:
+        return [_verify_worker(job) for job in jobs]
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_verify_worker, jobs, chunksize = max(1, len(jobs) // (workers*8))))
+
+########## Structural validation #########
+
+def nof0Entries(entries, start, end):
+    #The NOF0 entries in [start, end), entries being sorted
+    return entries[bisect.bisect_left(entries, start):bisect.bisect_left(entries, end)]
+
+def checkTable(name, offset, count, record, entries, data_end, problem):
+    #A table of count records at offset has to fit in the data block, and NOF0 has to list exactly
+    #the pointers of its records. A wrong count or a table that's cut short shows up as pointers that don't line up.
+    #Returns the pointer entries it should have, None if it doesn't fit
+    end = offset + count*record.size
+    if count < 0 or offset < 0 or end > data_end:
+        problem(name + " table at " + hex(offset + 32) + " with " + str(count) + " entries doesn't fit in the data block, which ends at " + hex(data_end + 32))
+        return None
+    expected = [offset + i*record.size + pointer for i in range(count) for pointer in record.pointers]
+    listed = nof0Entries(entries, offset, end)
+    if listed != expected:
+        missing = sorted(set(expected) - set(listed))
+        extra = sorted(set(listed) - set(expected))
+        if len(missing) != 0:
+            problem(name + " table at " + hex(offset + 32) + ": " + str(len(missing)) + " pointer(s) not in NOF0, the first at " + hex(missing[0] + 32))
+        if len(extra) != 0:
+            problem(name + " table at " + hex(offset + 32) + ": NOF0 lists " + str(len(extra)) + " offset(s) in it that aren't pointers of its " + str(count) + " entries, the first at " + hex(extra[0] + 32))
+    return expected
+
+def badPointers(anim_file_data, entries, s, data_end):
+    #Goes through every NOF0 entry. Returns (entries whose pointer isn't inside the data block or isn't aligned,
+    #[(entry, pointer)] of the other ones pointing outside the data block, [(entry, pointer)] of the ones pointing between 4 byte boundaries)
+    first_section = 8 + s.header.size
+    if numpy != None:
+        entry_array = numpy.array(entries, numpy.int64)
+        fits = (entry_array >= 8) & (entry_array + s.pointer_size <= data_end) & (entry_array % 4 == 0)
+        entry_array = entry_array[fits]
+        #Every 4 byte position of the data block read as a pointer
+        positions = numpy.ndarray(((data_end - s.pointer_size)//4 + 1,), s.endianness + ("i8" if s.mobile_flag else "i4"), anim_file_data, 32, (4,))
+        values = positions[entry_array // 4].astype(numpy.int64)
+        outside = (values < first_section) | (values > data_end)
+        between = values % 4 != 0
+        return ([entries[i] for i in numpy.flatnonzero(~fits)],
+                list(zip(entry_array[outside].tolist(), values[outside].tolist())),
+                list(zip(entry_array[between].tolist(), values[between].tolist())))
+    bad_fields = []
+    bad_targets = []
+    unaligned = []
+    pointer_value = s.pointer_value
+    for entry in entries:
+        if entry < 8 or entry + s.pointer_size > data_end or entry % 4 != 0:
+            bad_fields.append(entry)
+            continue
+        value = pointer_value.unpack_from(anim_file_data, entry + 32)[0]
+        if value < first_section or value > data_end:
+            bad_targets.append((entry, value))
+        if value % 4 != 0:
+            unaligned.append((entry, value))
+    return (bad_fields, bad_targets, unaligned)
+
+def validate(anim_file_data, platform = "auto", limit = 20):
+    #Checks the structure of an animation file from its headers and the NOF0 table, without decoding it.
+    #Every pointer NOF0 lists has to be inside the data block and point past the nCSC header, 4 byte aligned unless it's a name,
+    #and the tables the header, the element banks and the animations point to have to hold exactly the pointers their counts say.
+    #Returns {"platform", "valid", "pointers", "problems"}, problems being at most limit descriptions.
+    result = {"platform" : platform, "valid" : False, "pointers" : 0, "problems" : []}
+    problems = result["problems"]
+    def problem(text):
+        problems.append(text)
+
+    if len(anim_file_data) < 64 or bytes(anim_file_data[32:36]) != b"nCSC":
+        problem("not an animation file, no nCSC block")
+        return result
+    endianness = "<" if struct.unpack_from("<i", anim_file_data, 8)[0] == 1 else ">"
+    file_header = compileLayout(endianness, False, False)["file_header"].unpack_from(anim_file_data, 8)
+    if file_header[1] != 32:
+        problem("alignment is " + str(file_header[1]) + " but the nCSC block is at 32")
+        return result
+    nof0_offset = file_header[3]
+    if nof0_offset >= len(anim_file_data):
+        problem("the file is cut off at " + hex(len(anim_file_data)) + ", before its NOF0 table at " + hex(nof0_offset))
+        return result
+    if nof0_offset < 40 or bytes(anim_file_data[nof0_offset:nof0_offset + 4]) != b"NOF0":
+        problem("no NOF0 table at " + hex(nof0_offset))
+        return result
+    if len(anim_file_data) < nof0_offset + 16:
+        problem("the NOF0 table is cut off")
+        return result
+    num_pointers = struct.unpack_from(endianness + "i", anim_file_data, nof0_offset + 8)[0]
+    nof0_end = nof0_offset + 16 + num_pointers*4
+    if num_pointers < 0 or nof0_end > len(anim_file_data):
+        problem("the NOF0 table is cut off, it has " + str(num_pointers) + " pointers but the file ends at " + hex(len(anim_file_data)))
+        return result
+    result["pointers"] = num_pointers
+    #(encode() writes the NOF0 size and the data length little endian whatever the byte order)
+    if struct.unpack_from("<i", anim_file_data, nof0_offset + 4)[0] != num_pointers*4 + 12:
+        problem("NOF0 size doesn't match its " + str(num_pointers) + " pointers")
+    nend_offset = nof0_end + (-nof0_end % 16)
+    if bytes(anim_file_data[nend_offset:nend_offset + 4]) != b"NEND":
+        problem("no NEND after the NOF0 table at " + hex(nend_offset))
+
+    if platform == "auto":
+        result["platform"] = platform = probe(anim_file_data)["platform"]
+    s = AnimStructs(endianness, platform in ("ds", "3ds"), platform == "mobile")
+    #From here on offsets are relative to the nCSC block like the pointers, problems give them as file offsets
+    data_end = 8 + struct.unpack_from("<i", anim_file_data, 36)[0]
+    if data_end < 8 + s.header.size or data_end + 32 > nof0_offset:
+        problem("the data block ends at " + hex(data_end + 32) + ", it should be between the nCSC header and NOF0 at " + hex(nof0_offset))
+        return result
+    entries = list(struct.unpack_from(endianness + str(num_pointers) + "i", anim_file_data, nof0_offset + 16))
+
+    if entries != sorted(entries):
+        i = next(i for i in range(1, num_pointers) if entries[i] <= entries[i - 1])
+        problem("NOF0 isn't in order, pointer " + str(i) + " at " + hex(entries[i] + 32) + " comes after " + hex(entries[i - 1] + 32))
+        entries.sort()
+
+    #The tables, as far as their counts can be trusted
+    string_pointers = set()
+    checkTable("nCSC header", 8, 1, s.header, entries, data_end, problem)
+    header = s.header.unpack_from(anim_file_data, 40)[7:]
+    table_counts = (header[0], header[2], header[4], header[6], header[8], header[8], header[8])
+    table_offsets = (header[1], header[3], header[5], header[7], header[9], header[10], header[12])
+    tables = headerTables({"Unk. Patterns" : [], "Sprite Crops" : [], "Element Banks" : [], "Animations" : []}, s)
+    table_fits = []
+    expected_offset = 8 + s.header.size
+    for name, count, offset, (zero, record) in zip(header_table_names, table_counts, table_offsets, tables):
+        #Each table comes right after the one before it
+        if offset != expected_offset:
+            problem(name + " table is at " + hex(offset + 32) + ", the table before it ends at " + hex(expected_offset + 32))
+        pointers = checkTable(name, offset, count, record, entries, data_end, problem)
+        table_fits.append(pointers != None)
+        if pointers != None and record in (s.name_entry, s.pointer_index):
+            string_pointers.update(pointers)
+        expected_offset = offset + max(count, 0)*record.size
+    if table_fits[2]:
+        for bank_index, (num_elements, elements, unknown, hierarchy) in enumerate(s.bank_entry.iter_unpack(memoryview(anim_file_data)[table_offsets[2] + 32:table_offsets[2] + 32 + table_counts[2]*s.bank_entry.size])):
+            checkTable("bank " + str(bank_index) + " element list", elements, num_elements, s.pointer_value, entries, data_end, problem)
+            checkTable("bank " + str(bank_index) + " hierarchy", hierarchy, num_elements, s.int_pair, entries, data_end, problem)
+            if len(problems) > limit:
+                break
+    if table_fits[4]:
+        for anim_index, (num_banks, banks) in enumerate(s.count_pointer.iter_unpack(memoryview(anim_file_data)[table_offsets[4] + 32:table_offsets[4] + 32 + table_counts[4]*s.count_pointer.size])):
+            checkTable("animation " + str(anim_index) + " bank", banks, num_banks, s.count_pointer, entries, data_end, problem)
+            if len(problems) > limit:
+                break
+
+    #Then every pointer on its own. Records and padded names start on 4 bytes, the names of real files don't always
+    bad_fields, bad_targets, unaligned = badPointers(anim_file_data, entries, s, data_end)
+    for entry in bad_fields[:limit]:
+        problem("NOF0 lists a pointer at " + hex(entry + 32) + ", outside the data block or not aligned")
+    for entry, value in bad_targets[:limit]:
+        problem("the pointer at " + hex(entry + 32) + " points to " + hex(value + 32) + ", outside the data block")
+    for entry, value in [(entry, value) for entry, value in unaligned if entry not in string_pointers][:limit]:
+        problem("the pointer at " + hex(entry + 32) + " points to " + hex(value + 32) + ", which isn't 4 byte aligned")
+
+    if len(problems) > limit:
+        del problems[limit:]
+        problem("(and more)")
+    result["valid"] = len(problems) == 0
+    return result
+
+########## Benchmarks #########
+
+#Synthetic animations to measure decode() and encode() with, no game files needed.
+#They're valid files of every variant and round trip byte for byte, but the values are random.
+#(platform, byte order) of each variant
+bench_variants = {"le" : (None, "<"), "be" : (None, ">"), "ds" : ("ds", "<"), "3ds" : ("3ds", "<"), "mobile" : ("mobile", "<"), "mobile_be" : ("mobile", ">")}
+bench_aspect_ratios = {None : 1.7647058963775635, "ds" : 1.333251953125, "3ds" : 1.666748046875, "mobile" : 0.5625}
+bench_motions = ("hide", "posx", "posy", "angle", "scalex", "scaley", "sprite_index", "rgba", "rgba_tl", "rgba_bl", "rgba_tr", "rgba_br", "3d_depth")
+bench_version = 1
+
+def synthetic_json(platform = None, byte_order = "<", banks = 2, elements = 20, animations = 10, motions = 4, keyframes = 16, seed = 0):
+    #A random json with banks element banks of elements each, animations animations moving motions motions
+    #of every element with keyframes keyframes each. The same arguments always give the same json.
+    rng = random.Random(seed)
+    ctx = AnimContext(platform)
+    if ctx.ds_flag:
+        number = lambda: rng.randint(-500*2 **12, 500*2 **12) / 2 **12
+    else:
+        number = lambda: struct.unpack("<f", struct.pack("<f", rng.uniform(-500, 500)))[0]
+    color = lambda: {"red" : rng.randrange(256), "green" : rng.randrange(256), "blue" : rng.randrange(256), "alpha" : rng.randrange(256)}
+    aspect_ratio = bench_aspect_ratios[platform]
+    misc_info = {"Header Magic" : "CSCS",
+                 "Aspect Ratio" : str(Fraction(aspect_ratio).limit_denominator()),
+                 "Screen Size" : ctx.getScreenSize(aspect_ratio),
+                 "Byte Order" : byte_order}
+
+    element_banks = []
+    for bank_index in range(banks):
+        bank = []
+        for index in range(elements):
+            settings = {"hide" : rng.randrange(2), "posx" : number(), "posy" : number(), "angle" : number(), "scalex" : number(), "scaley" : number(),
+                        "sprite_index" : rng.randrange(16), "rgba" : color(), "rgba_tl" : color(), "rgba_bl" : color(), "rgba_tr" : color(), "rgba_br" : color(),
+                        "audio_cue?" : 0, "3d_depth" : rng.randrange(4), "unk_motion" : 0}
+            bank.append({"Index" : index, "Name" : "element_" + str(bank_index) + "_" + str(index),
+                         #element 0 has to be the first top level one
+                         "Parent" : -1 if index == 0 else rng.randrange(-1, index),
+                         "Unknown Flag 0" : rng.randrange(4), "Render Flag" : rng.randrange(4), "Unknown Flag 1" : 0,
+                         "2D Polygon" : [number() for i in range(8)], "Unknown Values" : [0, rng.randrange(4), 0],
+                         "Render Settings" : {"dodge_blend" : rng.randrange(2), "unknown_1" : rng.randrange(4), "unknown_2" : 0},
+                         "Sprite List" : [rng.randrange(64) for i in range(rng.randrange(4))], "Default Settings" : settings})
+        element_banks.append(bank)
+
+    anims = []
+    for anim_index in range(animations):
+        anim_banks = []
+        for bank in element_banks:
+            anim_bank = []
+            for element in bank:
+                tracks = []
+                for motion in sorted(rng.sample(bench_motions, min(motions, len(bench_motions))), key = bench_motions.index):
+                    data_type = keyframeDataType(motion)
+                    keyframe_list = []
+                    timestamp = 0
+                    for i in range(keyframes):
+                        if data_type == "rgba":
+                            data = color()
+                        elif data_type == "int":
+                            data = rng.randrange(4)
+                        else:
+                            data = number()
+                        keyframe_list.append({"timestamp" : timestamp, "data" : data, "tweening" : rng.randrange(3),
+                                              "ease_in" : number(), "ease_out" : number(), "unk" : number()})
+                        timestamp += rng.randrange(1, 10)
+                    tracks.append({"Motion" : motion, "Loop" : rng.randrange(2), "Keyframes" : keyframe_list})
+                anim_bank.append({"Index" : element["Index"], "Animations" : tracks})
+            anim_banks.append(anim_bank)
+        anims.append({"Name" : "animation_" + str(anim_index), "Length Range" : (0.0, float(rng.randrange(10, 200))), "Element Banks" : anim_banks})
+
+    return {"Misc. Info" : misc_info, "Unk. Patterns" : [(number(), number()) for i in range(2)],
+            "Sprite Crops" : [{"texture" : rng.randrange(4), "top_left_X" : number(), "top_left_Y" : number(), "bottom_right_X" : number(), "bottom_right_Y" : number()}
+                              for i in range(8)],
+            "Element Banks" : element_banks, "Animations" : anims}
+
+def write_corpus(directory, variants = None, **sizes):
+    #Writes synthetic_json(**sizes) of every variant (bench_variants keys) as <variant>.json and the animation file <variant>.bin.
+    #Returns the files written
+    if variants == None:
+        variants = sorted(bench_variants)
+    os.makedirs(directory, exist_ok = True)
+    written = []
+    for variant in variants:
+        platform, byte_order = bench_variants[variant]
+        json_data = synthetic_json(platform, byte_order, **sizes)
+        json_file = os.path.join(directory, variant + ".json")
+        anim_file = os.path.join(directory, variant + ".bin")
+        with open(json_file, "w") as f:
+            json.dump(json_data, f, indent = 4)
+        with open(anim_file, "wb") as f:
+            f.write(encode(json_data, platform))
+        written += [json_file, anim_file]
+    return written
+
+def bestTime(function, repeat):
+    #Fastest of repeat runs, in seconds. The garbage collector is off while timing like timeit does, it's most of the noise
+    clock = time.perf_counter
+    best = None
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            start = clock()
+            function()
+            elapsed = clock() - start
+            if best == None or elapsed < best:
+                best = elapsed
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+def benchmark(variants = None, scales = (1, 2, 4, 8), repeat = 5, **sizes):
+    #Times decode() and encode() on synthetic files of every variant, with the animations multiplied by each scale
+    #for the scaling curve. Best of repeat runs. The result is json, compare_benchmarks() checks two of them.
+    if variants == None:
+        variants = sorted(bench_variants)
+    base_animations = sizes.pop("animations", 10)
+    results = []
+    for variant in variants:
+        platform, byte_order = bench_variants[variant]
+        for scale in scales:
+            json_data = synthetic_json(platform, byte_order, animations = base_animations*scale, **sizes)
+            anim_data = encode(json_data, platform)
+            num_keyframes = sum(len(motion["Keyframes"]) for anim in json_data["Animations"] for bank in anim["Element Banks"]
+                                for element in bank for motion in element["Animations"])
+            timings = {"decode" : bestTime(lambda: decode(anim_data, platform), repeat),
+                       "encode" : bestTime(lambda: encode(json_data, platform), repeat)}
+            if numpy != None:
+                arrays_json = decode(anim_data, platform, keyframe_arrays = True)
+                timings["decode arrays"] = bestTime(lambda: decode(anim_data, platform, keyframe_arrays = True), repeat)
+                timings["encode arrays"] = bestTime(lambda: encode(arrays_json, platform), repeat)
+            for operation, seconds in sorted(timings.items()):
+                results.append({"variant" : variant, "scale" : scale, "operation" : operation, "seconds" : seconds,
+                                "bytes" : len(anim_data), "keyframes" : num_keyframes,
+                                "bytes_per_second" : len(anim_data) / seconds, "keyframes_per_second" : num_keyframes / seconds})
+    sizes["animations"] = base_animations
+    return {"version" : bench_version, "python" : sys.version.split()[0], "numpy" : numpy != None,
+            "sizes" : sizes, "scales" : list(scales), "repeat" : repeat, "results" : results}
+
+def compare_benchmarks(baseline, current, threshold = 0.1):
+    #Results of current slower than the same ones of baseline by more than threshold (0.1 is 10%),
+    #as [(variant, scale, operation, baseline bytes per second, current bytes per second)]
+    if baseline["sizes"] != current["sizes"]:
+        raise ValueError("The benchmarks were run with different sizes")
+    baseline_results = {(result["variant"], result["scale"], result["operation"]) : result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        key = (result["variant"], result["scale"], result["operation"])
+        if key in baseline_results:
+            before = baseline_results[key]["bytes_per_second"]
+            if result["bytes_per_second"] < before*(1 - threshold):
+                regressions.append(key + (before, result["bytes_per_second"]))
+    return regressions
+
+def print_usage():
+    print("Correct usage: \n\npuyo_anim.py [input] [options]\n\nAvailable options:\n        '-o' Output file. This will be determined automatically if not set.")
+    print("        '-ds' Converting to or from a Nintendo DS animation file.\n        '-3ds' Converting to or from a Nintendo 3DS animation file.\n        '-m' Converting to or from a mobile file. This includes Puyo Puyo Quest and Puyo Puyo Touch.")
+    print("        '--name_order' Keep the order of the elements.\n                       Some animation files have an oddly specific order for it's names that the games can be hardcoded to expect.\n                       Recommended if you're editing UI or Manzai animations, but not for general animation editing, like cut-ins.")
+    print("        '-dbg' | '--debug' Enable printing debug info")
+    print("        '--profile' Print the time, bytes and item counts of every conversion phase as json instead of 'Done.'")
+    print("        '--compact' Write the json without indentation or spaces. Smaller and quicker to write, same data.")
+    print("        '--cache-dir' Keep outputs in this directory, keyed by a hash of the input and the options. Unchanged inputs are copied from it instead of converted.")
+    print("        '--cache-size' Size limit of the cache in MB, least recently used outputs go first. Defaults to 1024.")
+    print("        '--incremental' Earlier output of the same json. Only the animations and elements that changed since are encoded again.")
+    print("                        Only files this tool wrote are reused, others get a full conversion.")
+    print("        '--anims' Comma separated names of the animations to convert, the others aren't decoded at all. Animation files to .json or .panim only.")
+    print("        '--reduce' Drop the keyframes that don't change how the animation plays, and print how many went.")
+    print("        '--tolerance' With --reduce, how far the motions may move. One number for all of them, or 'posx=0.5,rgba=2,*=0.1' per motion.")
+    print("        '--pool-strings' When making an animation file, write every name once and point the repeats at it.")
+    print("        '--jobs' Decode the animations of the file on this many processes. Only pays off for files with a lot of animations.")
+    print("        '--auto' Work out the platform from the animation file's headers instead of '-ds', '-3ds' or '-m'.")
+    print("Example:\n        puyo_anim.py title.snc -o title.snc.json\n        Converts from an animation file to a .json")
+    print("\nThe conversion will depend on the file extension of the input.\nIf the extension is '.json', then it will convert the json to it's corresponding animation file format.\nIf it has any extension other than 'json', or no extension at all, it will treat the input file as an animation file.")
+    print("\nAn output ending in '.panim' is a binary container instead of a .json. It holds the same data and is a lot quicker to read and write.\nContainers convert back to an animation file, or to a .json with '-o file.json'.")
+    print("\nAn output ending in '.npz' gets the value of every element's motions at every frame of the animations baked into numpy arrays (needs numpy).\nWorks from animation files, .json files and containers, '--anims' picks the animations.")
+    print("\nCommands:\n        puyo_anim.py batch [files, directories or globs] [options]")
+    print("        Converts everything it finds on one process per core and prints a summary of the files that failed.")
+    print("        '--dest' Write the outputs into a mirrored tree under this directory instead of next to the inputs.")
+    print("        '--jobs' Number of worker processes. Defaults to the number of cores.")
+    print("        '--to' 'json', 'anim' or 'panim'. Only pick up files going that way from directories, 'panim' converts animation files to containers.")
+    print("        '--profile' Print the phase timings of the whole batch as json after the summary.")
+    print("\n        puyo_anim.py probe [files, directories or globs]")
+    print("        Prints the platform, byte order and table sizes of every animation file found as json, reading only the headers.")
+    print("\n        puyo_anim.py verify [files, directories or globs]")
+    print("        Converts every animation file found to json and back in memory and prints where the ones that don't come out the same differ.")
+    print("        '--jobs' Number of worker processes. '-ds', '-3ds' or '-m' skip detecting the platform of each file.")
+    print("\n        puyo_anim.py validate [files, directories or globs]")
+    print("        Checks every pointer in the NOF0 table of every animation file found and the tables they point to, without decoding them.")
+    print("        Prints what's wrong with the broken ones and exits with 1 if there are any. '-ds', '-3ds' or '-m' skip detecting the platform.")
+    print("\n        puyo_anim.py transcode [input] [output] --to [platform]")
+    print("        Rewrites an animation file for another platform straight from the binary, no json in between. The platform is one of")
+    print("        " + ", ".join(sorted(bench_variants)) + " (le and be being PS2 / PSP / Wii). '-ds', '-3ds' or '-m' say what the input is instead of detecting it.")
+    print("\n        puyo_anim.py generate [directory] [sizes]")
+    print("        Writes a synthetic .json and animation file of every variant (" + ", ".join(sorted(bench_variants)) + ") into the directory.")
+    print("        '--banks', '--elements' (per bank), '--animations', '--motions' (per element), '--keyframes' (per motion), '--seed' and '--variants' (comma separated).")
+    print("\n        puyo_anim.py bench [sizes]")
+    print("        Times decoding and encoding synthetic files of every variant. Takes the same sizes as generate, and")
+    print("        '--scales' Comma separated multiples of the animations for the scaling curve. Defaults to 1,2,4,8.")
+    print("        '--repeat' Runs of each, the fastest counts. Defaults to 5.")
+    print("        '--out' Save the results as json.")
+    print("        '--compare' Results saved before, exits with 1 if anything got slower than '--threshold' percent (10 by default).")
+
+def parse_args(args):
+    #Get the command arguments
+    options = {"input_file" : args[0], "output_file" : None, "platform" : None, "name_order" : False, "debug" : False, "profile" : False, "compact" : False,
+               "cache_dir" : None, "cache_size" : None, "base_file" : None, "animations" : None, "reduce" : False, "tolerance" : None, "pool_strings" : False,
+               "workers" : 1}
+    if options["input_file"] in ("-help", "-h", "-?"):
+        raise ValueError("help requested")
+
+    #Options that take a value. The checks below look for "-o", "-m" or "-ds" anywhere in an argument,
+    #so the value after one of these is skipped rather than read as more options
+    value_options = ("--cache-dir", "--cache-size", "--incremental", "--anims", "--tolerance", "--jobs")
+
+    #Get arguments
+    arg_index = 0
+    for argument in args:
+        if arg_index != 0 and args[arg_index-1] in value_options:
+            arg_index += 1
+            continue
+
+        #output
+        if argument.find("-o") != -1:
+            options["output_file"] = args[arg_index+1]
+
+        #ds/3ds file
+        if argument.find("-ds") != -1 or argument.find("-3ds") != -1:
+            if argument.find("-3ds") != -1 or options["platform"] == "3ds":
+                options["platform"] = "3ds"
+            else:
+                options["platform"] = "ds"
+
+        #puyo quest / puyo touch
+        if argument.find("-m") != -1:
+            options["platform"] = "mobile" #mobile =/= ds
+        arg_index += 1
+
+        #let probe() work it out
+        if argument == '--auto':
+            options["platform"] = "auto"
+
+        #name order blegh
+        if argument.find('--name_order') != -1:
+            options["name_order"] = True
+
+        #debug
+        if argument.find('--debug') != -1 or argument.find('-dbg') != -1:
+            options["debug"] = True
+
+        #phase timings
+        if argument.find('--profile') != -1:
+            options["profile"] = True
+
+        #json without the indentation
+        if argument.find('--compact') != -1:
+            options["compact"] = True
+
+        #conversion cache (arg_index is already on the next argument here)
+        if argument == '--cache-dir':
+            options["cache_dir"] = args[arg_index]
+        if argument == '--cache-size':
+            options["cache_size"] = args[arg_index]
+
+        #encode on top of an earlier output
+        if argument == '--incremental':
+            options["base_file"] = args[arg_index]
+
+        #only some of the animations
+        if argument == '--anims':
+            options["animations"] = args[arg_index].split(",")
+
+        #drop keyframes that don't change anything
+        if argument == '--reduce':
+            options["reduce"] = True
+        if argument == '--tolerance':
+            options["tolerance"] = args[arg_index]
+
+        #one copy of every name
+        if argument == '--pool-strings':
+            options["pool_strings"] = True
+
+        #decode the animations on several processes
+        if argument == '--jobs':
+            options["workers"] = int(args[arg_index])
+    return options
+
+def parse_command_args(args, value_options = ()):
+    #Commands take paths as positional arguments, so unlike the old style options are matched exactly here.
+    options = {"paths" : [], "platform" : None, "name_order" : False, "debug" : False, "profile" : False, "compact" : False, "reduce" : False, "pool_strings" : False}
+    arg_index = 0
+    while arg_index < len(args):
+        argument = args[arg_index]
+        if argument in value_options:
+            options[argument.lstrip("-").replace("-", "_")] = args[arg_index+1]
+            arg_index += 1
+        elif argument == "-ds":
+            if options["platform"] != "3ds":
+                options["platform"] = "ds"
+        elif argument == "-3ds":
+            options["platform"] = "3ds"
+        elif argument == "-m":
+            options["platform"] = "mobile"
+        elif argument == "--auto":
+            options["platform"] = "auto"
+        elif argument == "--name_order":
+            options["name_order"] = True
+        elif argument in ("--debug", "-dbg"):
+            options["debug"] = True
+        elif argument == "--profile":
+            options["profile"] = True
+        elif argument == "--compact":
+            options["compact"] = True
+        elif argument == "--reduce":
+            options["reduce"] = True
+        elif argument == "--pool-strings":
+            options["pool_strings"] = True
+        elif argument.startswith("-"):
+            raise ValueError("Unknown option " + argument)
+        else:
+            options["paths"].append(argument)
+        arg_index += 1
+    return options
+
+def run_batch(args):
+    options = parse_command_args(args, ("--dest", "--jobs", "--to", "--cache-dir", "--cache-size", "--tolerance"))
+    if len(options["paths"]) == 0:
+        raise ValueError("No inputs")
+    direction = {None : "auto", "json" : "to_json", "anim" : "to_anim", container_extension[1:] : "to_container"}[options.get("to")]
+    workers = options.get("jobs")
+    if workers != None:
+        workers = int(workers)
+    profiler = Profiler() if options["profile"] else None
+    cache = makeCache(options.get("cache_dir"), options.get("cache_size"))
+    summary = batch_convert(options["paths"], options.get("dest"), options["platform"], options["name_order"], workers, direction, profiler, options["compact"], cache,
+                            makeReduction(options["reduce"], options.get("tolerance")), options["pool_strings"])
+
+    print("Converted " + str(len(summary["converted"])) + " file(s), " + str(len(summary["failed"])) + " failed.")
+    for input_file, error in summary["failed"]:
+        print("    " + input_file + " - " + error)
+    if profiler != None:
+        print(json.dumps(profiler.report(), indent=4))
+    if len(summary["failed"]) != 0:
+        return 1
+    return 0
+
+def run_probe(args):
+    #Prints what probe() makes of every animation file found, as json
+    options = parse_command_args(args)
+    if len(options["paths"]) == 0:
+        raise ValueError("No inputs")
+    results = {}
+    failed = 0
+    for input_file, root in find_batch_inputs(options["paths"], "to_json"):
+        try:
+            anim_file_data = read_anim_file(input_file)
+            try:
+                results[input_file] = probe(anim_file_data)
+            finally:
+                close_anim_file(anim_file_data)
+        except (InvalidAnimationError, struct.error, OSError) as e:
+            results[input_file] = {"error" : type(e).__name__ + ": " + str(e)}
+            failed += 1
+    print(json.dumps(results, indent=4))
+    if failed != 0:
+        return 1
+    return 0
+
+def run_verify(args):
+    #Round trips every animation file found in memory and prints where the ones that don't come back the same differ
+    options = parse_command_args(args, ("--jobs",))
+    if len(options["paths"]) == 0:
+        raise ValueError("No inputs")
+    workers = options.get("jobs")
+    if workers != None:
+        workers = int(workers)
+    #Without -ds, -3ds or -m every file gets probed
+    results = verify_files(options["paths"], options["platform"] or "auto", workers)
+    differing = 0
+    failed = 0
+    for input_file, result, error in results:
+        if error != None:
+            print("    " + input_file + " - " + error)
+            failed += 1
+        elif not result["identical"]:
+            print("    " + input_file + " - differs at " + hex(result["offset"]) + " (" + result["section"] + ", " + result["field"] + "), sections: " +
+                  ", ".join(result["differing_sections"]) + ". " + str(result["size"]) + " bytes in, " + str(result["encoded_size"]) + " out")
+            differing += 1
+    print("Verified " + str(len(results)) + " file(s), " + str(differing) + " differ, " + str(failed) + " failed.")
+    if differing != 0 or failed != 0:
+        return 1
+    return 0
+
+def run_validate(args):
+    #Checks the structure of every animation file found from its NOF0 table, without decoding them
+    options = parse_command_args(args)
+    if len(options["paths"]) == 0:
+        raise ValueError("No inputs")
+    invalid = 0
+    failed = 0
+    inputs = find_batch_inputs(options["paths"], "to_json")
+    for input_file, root in inputs:
+        try:
+            anim_file_data = read_anim_file(input_file)
+            try:
+                result = validate(anim_file_data, options["platform"] or "auto")
+            finally:
+                close_anim_file(anim_file_data)
+        except (InvalidAnimationError, struct.error, OSError) as e:
+            print("    " + input_file + " - " + type(e).__name__ + ": " + str(e))
+            failed += 1
+            continue
+        if not result["valid"]:
+            print("    " + input_file + ":")
+            for problem in result["problems"]:
+                print("        " + problem)
+            invalid += 1
+    print("Validated " + str(len(inputs)) + " file(s), " + str(invalid) + " invalid, " + str(failed) + " failed.")
+    if invalid != 0 or failed != 0:
+        return 1
+    return 0
+
+bench_options = ("--banks", "--elements", "--animations", "--motions", "--keyframes", "--seed", "--variants")
+
+def benchSizes(options):
+    #--banks, --elements... -> synthetic_json() arguments, and the variants from --variants
+    sizes = {}
+    for name in ("banks", "elements", "animations", "motions", "keyframes", "seed"):
+        if name in options:
+            sizes[name] = int(options[name])
+    variants = None
+    if "variants" in options:
+        variants = options["variants"].split(",")
+        for variant in variants:
+            if variant not in bench_variants:
+                raise ValueError("Unknown variant " + variant)
+    return (sizes, variants)
+
+def run_transcode(args):
+    #Rewrites one animation file for another platform without going through json
+    options = parse_command_args(args, ("--to",))
+    if len(options["paths"]) != 2:
+        raise ValueError("One input and one output")
+    input_file, output_file = options["paths"]
+    platform, byte_order = bench_variants[options["to"]]
+    anim_file_data = read_anim_file(input_file)
+    try:
+        anim_data = transcode(anim_file_data, platform, byte_order, options["platform"] or "auto")
+    except (InvalidAnimationError, struct.error):
+        print(input_file, "is not a valid animation file.")
+        return 1
+    finally:
+        close_anim_file(anim_file_data)
+    write_output(output_file, True, lambda f: f.write(anim_data))
+    print("Done.")
+    return 0
+
+def run_generate(args):
+    options = parse_command_args(args, bench_options)
+    if len(options["paths"]) != 1:
+        raise ValueError("One output directory")
+    sizes, variants = benchSizes(options)
+    for path in write_corpus(options["paths"][0], variants, **sizes):
+        print(path)
+    return 0
+
+def run_bench(args):
+    options = parse_command_args(args, bench_options + ("--scales", "--repeat", "--out", "--compare", "--threshold"))
+    sizes, variants = benchSizes(options)
+    scales = tuple(int(scale) for scale in options.get("scales", "1,2,4,8").split(","))
+    results = benchmark(variants, scales, int(options.get("repeat", 5)), **sizes)
+    for result in results["results"]:
+        print(result["variant"].ljust(10) + str(result["scale"]).rjust(4) + "x  " + result["operation"].ljust(14) +
+              ("%.2f" % (result["bytes_per_second"] / 2 **20)).rjust(9) + " MB/s " + ("%.0f" % result["keyframes_per_second"]).rjust(10) + " keyframes/s")
+    if "out" in options:
+        with open(options["out"], "w") as f:
+            json.dump(results, f, indent = 4)
+    if "compare" in options:
+        with open(options["compare"], "r") as f:
+            baseline = json.load(f)
+        regressions = compare_benchmarks(baseline, results, float(options.get("threshold", 10)) / 100)
+        for variant, scale, operation, before, after in regressions:
+            print("Slower: " + variant + " " + str(scale) + "x " + operation + " " + ("%.2f" % (before / 2 **20)) + " -> " + ("%.2f" % (after / 2 **20)) + " MB/s")
+        if len(regressions) != 0:
+            return 1
+        print("No regressions.")
+    return 0
+
+def makeReduction(reduce, tolerance):
+    #--reduce and --tolerance -> the tolerances for convert_file(), None without --reduce
+    if not reduce:
+        return None
+    if tolerance == None:
+        return {}
+    return parseTolerances(tolerance)
+
+def makeCache(cache_dir, cache_size):
+    #--cache-dir and --cache-size (in MB) -> a ConversionCache, or None without a directory
+    if cache_dir == None:
+        return None
+    if cache_size == None:
+        return ConversionCache(cache_dir)
+    return ConversionCache(cache_dir, int(float(cache_size)*2**20))
+
+commands = {"batch" : run_batch, "probe" : run_probe, "verify" : run_verify, "validate" : run_validate, "transcode" : run_transcode, "generate" : run_generate, "bench" : run_bench}
+
+def main(args = None):
+    if args == None:
+        args = sys.argv[1:]
+    if len(args) != 0 and args[0] in commands:
+        try:
+            return commands[args[0]](args[1:])
+        except (ValueError, KeyError, IndexError):
+            print_usage()
+            return 2
+    try:
+        options = parse_args(args)
+    except:
+        print_usage()
+        return 2
+
+    input_file = options["input_file"]
+    #debug shit i guess
+    if options["debug"]:
+        print("input file: " + input_file)
+        print("output file: " + str(options["output_file"]))
+        print("platform: " + str(options["platform"]))
+
+    profiler = Profiler()
+    try:
+        cache = makeCache(options["cache_dir"], options["cache_size"])
+        reduction = makeReduction(options["reduce"], options["tolerance"])
+    except ValueError:
+        print_usage()
+        return 2
+    try:
+        convert_file(input_file, options["output_file"], options["platform"], options["name_order"], options["debug"], profiler, options["compact"], cache, options["base_file"], options["animations"], reduction, options["pool_strings"], options["workers"])
+    except InvalidAnimationError:
+        print(input_file, "is not a valid animation file.")
+        return 1
+    except (ValueError, KeyError, RuntimeError) as e:
+        #--auto or --anims on a json or container, an animation that isn't there or baking without numpy
+        print(e)
+        return 2
+    if cache != None:
+        cache.evict()
+    if reduction != None and "reduce" in profiler.operations and not options["profile"]:
+        #(nothing to say on a cache hit)
+        phases = profiler.report()["reduce"]["phases"]
+        print("Keyframes: " + str(phases["before"]["items"]) + " -> " + str(phases["after"]["items"]) + " (" + str(phases["before"]["bytes"]) + " -> " + str(phases["after"]["bytes"]) + " bytes)")
+    if options["profile"]:
+        print(json.dumps(profiler.report(), indent=4))
+    else:
+        print("Done.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())